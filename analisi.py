@@ -0,0 +1,250 @@
+"""
+BudgetTracker - Modulo Analisi
+Analisi pluriennali vettoriali su colonne NumPy
+
+Studente: Cattano Lorenzo
+Anno: 2025/2026
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database import (Database, SQL_GIORNO_ORDINALE, clausola_where,
+                      condizioni_transazioni)
+
+
+# Ordinale (date.toordinal) del 1970-01-01, origine di datetime64
+_ORDINALE_EPOCA = date(1970, 1, 1).toordinal()
+
+
+class DatiColonnari:
+    """
+    Transazioni memorizzate per colonne in array NumPy compatti
+
+    Ogni transazione occupa 15 byte: importo in centesimi (int64),
+    giorno come ordinale (int32), codice categoria (int16) e tipo (bool).
+    """
+
+    def __init__(self, centesimi: np.ndarray, giorni: np.ndarray,
+                 codici_categoria: np.ndarray, entrate: np.ndarray,
+                 categorie: List[str]):
+        """
+        Inizializza i dati colonnari
+
+        Args:
+            centesimi: Importi in centesimi (int64)
+            giorni: Date come ordinali di date.toordinal (int32)
+            codici_categoria: Indice in categorie di ogni transazione (int16)
+            entrate: True per le entrate, False per le uscite
+            categorie: Nomi delle categorie nell'ordine dei codici
+        """
+        self.centesimi = centesimi
+        self.giorni = giorni
+        self.codici_categoria = codici_categoria
+        self.entrate = entrate
+        self.categorie = categorie
+
+    def __len__(self) -> int:
+        return len(self.centesimi)
+
+    @classmethod
+    def carica(cls, db: Database, da_data: Optional[str] = None,
+               a_data: Optional[str] = None,
+               dimensione_blocco: int = 100_000) -> 'DatiColonnari':
+        """
+        Carica le transazioni dal database a blocchi
+
+        Args:
+            db: Database da cui leggere
+            da_data: Data iniziale inclusa (YYYY-MM-DD, default: nessun limite)
+            a_data: Data finale inclusa (YYYY-MM-DD, default: nessun limite)
+            dimensione_blocco: Righe lette per ogni fetchmany
+
+        Returns:
+            DatiColonnari con le transazioni dell'intervallo
+        """
+        condizioni, parametri = condizioni_transazioni(da_data=da_data, a_data=a_data)
+
+        cursore = db.conn.cursor()
+        cursore.execute("SELECT DISTINCT categoria FROM transazioni ORDER BY categoria")
+        categorie = [riga[0] for riga in cursore.fetchall()]
+        codici = {nome: i for i, nome in enumerate(categorie)}
+
+        # Conversioni svolte da SQLite per evitare oggetti Python per riga
+        cursore.execute(f"""
+            SELECT importo,
+                   {SQL_GIORNO_ORDINALE},
+                   categoria,
+                   tipo = 'entrata'
+            FROM transazioni{clausola_where(condizioni)}
+        """, parametri)
+
+        blocchi = []
+        while True:
+            righe = cursore.fetchmany(dimensione_blocco)
+            if not righe:
+                break
+            centesimi, giorni, nomi, entrate = zip(*righe)
+            blocchi.append((
+                np.array(centesimi, dtype=np.int64),
+                np.array(giorni, dtype=np.int32),
+                np.array([codici[nome] for nome in nomi], dtype=np.int16),
+                np.array(entrate, dtype=np.bool_)
+            ))
+        cursore.close()
+
+        if not blocchi:
+            return cls(np.empty(0, np.int64), np.empty(0, np.int32),
+                       np.empty(0, np.int16), np.empty(0, np.bool_), categorie)
+        colonne = [np.concatenate(colonna) for colonna in zip(*blocchi)]
+        return cls(*colonne, categorie)
+
+    @classmethod
+    def carica_file(cls, percorso: str) -> 'DatiColonnari':
+        """
+        Carica le transazioni da un file esportato in formato colonnare
+
+        Args:
+            percorso: File .btcol creato da EsportatoreTransazioni
+
+        Returns:
+            DatiColonnari con le transazioni del file
+        """
+        from esportatore import leggi_colonnare
+
+        colonne = leggi_colonnare(percorso, ['importo', 'data', 'categoria', 'tipo'])
+        return cls(colonne['importo'], colonne['data'], colonne['categoria'],
+                   colonne['tipo'].astype(np.bool_), colonne['categorie'])
+
+
+class MotoreAnalisi:
+    """
+    Calcoli vettoriali su tutti i mesi dei dati colonnari
+
+    I risultati sono array con una riga per ogni mese tra il primo e
+    l'ultimo presente (vedi mesi()), inclusi i mesi senza transazioni.
+    """
+
+    def __init__(self, dati: DatiColonnari):
+        """
+        Inizializza il motore precalcolando il mese di ogni transazione
+
+        Args:
+            dati: Dati colonnari da analizzare
+        """
+        self.dati = dati
+        if len(dati):
+            primo_giorno = int(dati.giorni.min())
+            giorni = np.arange(primo_giorno, int(dati.giorni.max()) + 1) - _ORDINALE_EPOCA
+            # Mese di ogni giorno dell'intervallo: una tabella piccola letta per indice
+            mese_del_giorno = giorni.astype('datetime64[D]').astype('datetime64[M]') \
+                .astype(np.int64)
+            self.primo_mese = int(mese_del_giorno[0])
+            self.numero_mesi = int(mese_del_giorno[-1]) - self.primo_mese + 1
+            tabella = (mese_del_giorno - self.primo_mese).astype(np.int32)
+            self.indici_mese = tabella[dati.giorni - primo_giorno]
+        else:
+            self.primo_mese, self.numero_mesi = 0, 0
+            self.indici_mese = np.empty(0, np.int32)
+
+        # bincount lavora su pesi float64: la conversione si fa una volta sola.
+        # Con importi interi le somme sono esatte fino a 2**53 centesimi e
+        # tornano int64 senza arrotondamenti
+        self._pesi = dati.centesimi.astype(np.float64)
+        self._celle_tipo = self.indici_mese * 2 + dati.entrate
+
+    def mesi(self) -> List[str]:
+        """Restituisce i mesi analizzati nel formato YYYY-MM"""
+        indici = np.arange(self.primo_mese, self.primo_mese + self.numero_mesi)
+        return [str(mese) for mese in indici.astype('datetime64[M]')]
+
+    def totali_mensili(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calcola entrate e uscite di ogni mese
+
+        Returns:
+            Tupla (entrate, uscite) di array in centesimi
+        """
+        somme = np.bincount(self._celle_tipo, weights=self._pesi,
+                            minlength=self.numero_mesi * 2)
+        somme = somme.astype(np.int64).reshape(self.numero_mesi, 2)
+        return somme[:, 1], somme[:, 0]
+
+    def spese_per_mese_categoria(self) -> np.ndarray:
+        """
+        Calcola le spese di ogni categoria in ogni mese
+
+        Returns:
+            Matrice in centesimi [mese, categoria] (colonne come dati.categorie)
+        """
+        # Una sola passata su tutte le righe: le entrate finiscono in celle scartate
+        numero_categorie = len(self.dati.categorie)
+        celle = (self.indici_mese.astype(np.int64) * numero_categorie
+                 + self.dati.codici_categoria) * 2 + self.dati.entrate
+        somme = np.bincount(celle, weights=self._pesi,
+                            minlength=self.numero_mesi * numero_categorie * 2)
+        somme = somme.reshape(self.numero_mesi, numero_categorie, 2)[:, :, 0]
+        return somme.astype(np.int64)
+
+    def giorni_per_mese(self) -> np.ndarray:
+        """Restituisce il numero di giorni di ogni mese analizzato"""
+        inizi = np.arange(self.primo_mese, self.primo_mese + self.numero_mesi + 1) \
+            .astype('datetime64[M]').astype('datetime64[D]')
+        return np.diff(inizi).astype(np.int64)
+
+    def media_giornaliera(self) -> np.ndarray:
+        """
+        Calcola la spesa media giornaliera di ogni mese
+
+        Returns:
+            Array in centesimi (come CalcolatoreStatistiche.media_giornaliera)
+        """
+        _, uscite = self.totali_mensili()
+        return uscite / self.giorni_per_mese()
+
+    def percentuale_categoria(self) -> np.ndarray:
+        """
+        Calcola la percentuale di ogni categoria sulle spese del mese
+
+        Returns:
+            Matrice [mese, categoria] di percentuali (0 nei mesi senza spese)
+        """
+        spese = self.spese_per_mese_categoria()
+        totali = spese.sum(axis=1, keepdims=True)
+        return np.divide(spese * 100.0, totali, out=np.zeros(spese.shape),
+                         where=totali != 0)
+
+    @staticmethod
+    def media_mobile(valori: np.ndarray, finestra: int = 3) -> np.ndarray:
+        """
+        Calcola la media mobile lungo la prima dimensione
+
+        I primi valori usano solo i periodi disponibili.
+
+        Args:
+            valori: Array (es. totali_mensili o spese_per_mese_categoria)
+            finestra: Numero di periodi della media
+
+        Returns:
+            Array float della stessa forma di valori
+        """
+        if finestra < 1:
+            raise ValueError("La finestra deve essere almeno 1")
+        cumulata = np.cumsum(valori, axis=0, dtype=np.float64)
+        somme = cumulata.copy()
+        somme[finestra:] -= cumulata[:-finestra]
+        periodi = np.minimum(np.arange(1, len(valori) + 1), finestra)
+        return somme / periodi.reshape((-1,) + (1,) * (somme.ndim - 1))
+
+    def andamento_mensile(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Restituisce entrate e uscite nel formato di Database.ottieni_andamento_mensile
+
+        Returns:
+            Dizionario {mese: (entrate, uscite)} in centesimi
+        """
+        entrate, uscite = self.totali_mensili()
+        return {mese: (e, u)
+                for mese, e, u in zip(self.mesi(), entrate.tolist(), uscite.tolist())}
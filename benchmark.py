@@ -0,0 +1,934 @@
+"""
+BudgetTracker - Benchmark
+Misura le prestazioni delle operazioni sul database
+
+Uso:
+    python benchmark.py                 # esegue tutti i benchmark
+    python benchmark.py filtri_mese     # esegue un singolo benchmark
+    python benchmark.py suite --json risultati.json
+    python benchmark.py suite --confronta risultati.json   # segnala le regressioni
+
+Studente: Cattano Lorenzo
+Anno: 2025/2026
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from database import Database, PROFILI_PRESTAZIONI, sposta_mese
+
+
+CATEGORIE_USCITA = ['Alimentari', 'Trasporti', 'Svago', 'Bollette', 'Salute',
+                    'Abbigliamento', 'Istruzione', 'Casa', 'Altro']
+CATEGORIE_ENTRATA = ['Stipendio', 'Bonus', 'Investimenti', 'Altro']
+
+# Parole per descrizioni realistiche (le prime sono le più frequenti)
+PAROLE_DESCRIZIONE = ['spesa', 'pagamento', 'bar', 'supermercato', 'benzina', 'bolletta',
+                      'pizzeria', 'farmacia', 'abbonamento', 'ristorante', 'treno',
+                      'libri', 'cinema', 'regalo', 'parrucchiere', 'ferramenta',
+                      'assicurazione', 'veterinario', 'palestra', 'concerto']
+
+# Data finale e mese misurato dalla suite: righe identiche in ogni esecuzione
+FINE_SUITE = date(2025, 6, 30)
+MESE_SUITE = "2025-06"
+
+# Peggioramento oltre il quale il confronto segnala una regressione
+# (sotto questa soglia le differenze sono spesso rumore tra due esecuzioni)
+SOGLIA_REGRESSIONE = 0.15
+
+
+def genera_righe(numero: int, anni: int = 10, seed: int = 42, asimmetria: float = 0.0,
+                 vocabolario: Optional[List[str]] = None,
+                 fine: Optional[date] = None) -> List[tuple]:
+    """
+    Genera transazioni casuali ma riproducibili
+
+    Args:
+        numero: Numero di transazioni da generare
+        anni: Ampiezza dell'intervallo di date (a ritroso da fine)
+        seed: Seme del generatore casuale
+        asimmetria: Esponente della distribuzione delle categorie: con 0 sono
+            equiprobabili, con 1 la k-esima è scelta con peso 1/k
+        vocabolario: Parole delle descrizioni, dalla più frequente (peso 1/k);
+            None per descrizioni uniche "Transazione <n>"
+        fine: Data più recente (default: oggi; fissarla rende le righe
+            identiche in giorni diversi)
+
+    Returns:
+        Lista di tuple (tipo, importo in centesimi, categoria, descrizione, data)
+    """
+    rnd = random.Random(seed)
+    fine = fine or date.today()
+    giorni = anni * 365
+    pesi_uscita = [1 / (k + 1) ** asimmetria for k in range(len(CATEGORIE_USCITA))]
+    pesi_entrata = [1 / (k + 1) ** asimmetria for k in range(len(CATEGORIE_ENTRATA))]
+    pesi_parole = [1 / (k + 1) for k in range(len(vocabolario or []))]
+    righe = []
+    for i in range(numero):
+        giorno = fine - timedelta(days=rnd.randrange(giorni))
+        if rnd.random() < 0.2:
+            tipo = 'entrata'
+            categoria = (rnd.choices(CATEGORIE_ENTRATA, pesi_entrata)[0] if asimmetria
+                         else rnd.choice(CATEGORIE_ENTRATA))
+        else:
+            tipo = 'uscita'
+            categoria = (rnd.choices(CATEGORIE_USCITA, pesi_uscita)[0] if asimmetria
+                         else rnd.choice(CATEGORIE_USCITA))
+        importo = rnd.randrange(100, 50_001)
+        if vocabolario:
+            descrizione = (" ".join(rnd.choices(vocabolario, pesi_parole, k=2))
+                           + f" {rnd.randrange(10_000)}")
+        else:
+            descrizione = f"Transazione {i}"
+        righe.append((tipo, importo, categoria, descrizione, giorno.isoformat()))
+    return righe
+
+
+def in_dizionari(righe: List[tuple]) -> List[Dict]:
+    """Converte le righe generate nei dizionari di aggiungi_transazioni_bulk"""
+    return [{'tipo': r[0], 'importo': r[1], 'categoria': r[2], 'descrizione': r[3], 'data': r[4]}
+            for r in righe]
+
+
+def popola_database(db: Database, righe: List[tuple]) -> None:
+    """Inserisce le righe generate con aggiungi_transazioni_bulk (importi in centesimi)"""
+    inseriti, scarti = db.aggiungi_transazioni_bulk(in_dizionari(righe))
+    if scarti or inseriti != len(righe):
+        raise ValueError(f"Righe generate non valide: {scarti[:3]}")
+
+
+def misura(funzione: Callable, ripetizioni: int = 5) -> float:
+    """
+    Misura il tempo mediano di esecuzione di una funzione
+
+    Returns:
+        Tempo mediano in millisecondi
+    """
+    tempi = []
+    for _ in range(ripetizioni):
+        inizio = time.perf_counter()
+        funzione()
+        tempi.append((time.perf_counter() - inizio) * 1000)
+    return statistics.median(tempi)
+
+
+def misura_stabile(funzione: Callable, ripetizioni: int = 5, durata_minima: float = 20.0) -> float:
+    """
+    Misura il tempo mediano di una chiamata ripetendo le funzioni più rapide
+
+    Ogni misura raggruppa abbastanza chiamate da durare almeno durata_minima,
+    così le operazioni sotto il millisecondo non dipendono dalla risoluzione
+    del timer e dal rumore di una singola chiamata.
+
+    Returns:
+        Tempo mediano di una chiamata in millisecondi
+    """
+    chiamate = max(1, int(durata_minima / max(misura(funzione, 1), 1e-3)))
+    return misura(lambda: [funzione() for _ in range(chiamate)], ripetizioni) / chiamate
+
+
+def benchmark_filtri_mese(dimensioni=(10_000, 100_000, 1_000_000)) -> None:
+    """
+    Confronta la latenza dei filtri per mese al crescere della tabella
+
+    La colonna "strftime" ripete la vecchia query non indicizzabile,
+    le altre usano i metodi di Database con gli intervalli di date
+    (senza CacheAggregati: ogni ripetizione esegue la query).
+    """
+    mese = date.today().strftime("%Y-%m")
+    print(f"{'righe':>10} {'strftime':>10} {'transazioni':>12} {'saldo':>8} {'categorie':>10}  (ms)")
+
+    for numero in dimensioni:
+        with tempfile.TemporaryDirectory() as cartella:
+            db = Database(os.path.join(cartella, "benchmark.db"), dimensione_cache=0)
+            popola_database(db, genera_righe(numero))
+
+            def query_strftime():
+                db.cursor.execute(
+                    "SELECT tipo, SUM(importo) FROM transazioni "
+                    "WHERE strftime('%Y-%m', data) = ? GROUP BY tipo", (mese,))
+                db.cursor.fetchall()
+
+            t_strftime = misura(query_strftime)
+            t_transazioni = misura(lambda: db.ottieni_transazioni(mese))
+            t_saldo = misura(lambda: db.ottieni_saldo(mese))
+            t_categorie = misura(lambda: db.ottieni_spese_per_categoria(mese))
+            db.chiudi()
+
+        print(f"{numero:>10} {t_strftime:>10.2f} {t_transazioni:>12.2f} "
+              f"{t_saldo:>8.2f} {t_categorie:>10.2f}")
+
+
+def benchmark_inserimento_bulk(numero: int = 200_000) -> None:
+    """Confronta aggiungi_transazione riga per riga con aggiungi_transazioni_bulk"""
+    righe = in_dizionari(genera_righe(numero))
+
+    with tempfile.TemporaryDirectory() as cartella:
+        db = Database(os.path.join(cartella, "singole.db"))
+        campione = righe[:1000]
+        inizio = time.perf_counter()
+        for r in campione:
+            db.aggiungi_transazione(r['tipo'], r['importo'], r['categoria'],
+                                    r['descrizione'], r['data'])
+        durata = time.perf_counter() - inizio
+        db.chiudi()
+        print(f"aggiungi_transazione:      {len(campione) / durata:>12,.0f} righe/s")
+
+        db = Database(os.path.join(cartella, "bulk.db"))
+        inizio = time.perf_counter()
+        inseriti, scarti = db.aggiungi_transazioni_bulk(righe)
+        durata = time.perf_counter() - inizio
+        db.chiudi()
+        print(f"aggiungi_transazioni_bulk: {inseriti / durata:>12,.0f} righe/s "
+              f"({inseriti} inserite, {len(scarti)} scartate)")
+
+
+def benchmark_paginazione(numero: int = 500_000) -> None:
+    """Confronta la lista completa del mese con la paginazione keyset"""
+    mese = date.today().strftime("%Y-%m")
+    with tempfile.TemporaryDirectory() as cartella:
+        db = Database(os.path.join(cartella, "benchmark.db"))
+        popola_database(db, genera_righe(numero, anni=1))
+
+        tutte = db.ottieni_transazioni(mese)
+        t_tutte = misura(lambda: db.ottieni_transazioni(mese))
+        t_prima = misura(lambda: db.ottieni_pagina_transazioni(mese, limite=100))
+        t_ultima = misura(lambda: db.ottieni_pagina_transazioni(mese, dopo=tutte[-101], limite=100))
+        db.chiudi()
+
+    print(f"transazioni nel mese:  {len(tutte)}")
+    print(f"lista completa:        {t_tutte:8.2f} ms")
+    print(f"prima pagina (100):    {t_prima:8.2f} ms")
+    print(f"ultima pagina (100):   {t_ultima:8.2f} ms")
+
+
+def benchmark_ridisegno_grafici(ripetizioni: int = 20) -> None:
+    """
+    Confronta il ridisegno dei grafici con una figura nuova ogni volta
+    (comportamento precedente) e con la figura persistente aggiornata in place
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from grafici import GeneratoreGrafici
+
+    generatore = GeneratoreGrafici()
+    spese = [
+        {'Casa': 800.0, 'Alimentari': 420.5, 'Trasporti': 180.0, 'Svago': 95.2},
+        {'Casa': 780.0, 'Alimentari': 455.0, 'Trasporti': 150.3, 'Svago': 120.0}
+    ]
+    saldi = [(2100.0, 1495.7), (1900.0, 2205.3)]
+
+    casi = {
+        'torta': (lambda d: generatore.crea_grafico_torta(d, "Spese"), spese, {}),
+        'barre': (lambda d: generatore.crea_grafico_barre(d, "Spese", orizzontale=True),
+                  spese, {'orizzontale': True}),
+        'confronto': (lambda d: generatore.crea_grafico_confronto_entrate_uscite(*d), saldi, {})
+    }
+
+    print(f"{'grafico':>10} {'figura nuova':>14} {'in place':>10}  (ms)")
+    for tipo, (crea, dati, opzioni) in casi.items():
+        contatore = iter(range(10 ** 9))
+
+        def figura_nuova():
+            figura = crea(dati[next(contatore) % 2])
+            FigureCanvasAgg(figura).draw()
+
+        figura = Figure(figsize=(10, 8), dpi=100)
+        canvas = FigureCanvasAgg(figura)
+
+        def in_place():
+            generatore.aggiorna_figura(figura, tipo, dati[next(contatore) % 2], "Spese", **opzioni)
+            canvas.draw()
+
+        in_place()
+        print(f"{tipo:>10} {misura(figura_nuova, ripetizioni):>14.2f} "
+              f"{misura(in_place, ripetizioni):>10.2f}")
+
+
+def benchmark_profili(numero: int = 200_000) -> None:
+    """Misura inserimenti e aggregazioni per ogni profilo di prestazioni"""
+    righe = genera_righe(numero)
+    dizionari = in_dizionari(righe)
+    mese = date.today().strftime("%Y-%m")
+
+    print(f"{'profilo':>12} {'singole/s':>10} {'bulk/s':>10} {'aggregato':>10} {'mese':>8}  (ms)")
+    for profilo in PROFILI_PRESTAZIONI:
+        with tempfile.TemporaryDirectory() as cartella:
+            db = Database(os.path.join(cartella, "benchmark.db"), profilo)
+
+            inizio = time.perf_counter()
+            for r in dizionari[:500]:
+                db.aggiungi_transazione(r['tipo'], r['importo'], r['categoria'],
+                                        r['descrizione'], r['data'])
+            singole = 500 / (time.perf_counter() - inizio)
+
+            inizio = time.perf_counter()
+            inseriti, _ = db.aggiungi_transazioni_bulk(dizionari)
+            bulk = inseriti / (time.perf_counter() - inizio)
+
+            def aggregato():
+                db.cursor.execute("SELECT substr(data, 1, 7), tipo, SUM(importo) "
+                                  "FROM transazioni GROUP BY 1, 2")
+                db.cursor.fetchall()
+
+            t_aggregato = misura(aggregato)
+            t_mese = misura(lambda: db.ottieni_transazioni(mese))
+            db.chiudi()
+
+        print(f"{profilo:>12} {singole:>10,.0f} {bulk:>10,.0f} {t_aggregato:>10.2f} {t_mese:>8.2f}")
+
+
+def benchmark_andamento(numero: int = 500_000, anni: int = 10) -> None:
+    """
+    Confronta l'andamento mensile calcolato con una query per mese
+    (ottieni_saldo) e con la singola query di ottieni_andamento_mensile
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from grafici import GeneratoreGrafici
+
+    a_mese = date.today().strftime("%Y-%m")
+    da_mese = sposta_mese(a_mese, -(12 * anni - 1))
+    mesi = [sposta_mese(da_mese, i) for i in range(12 * anni)]
+
+    with tempfile.TemporaryDirectory() as cartella:
+        # Senza cache dei risultati: si misurano le query
+        db = Database(os.path.join(cartella, "benchmark.db"), dimensione_cache=0)
+        popola_database(db, genera_righe(numero, anni=anni))
+
+        # Conta le query eseguite dalla connessione (esclusi i PRAGMA della cache)
+        query = []
+        db.conn.set_trace_callback(
+            lambda sql: query.append(sql) if not sql.startswith("PRAGMA") else None)
+        andamento = db.ottieni_andamento_mensile(da_mese, a_mese)
+        numero_query = len(query)
+        query.clear()
+        for mese in mesi:
+            db.ottieni_saldo(mese)
+        numero_query_mesi = len(query)
+        db.conn.set_trace_callback(None)
+
+        t_mesi = misura(lambda: {mese: db.ottieni_saldo(mese)[:2] for mese in mesi})
+        t_singola = misura(lambda: db.ottieni_andamento_mensile(da_mese, a_mese))
+        db.chiudi()
+
+    generatore = GeneratoreGrafici()
+    t_grafico = misura(
+        lambda: FigureCanvasAgg(generatore.crea_grafico_andamento_mensile(andamento)).draw())
+
+    print(f"mesi nell'intervallo:  {len(andamento)}")
+    print(f"una query per mese:    {t_mesi:8.2f} ms  ({numero_query_mesi} query)")
+    print(f"query singola:         {t_singola:8.2f} ms  ({numero_query} query)")
+    print(f"disegno del grafico:   {t_grafico:8.2f} ms")
+
+
+def benchmark_analisi(numero_db: int = 1_000_000, numero_motore: int = 20_000_000) -> None:
+    """Misura il caricamento colonnare e i calcoli vettoriali di MotoreAnalisi"""
+    import numpy as np
+    from analisi import DatiColonnari, MotoreAnalisi
+
+    with tempfile.TemporaryDirectory() as cartella:
+        db = Database(os.path.join(cartella, "benchmark.db"))
+        popola_database(db, genera_righe(numero_db))
+        t_carica = misura(lambda: DatiColonnari.carica(db), ripetizioni=3)
+        db.chiudi()
+
+    # Dati sintetici direttamente in memoria per il motore
+    generatore = np.random.default_rng(42)
+    oggi = date.today().toordinal()
+    dati = DatiColonnari(
+        generatore.integers(100, 200_000, numero_motore, dtype=np.int64),
+        generatore.integers(oggi - 3650, oggi, numero_motore).astype(np.int32),
+        generatore.integers(0, len(CATEGORIE_USCITA), numero_motore).astype(np.int16),
+        generatore.random(numero_motore) < 0.2,
+        CATEGORIE_USCITA
+    )
+
+    t_motore = misura(lambda: MotoreAnalisi(dati), ripetizioni=3)
+    motore = MotoreAnalisi(dati)
+    calcoli = {
+        'totali_mensili': motore.totali_mensili,
+        'spese_per_mese_categoria': motore.spese_per_mese_categoria,
+        'media_giornaliera': motore.media_giornaliera,
+        'percentuale_categoria': motore.percentuale_categoria,
+        'media_mobile (12)': lambda: MotoreAnalisi.media_mobile(
+            motore.spese_per_mese_categoria(), 12)
+    }
+
+    print(f"caricamento dal database: {t_carica:9.2f} ms  "
+          f"({numero_db / t_carica / 1000:,.2f} M righe/s)")
+    print(f"indici dei mesi:          {t_motore:9.2f} ms  "
+          f"({numero_motore / t_motore / 1000:,.1f} M righe/s)")
+    for nome, calcolo in calcoli.items():
+        tempo = misura(calcolo, ripetizioni=3)
+        print(f"{nome + ':':<26}{tempo:9.2f} ms  ({numero_motore / tempo / 1000:,.1f} M righe/s)")
+
+
+def benchmark_record_transazioni(numero: int = 500_000) -> None:
+    """
+    Confronta memoria e tempo di lettura delle transazioni come dizionari
+    (rappresentazione precedente) e come RigaTransazione
+    """
+    from database import COLONNE_TRANSAZIONI
+
+    query = f"SELECT {COLONNE_TRANSAZIONI} FROM transazioni"
+
+    with tempfile.TemporaryDirectory() as cartella:
+        db = Database(os.path.join(cartella, "benchmark.db"))
+        popola_database(db, genera_righe(numero))
+
+        def come_dizionari():
+            db.cursor.execute(query)
+            return [{'id': row[0], 'tipo': row[1], 'importo': row[2], 'categoria': row[3],
+                     'descrizione': row[4], 'data': row[5], 'data_inserimento': row[6]}
+                    for row in db.cursor.fetchall()]
+
+        def come_record():
+            return db._leggi_transazioni(query, [])
+
+        print(f"{'rappresentazione':>18} {'lettura (ms)':>13} {'righe/s':>12} {'memoria (MB)':>13}")
+        for nome, leggi in (('dizionari', come_dizionari), ('RigaTransazione', come_record)):
+            tempo = misura(leggi, ripetizioni=3)
+
+            tracemalloc.start()
+            risultato = leggi()
+            memoria = tracemalloc.get_traced_memory()[0] / 2 ** 20
+            tracemalloc.stop()
+            del risultato
+
+            print(f"{nome:>18} {tempo:>13.2f} {numero / tempo * 1000:>12,.0f} {memoria:>13.1f}")
+        db.chiudi()
+
+
+def benchmark_iterazione(numero: int = 500_000) -> None:
+    """Confronta il picco di memoria di ottieni_transazioni e itera_transazioni"""
+    with tempfile.TemporaryDirectory() as cartella:
+        db = Database(os.path.join(cartella, "benchmark.db"))
+        popola_database(db, genera_righe(numero))
+
+        def con_lista():
+            return sum(t.importo for t in db.ottieni_transazioni())
+
+        def con_iteratore():
+            return sum(t.importo for t in db.itera_transazioni(dimensione_blocco=1000))
+
+        print(f"{'metodo':>20} {'tempo (ms)':>11} {'picco memoria (MB)':>19}")
+        for nome, calcola in (('ottieni_transazioni', con_lista),
+                              ('itera_transazioni', con_iteratore)):
+            tempo = misura(calcola, ripetizioni=3)
+            tracemalloc.start()
+            calcola()
+            picco = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+            print(f"{nome:>20} {tempo:>11.2f} {picco:>19.1f}")
+        db.chiudi()
+
+
+def benchmark_esportazione(numero: int = 5_000_000, blocco: int = 500_000) -> None:
+    """Misura la velocità di esportazione in CSV, JSON Lines e formato colonnare"""
+    from esportatore import EsportatoreTransazioni, leggi_colonnare
+
+    with tempfile.TemporaryDirectory() as cartella:
+        db = Database(os.path.join(cartella, "benchmark.db"))
+        for inizio in range(0, numero, blocco):
+            popola_database(db, genera_righe(min(blocco, numero - inizio), seed=inizio))
+        esportatore = EsportatoreTransazioni(db)
+
+        print(f"{'formato':>10} {'tempo (s)':>10} {'righe/s':>12} {'dimensione (MB)':>16}")
+        for formato, estensione in (('csv', '.csv'), ('jsonl', '.jsonl'),
+                                    ('colonnare', '.btcol')):
+            percorso = os.path.join(cartella, "export" + estensione)
+            inizio = time.perf_counter()
+            esportati = esportatore.esporta(percorso, formato)
+            tempo = time.perf_counter() - inizio
+            dimensione = os.path.getsize(percorso) / 2 ** 20
+            print(f"{formato:>10} {tempo:>10.2f} {esportati / tempo:>12,.0f} {dimensione:>16.1f}")
+
+        inizio = time.perf_counter()
+        colonne = leggi_colonnare(os.path.join(cartella, "export.btcol"),
+                                  ['importo', 'data', 'categoria', 'tipo'])
+        tempo = time.perf_counter() - inizio
+        print(f"lettura colonnare (4 colonne numeriche): {tempo:.2f} s "
+              f"({len(colonne['importo']) / tempo:,.0f} righe/s)")
+        db.chiudi()
+
+
+def benchmark_ricerca(numero: int = 1_000_000) -> None:
+    """Misura la latenza di cerca_transazioni con FTS5 e con LIKE"""
+    # Frequenze decrescenti: 'spesa' è comune, 'concerto' è rara
+    righe = genera_righe(numero, vocabolario=PAROLE_DESCRIZIONE)
+    ricerche = ['s', 'spesa', 'conc', 'pizzeria roma', 'benzina 42', 'svago']
+
+    with tempfile.TemporaryDirectory() as cartella:
+        db = Database(os.path.join(cartella, "benchmark.db"))
+        popola_database(db, righe)
+
+        print(f"{'ricerca':>15} {'risultati':>10} {'FTS5 (ms)':>10} {'LIKE (ms)':>10}")
+        for testo in ricerche:
+            db.ricerca_fts = True
+            risultati = len(db.cerca_transazioni(testo, limite=numero))
+            t_fts = misura(lambda: db.cerca_transazioni(testo, limite=100))
+            db.ricerca_fts = False
+            t_like = misura(lambda: db.cerca_transazioni(testo, limite=100), ripetizioni=3)
+            print(f"{testo:>15} {risultati:>10,} {t_fts:>10.2f} {t_like:>10.2f}")
+        db.chiudi()
+
+
+def benchmark_piani_query(numero: int = 200_000, ripetizioni: int = 2000) -> None:
+    """
+    Verifica che le query frequenti usino un indice e misura la cache degli statement
+
+    Esce con codice 1 se verifica_piani_query trova letture complete di tabella.
+    """
+    import sqlite3
+
+    with tempfile.TemporaryDirectory() as cartella:
+        percorso = os.path.join(cartella, "benchmark.db")
+        db = Database(percorso, dimensione_cache=0)
+        popola_database(db, genera_righe(numero))
+        problemi = db.verifica_piani_query()
+
+        mese = date.today().strftime("%Y-%m")
+        pagina = db.ottieni_pagina_transazioni(mese, limite=1)
+
+        def query_frequenti():
+            db.ottieni_saldo(mese)
+            db.ottieni_spese_per_categoria(mese)
+            db.ottieni_pagina_transazioni(mese, dopo=pagina[-1], limite=1)
+
+        tempi = {}
+        for nome, dimensione in (('statement in cache', 256), ('senza cache', 0)):
+            db.conn.close()
+            db.conn = sqlite3.connect(percorso, cached_statements=dimensione)
+            db.cursor = db.conn.cursor()
+            tempi[nome] = misura(lambda: [query_frequenti() for _ in range(ripetizioni)])
+        db.chiudi()
+
+    for nome, tempo in tempi.items():
+        print(f"saldo + spese + pagina, {nome:<18} {tempo * 1000 / ripetizioni:8.1f} µs")
+    if problemi:
+        for query, dettaglio in problemi:
+            print(f"SENZA INDICE: {dettaglio}\n    {query}")
+        sys.exit(1)
+    print("piani delle query: tutte le query frequenti usano un indice")
+
+
+def benchmark_cache_aggregati(numero: int = 500_000, giri: int = 50) -> None:
+    """Simula la navigazione tra i mesi con e senza cache dei risultati aggregati"""
+    mese_corrente = date.today().strftime("%Y-%m")
+    mesi = [sposta_mese(mese_corrente, -i) for i in range(12)]
+
+    with tempfile.TemporaryDirectory() as cartella:
+        percorso = os.path.join(cartella, "benchmark.db")
+        db = Database(percorso)
+        popola_database(db, genera_righe(numero))
+        db.chiudi()
+
+        print(f"{'cache':>8} {'vista (µs)':>11} {'riusi':>7} {'mancati':>8}")
+        for dimensione in (0, 256):
+            db = Database(percorso, dimensione_cache=dimensione, sola_lettura=True)
+
+            def naviga():
+                # Come la richiesta 'vista' di aggiorna_visualizzazione per ogni mese
+                for mese in mesi:
+                    db.ottieni_saldo(mese)
+                    db.ottieni_spese_per_categoria(mese)
+                    db.ottieni_andamento_mensile(sposta_mese(mese, -11), mese)
+
+            tempo = misura(lambda: [naviga() for _ in range(giri)])
+            contatori = db.statistiche_cache()
+            print(f"{dimensione:>8} {tempo * 1000 / (giri * len(mesi)):>11.1f} "
+                  f"{contatori['riusi']:>7} {contatori['mancati']:>8}")
+            db.chiudi()
+
+
+def benchmark_grafici_mensili(numero: int = 100_000, dpi: int = 300) -> None:
+    """Misura il salvataggio dei grafici mensili di un anno al variare dei processi"""
+    from rapporto import GeneratoreRapporti, TIPI_GRAFICI_MENSILI
+
+    a_mese = date.today().strftime("%Y-%m")
+    da_mese = sposta_mese(a_mese, -11)
+    core = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as cartella:
+        db = Database(os.path.join(cartella, "benchmark.db"))
+        popola_database(db, genera_righe(numero, anni=1))
+        generatore = GeneratoreRapporti(db)
+
+        print(f"core disponibili: {core}, grafici: {12 * len(TIPI_GRAFICI_MENSILI)} a {dpi} dpi")
+        print(f"{'processi':>9} {'tempo (s)':>10} {'grafici/s':>10} {'accelerazione':>14}")
+        base = None
+        for processi in sorted({1, max(1, core // 2), core}):
+            inizio = time.perf_counter()
+            salvati = generatore.salva_grafici_mensili(
+                da_mese, a_mese, os.path.join(cartella, f"grafici_{processi}"),
+                dpi=dpi, processi=processi)
+            tempo = time.perf_counter() - inizio
+            base = base or tempo
+            print(f"{processi:>9} {tempo:>10.2f} {len(salvati) / tempo:>10.1f} "
+                  f"{base / tempo:>13.2f}x")
+        db.chiudi()
+
+
+def benchmark_validazione(numero: int = 1_000_000) -> None:
+    """Confronta la validazione riga per riga e quella a colonne di importi e date"""
+    from logica import Validatore
+
+    righe = genera_righe(numero)
+    colonne = {
+        'importi': (Validatore.valida_importo, Validatore.valida_colonna_importi,
+                    [f"{r[1] // 100},{r[1] % 100:02d}" for r in righe]),
+        'date ISO': (Validatore.valida_data, Validatore.valida_colonna_date,
+                     [r[4] for r in righe]),
+        'date GG/MM/AAAA': (Validatore.valida_data, Validatore.valida_colonna_date,
+                            [f"{r[4][8:]}/{r[4][5:7]}/{r[4][:4]}" for r in righe])
+    }
+
+    print(f"{'colonna':>16} {'righe (ms)':>11} {'colonna (ms)':>13} {'accelerazione':>14}")
+    for nome, (valida_riga, valida_colonna, valori) in colonne.items():
+        tempo_righe = misura(lambda: [valida_riga(v) for v in valori], ripetizioni=1)
+        tempo_colonna = misura(lambda: valida_colonna(valori), ripetizioni=3)
+        print(f"{nome:>16} {tempo_righe:>11.1f} {tempo_colonna:>13.1f} "
+              f"{tempo_righe / tempo_colonna:>13.1f}x")
+
+
+def benchmark_suite(numero: int = 200_000, anni: int = 5, ripetizioni: int = 5) -> Dict:
+    """
+    Misure ripetibili di database, validazione, formattazione, grafici e
+    aggiornamento della vista, da salvare con --json e confrontare con --confronta
+
+    Le righe sono generate con seme e data finale fissi: versioni diverse
+    del programma vengono misurate sugli stessi dati.
+
+    Returns:
+        Dizionario con 'parametri' e 'misure' ({nome: {'valore', 'unita'}})
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from grafici import GeneratoreGrafici
+    from logica import Bilancio, Formattatore, Validatore
+
+    parametri = {'righe': numero, 'anni': anni, 'seed': 42, 'asimmetria': 1.0,
+                 'fine': FINE_SUITE.isoformat(), 'ripetizioni': ripetizioni}
+    righe = genera_righe(numero, anni=anni, seed=parametri['seed'],
+                         asimmetria=parametri['asimmetria'],
+                         vocabolario=PAROLE_DESCRIZIONE, fine=FINE_SUITE)
+    misure = {}
+
+    def registra(nome: str, valore: float, unita: str) -> None:
+        misure[nome] = {'valore': round(valore, 4), 'unita': unita}
+        print(f"{nome:<42} {valore:>14,.3f} {unita}")
+
+    # Validazione e formattazione: input come li scrive l'utente o li legge l'importatore
+    campione = righe[:20_000]
+    operazioni = {
+        'Validatore.valida_importo': (Validatore.valida_importo,
+                                      [f"{r[1] // 100},{r[1] % 100:02d}" for r in campione]),
+        'Validatore.valida_data': (Validatore.valida_data,
+                                   [r[4] if i % 2 else f"{r[4][8:]}/{r[4][5:7]}/{r[4][:4]}"
+                                    for i, r in enumerate(campione)]),
+        'Validatore.valida_descrizione': (Validatore.valida_descrizione,
+                                          [f" {r[3]} " for r in campione]),
+        'Formattatore.formatta_valuta': (Formattatore.formatta_valuta,
+                                         [r[1] for r in campione]),
+        'Formattatore.formatta_data': (Formattatore.formatta_data, [r[4] for r in campione])
+    }
+    for nome, (funzione, valori) in operazioni.items():
+        tempo = misura_stabile(lambda: [funzione(v) for v in valori], ripetizioni)
+        registra(f"logica.{nome}", len(valori) / tempo * 1000, 'op/s')
+    for nome, funzione, valori in (
+            ('Validatore.valida_colonna_importi', Validatore.valida_colonna_importi,
+             operazioni['Validatore.valida_importo'][1]),
+            ('Validatore.valida_colonna_date', Validatore.valida_colonna_date,
+             operazioni['Validatore.valida_data'][1])):
+        tempo = misura_stabile(lambda: funzione(valori), ripetizioni)
+        registra(f"logica.{nome}", len(valori) / tempo * 1000, 'op/s')
+
+    try:
+        from gui import InterfacciaGrafica, MESI_ANDAMENTO
+    except ImportError:
+        # Python senza tkinter: l'aggiornamento della vista non viene misurato
+        InterfacciaGrafica = None
+
+    generatore = GeneratoreGrafici()
+    mesi = [sposta_mese(MESE_SUITE, -i) for i in range(12)]
+    dizionari = in_dizionari(righe)
+
+    with tempfile.TemporaryDirectory() as cartella:
+        # Senza cache dei risultati: si misurano le query
+        db = Database(os.path.join(cartella, "suite.db"), dimensione_cache=0)
+
+        inizio = time.perf_counter()
+        inseriti, _ = db.aggiungi_transazioni_bulk(dizionari)
+        registra('database.aggiungi_transazioni_bulk',
+                 inseriti / (time.perf_counter() - inizio), 'righe/s')
+
+        inizio = time.perf_counter()
+        for r in dizionari[:500]:
+            db.aggiungi_transazione(r['tipo'], r['importo'], r['categoria'],
+                                    r['descrizione'], r['data'])
+        registra('database.aggiungi_transazione', 500 / (time.perf_counter() - inizio), 'righe/s')
+
+        prima_pagina = db.ottieni_pagina_transazioni(MESE_SUITE, limite=100)
+        query = {
+            'ottieni_transazioni': lambda: db.ottieni_transazioni(MESE_SUITE),
+            'ottieni_pagina_transazioni': lambda: db.ottieni_pagina_transazioni(
+                MESE_SUITE, dopo=prima_pagina[-1], limite=100),
+            'ottieni_saldo': lambda: db.ottieni_saldo(MESE_SUITE),
+            'ottieni_spese_per_categoria': lambda: db.ottieni_spese_per_categoria(MESE_SUITE),
+            'ottieni_andamento_mensile': lambda: db.ottieni_andamento_mensile(mesi[-1], MESE_SUITE),
+            'cerca_transazioni': lambda: db.cerca_transazioni('spesa', limite=100)
+        }
+        for nome, funzione in query.items():
+            registra(f"database.{nome}", misura_stabile(funzione, ripetizioni), 'ms')
+        tempo = misura(lambda: sum(1 for _ in db.itera_transazioni()), 3)
+        registra('database.itera_transazioni', (inseriti + 500) / tempo * 1000, 'righe/s')
+
+        if InterfacciaGrafica is not None:
+            figura = Figure(figsize=(10, 8), dpi=100)
+            canvas = FigureCanvasAgg(figura)
+            indice = iter(range(10 ** 9))
+
+            def aggiorna_vista():
+                # aggiorna_visualizzazione e _applica_visualizzazione con il tab
+                # Grafici aperto, senza widget: a ogni chiamata un mese diverso
+                mese = mesi[next(indice) % len(mesi)]
+                (entrate, uscite, saldo), spese, pagina, _ = (
+                    db.ottieni_saldo(mese),
+                    db.ottieni_spese_per_categoria(mese),
+                    InterfacciaGrafica._leggi_prima_pagina(db, mese, None, ""),
+                    db.ottieni_andamento_mensile(
+                        sposta_mese(mese, -(MESI_ANDAMENTO - 1)), mese))
+                bilancio = Bilancio(entrate, uscite)
+                etichette = [Formattatore.formatta_valuta(v)
+                             for v in (bilancio.entrate, bilancio.uscite, saldo)]
+                # Valori delle righe come in _inserisci_riga_treeview
+                etichette += [(Formattatore.formatta_data(t.data), t.tipo.capitalize(),
+                               Formattatore.formatta_valuta(t.importo)) for t in pagina]
+                generatore.aggiorna_figura(
+                    figura, 'torta', InterfacciaGrafica._spese_in_euro(spese),
+                    f"Spese per Categoria - {Formattatore.ottieni_nome_mese(mese)}")
+                canvas.draw()
+
+            aggiorna_vista()
+            registra('gui.aggiorna_visualizzazione', misura_stabile(aggiorna_vista, ripetizioni), 'ms')
+
+        # Dati dei grafici di due mesi, alternati negli aggiornamenti in place
+        spese = [{c: Formattatore.in_euro(v) for c, v in db.ottieni_spese_per_categoria(m).items()}
+                 for m in mesi[:2]]
+        saldi = [tuple(Formattatore.in_euro(v) for v in db.ottieni_saldo(m)[:2]) for m in mesi[:2]]
+        andamenti = [{m: (Formattatore.in_euro(e), Formattatore.in_euro(u))
+                      for m, (e, u) in db.ottieni_andamento_mensile(
+                          sposta_mese(mese, -11), mese).items()}
+                     for mese in mesi[:2]]
+        db.chiudi()
+
+    grafici = {
+        'torta': (lambda d: generatore.crea_grafico_torta(d, "Spese"), spese, {}),
+        'barre': (lambda d: generatore.crea_grafico_barre(d, "Spese", orizzontale=True),
+                  spese, {'orizzontale': True}),
+        'confronto': (lambda d: generatore.crea_grafico_confronto_entrate_uscite(*d), saldi, {}),
+        'andamento': (generatore.crea_grafico_andamento_mensile, andamenti, {})
+    }
+    for tipo, (crea, dati, opzioni) in grafici.items():
+        indice = iter(range(10 ** 9))
+        registra(f"grafici.{tipo}",
+                 misura_stabile(lambda: FigureCanvasAgg(crea(dati[next(indice) % 2])).draw(),
+                                ripetizioni), 'ms')
+
+        figura = Figure(figsize=(10, 8), dpi=100)
+        canvas = FigureCanvasAgg(figura)
+
+        def in_place():
+            generatore.aggiorna_figura(figura, tipo, dati[next(indice) % 2], "Spese", **opzioni)
+            canvas.draw()
+
+        in_place()
+        registra(f"grafici.{tipo}_in_place", misura_stabile(in_place, ripetizioni), 'ms')
+
+    return {'parametri': parametri, 'misure': misure}
+
+
+# Script eseguito in un interprete nuovo per misurare l'avvio
+_SCRIPT_AVVIO = """
+import time
+inizio = time.perf_counter()
+import gui
+importato = time.perf_counter()
+try:
+    import tkinter as tk
+    root = tk.Tk()
+except tk.TclError:
+    print(f"{importato - inizio} -1 -1")
+else:
+    app = gui.InterfacciaGrafica(root)
+    root.update()
+    finestra = time.perf_counter()
+    app.notebook.select(app.tab_grafici)
+    root.update()
+    print(f"{importato - inizio} {finestra - inizio} {time.perf_counter() - finestra}")
+    app.esecutore.chiudi()
+    root.destroy()
+"""
+
+
+def benchmark_avvio(ripetizioni: int = 5) -> None:
+    """
+    Misura l'avvio dell'applicazione in un processo Python nuovo
+
+    Riporta il tempo di import di gui, il tempo alla prima finestra
+    e il costo del primo accesso al tab Grafici (caricamento di matplotlib).
+    Senza display disponibile viene misurato solo l'import.
+    """
+    cartella_progetto = os.path.dirname(os.path.abspath(__file__))
+    misure = []
+    with tempfile.TemporaryDirectory() as cartella:
+        for _ in range(ripetizioni):
+            # Il database di default viene creato nella cartella di lavoro
+            uscita = subprocess.run(
+                [sys.executable, "-c", _SCRIPT_AVVIO], cwd=cartella, capture_output=True,
+                text=True, env={**os.environ, 'PYTHONPATH': cartella_progetto})
+            if uscita.returncode != 0:
+                print(uscita.stderr)
+                return
+            misure.append([float(v) * 1000 for v in uscita.stdout.split()[-3:]])
+
+    import_gui, prima_finestra, tab_grafici = (statistics.median(m) for m in zip(*misure))
+    print(f"import gui:          {import_gui:8.1f} ms")
+    if prima_finestra < 0:
+        print("prima finestra:      non misurabile (nessun display)")
+    else:
+        print(f"prima finestra:      {prima_finestra:8.1f} ms")
+        print(f"primo tab Grafici:   {tab_grafici:8.1f} ms")
+
+
+BENCHMARK: Dict[str, Callable] = {
+    'filtri_mese': benchmark_filtri_mese,
+    'inserimento_bulk': benchmark_inserimento_bulk,
+    'paginazione': benchmark_paginazione,
+    'ridisegno_grafici': benchmark_ridisegno_grafici,
+    'avvio': benchmark_avvio,
+    'profili': benchmark_profili,
+    'andamento': benchmark_andamento,
+    'analisi': benchmark_analisi,
+    'record_transazioni': benchmark_record_transazioni,
+    'iterazione': benchmark_iterazione,
+    'esportazione': benchmark_esportazione,
+    'ricerca': benchmark_ricerca,
+    'piani_query': benchmark_piani_query,
+    'cache_aggregati': benchmark_cache_aggregati,
+    'grafici_mensili': benchmark_grafici_mensili,
+    'validazione': benchmark_validazione,
+    'suite': benchmark_suite,
+}
+
+
+def descrivi_ambiente() -> Dict:
+    """Restituisce versioni e piattaforma registrate insieme ai risultati"""
+    import platform
+    import sqlite3
+
+    ambiente = {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                'piattaforma': platform.platform(), 'commit': None}
+    for modulo in ('numpy', 'matplotlib'):
+        try:
+            ambiente[modulo] = __import__(modulo).__version__
+        except ImportError:
+            ambiente[modulo] = None
+    try:
+        uscita = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        ambiente['commit'] = uscita.stdout.strip() or None
+    except OSError:
+        pass
+    return ambiente
+
+
+def confronta_risultati(precedenti: Dict, attuali: Dict) -> int:
+    """
+    Stampa le variazioni delle misure rispetto a risultati salvati in precedenza
+
+    Args:
+        precedenti: Contenuto di un file salvato con --json
+        attuali: Risultati appena misurati (stessa struttura)
+
+    Returns:
+        Numero di misure peggiorate oltre SOGLIA_REGRESSIONE
+    """
+    regressioni = 0
+    print(f"\n=== confronto con {precedenti['ambiente'].get('commit') or precedenti['data']} ===")
+    for nome, risultato in attuali['risultati'].items():
+        vecchio = precedenti['risultati'].get(nome)
+        if vecchio is None:
+            continue
+        if vecchio['parametri'] != risultato['parametri']:
+            print(f"{nome}: parametri diversi, misure non confrontabili")
+            continue
+        for chiave, nuova in risultato['misure'].items():
+            precedente = vecchio['misure'].get(chiave)
+            if not precedente or not precedente['valore'] or not nuova['valore']:
+                continue
+            rapporto = nuova['valore'] / precedente['valore']
+            # I tempi migliorano se diminuiscono, le velocità (.../s) se aumentano
+            peggioramento = rapporto - 1 if nuova['unita'] == 'ms' else 1 / rapporto - 1
+            if peggioramento > SOGLIA_REGRESSIONE:
+                stato = "PEGGIORATA"
+                regressioni += 1
+            elif peggioramento < -SOGLIA_REGRESSIONE:
+                stato = "migliorata"
+            else:
+                stato = ""
+            print(f"{chiave:<42} {precedente['valore']:>14,.3f} -> {nuova['valore']:>14,.3f} "
+                  f"{nuova['unita']:<7} {rapporto - 1:>+7.1%} {stato}")
+    return regressioni
+
+
+def main() -> None:
+    """Esegue i benchmark richiesti da riga di comando"""
+    parser = argparse.ArgumentParser(description="Benchmark delle prestazioni di BudgetTracker")
+    parser.add_argument('nomi', nargs='*', metavar='benchmark',
+                        help=f"benchmark da eseguire (default: tutti): {', '.join(BENCHMARK)}")
+    parser.add_argument('--json', metavar='FILE',
+                        help="salva i risultati misurati (es. della suite) in JSON")
+    parser.add_argument('--confronta', metavar='FILE',
+                        help="confronta i risultati con un file salvato da un'altra versione")
+    opzioni = parser.parse_args()
+
+    for nome in opzioni.nomi:
+        if nome not in BENCHMARK:
+            print(f"Benchmark sconosciuto: {nome}. Disponibili: {', '.join(BENCHMARK)}")
+            sys.exit(1)
+
+    risultati = {}
+    for nome in opzioni.nomi or list(BENCHMARK):
+        print(f"\n=== {nome} ===")
+        risultato = BENCHMARK[nome]()
+        # Solo alcuni benchmark restituiscono misure da salvare
+        if risultato is not None:
+            risultati[nome] = risultato
+
+    documento = {'versione_formato': 1, 'data': datetime.now().isoformat(timespec='seconds'),
+                 'ambiente': descrivi_ambiente(), 'risultati': risultati}
+    if opzioni.json:
+        with open(opzioni.json, 'w', encoding='utf-8') as f:
+            json.dump(documento, f, ensure_ascii=False, indent=2)
+        print(f"\nRisultati salvati in {opzioni.json}")
+    if opzioni.confronta:
+        with open(opzioni.confronta, encoding='utf-8') as f:
+            regressioni = confronta_risultati(json.load(f), documento)
+        if regressioni:
+            print(f"{regressioni} misure peggiorate di oltre il {SOGLIA_REGRESSIONE:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
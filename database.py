@@ -6,50 +6,470 @@ Studente: Cattano Lorenzo
 Anno: 2025/2026
 """
 
+import itertools
+import json
+import os
+import re
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, List, Dict, Optional, Tuple, Iterable, Iterator, Callable, Union
+
+from logica import Validatore, RigaTransazione
+
+
+# Versione corrente dello schema (salvata in PRAGMA user_version)
+VERSIONE_SCHEMA = 5
+
+# Statement preparati tenuti in cache da ogni connessione: le combinazioni
+# di filtri di condizioni_transazioni e le altre query sono meno di cento
+DIMENSIONE_CACHE_STATEMENT = 256
+
+# File di configurazione opzionale, es. {"profilo_database": "veloce"}
+FILE_CONFIGURAZIONE = "budgettracker.json"
+
+# Profili di prestazioni: PRAGMA applicati all'apertura della connessione
+PROFILI_PRESTAZIONI = {
+    # Impostazioni di default di SQLite (rollback journal, sync FULL)
+    'predefinito': {},
+    # WAL con sync NORMAL: sicuro in caso di crash dell'applicazione
+    'bilanciato': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -20000,          # circa 20 MB
+        'mmap_size': 268435456         # 256 MB
+    },
+    # Per importazioni massive ripetibili: sicuro se si chiude solo
+    # l'applicazione, ma un crash del sistema operativo o un'interruzione di
+    # corrente possono corrompere il database (tenere un backup)
+    'veloce': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'temp_store': 'MEMORY',
+        'cache_size': -100000,         # circa 100 MB
+        'mmap_size': 1073741824        # 1 GB
+    }
+}
+
+PROFILO_DEFAULT = 'bilanciato'
+
+# PRAGMA ammessi nei profili personalizzati
+PRAGMA_CONSENTITI = {'journal_mode', 'synchronous', 'temp_store', 'cache_size',
+                     'mmap_size', 'busy_timeout', 'wal_autocheckpoint'}
+
+# PRAGMA che modificano il file: ignorati dalle connessioni in sola lettura
+PRAGMA_SCRITTURA = {'journal_mode', 'wal_autocheckpoint'}
+
+
+def uri_sola_lettura(percorso: str) -> str:
+    """
+    Costruisce l'URI SQLite che apre un file in sola lettura
+
+    Args:
+        percorso: Percorso del file database
+
+    Returns:
+        URI del tipo file:/percorso?mode=ro
+    """
+    percorso = os.path.abspath(percorso).replace(os.sep, '/')
+    if not percorso.startswith('/'):
+        percorso = '/' + percorso          # Windows: file:/C:/...
+    # Nell'URI solo questi caratteri hanno un significato speciale
+    percorso = percorso.replace('%', '%25').replace('?', '%3f').replace('#', '%23')
+    return f"file:{percorso}?mode=ro"
+
+
+def leggi_profilo_configurato(percorso: str = FILE_CONFIGURAZIONE) -> Optional[Union[str, Dict]]:
+    """
+    Legge il profilo di prestazioni dal file di configurazione
+
+    Args:
+        percorso: Percorso del file JSON di configurazione
+
+    Returns:
+        Nome del profilo o dizionario di PRAGMA (None se non configurato)
+    """
+    if not os.path.exists(percorso):
+        return None
+    try:
+        with open(percorso, encoding="utf-8") as f:
+            return json.load(f).get('profilo_database')
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Errore nella lettura della configurazione: {e}")
+        return None
+
+
+def intervallo_mese(mese: str) -> Tuple[str, str]:
+    """
+    Converte un mese nell'intervallo di date [inizio, fine)
+
+    Le date sono salvate come testo YYYY-MM-DD, quindi il confronto
+    lessicografico con questo intervallo può usare l'indice su 'data'
+    (a differenza di strftime('%Y-%m', data) = ?).
+
+    Args:
+        mese: Mese nel formato YYYY-MM
+
+    Returns:
+        Tupla (primo giorno del mese, primo giorno del mese successivo)
+    """
+    anno, numero_mese = int(mese[:4]), int(mese[5:7])
+    if numero_mese == 12:
+        anno_successivo, mese_successivo = anno + 1, 1
+    else:
+        anno_successivo, mese_successivo = anno, numero_mese + 1
+    return (f"{anno:04d}-{numero_mese:02d}-01",
+            f"{anno_successivo:04d}-{mese_successivo:02d}-01")
+
+
+def sposta_mese(mese: str, delta: int) -> str:
+    """
+    Sposta un mese in avanti o indietro
+
+    Args:
+        mese: Mese nel formato YYYY-MM
+        delta: Numero di mesi (negativo per andare indietro)
+
+    Returns:
+        Mese risultante nel formato YYYY-MM
+    """
+    indice = int(mese[:4]) * 12 + int(mese[5:7]) - 1 + delta
+    return f"{indice // 12:04d}-{indice % 12 + 1:02d}"
+
+
+def condizioni_transazioni(mese: Optional[str] = None,
+                           categoria: Optional[str] = None,
+                           da_data: Optional[str] = None,
+                           a_data: Optional[str] = None,
+                           prefisso: str = "") -> Tuple[List[str], List]:
+    """
+    Costruisce le condizioni SQL dei filtri sulle transazioni
+
+    I filtri sulla data diventano un solo intervallo [inizio, fine) e le
+    condizioni hanno sempre lo stesso ordine: ogni combinazione di filtri
+    produce lo stesso testo SQL, che sqlite3 ritrova tra gli statement
+    preparati invece di ricompilarlo.
+
+    Args:
+        mese: Filtro per mese (formato YYYY-MM)
+        categoria: Filtro per categoria ("Tutte" o None per nessun filtro)
+        da_data: Data iniziale inclusa (formato YYYY-MM-DD)
+        a_data: Data finale inclusa (formato YYYY-MM-DD)
+        prefisso: Alias della tabella da anteporre alle colonne (es. "t.")
+
+    Returns:
+        Tupla (condizioni da unire con AND, parametri)
+    """
+    inizio, fine = intervallo_mese(mese) if mese else (None, None)
+    if da_data and (inizio is None or da_data > inizio):
+        inizio = da_data
+    if a_data:
+        giorno_dopo = (date.fromisoformat(a_data) + timedelta(days=1)).isoformat()
+        if fine is None or giorno_dopo < fine:
+            fine = giorno_dopo
+
+    condizioni, params = [], []
+    if inizio:
+        condizioni.append(f"{prefisso}data >= ?")
+        params.append(inizio)
+    if fine:
+        condizioni.append(f"{prefisso}data < ?")
+        params.append(fine)
+    if categoria and categoria != "Tutte":
+        condizioni.append(f"{prefisso}categoria = ?")
+        params.append(categoria)
+    return condizioni, params
+
+
+def clausola_where(condizioni: List[str]) -> str:
+    """Unisce le condizioni in una clausola WHERE (vuota se non ce ne sono)"""
+    return f" WHERE {' AND '.join(condizioni)}" if condizioni else ""
+
+
+# Colonne lette per costruire RigaTransazione (nell'ordine dei suoi campi)
+COLONNE_TRANSAZIONI = "id, tipo, importo, categoria, descrizione, data, data_inserimento"
+
+# Differenza tra julianday() di SQLite e date.toordinal()
+SCARTO_GIULIANO = 1721424.5
+
+# Data della transazione come ordinale di date.toordinal, calcolata da SQLite
+SQL_GIORNO_ORDINALE = f"CAST(julianday(data) - {SCARTO_GIULIANO} AS INTEGER)"
+
+# Tabella transazioni (importi in centesimi)
+SQL_TABELLA_TRANSAZIONI = """
+    CREATE TABLE IF NOT EXISTS {nome} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tipo TEXT NOT NULL CHECK(tipo IN ('entrata', 'uscita')),
+        importo INTEGER NOT NULL CHECK(importo > 0),
+        categoria TEXT NOT NULL,
+        descrizione TEXT,
+        data TEXT NOT NULL,
+        data_inserimento TEXT NOT NULL
+    )
+"""
+
+# Riepilogo mensile mantenuto dai trigger su transazioni (totali in centesimi)
+SQL_TABELLA_RIEPILOGO = """
+    CREATE TABLE IF NOT EXISTS riepilogo_mensile (
+        mese TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        totale INTEGER NOT NULL,
+        conteggio INTEGER NOT NULL,
+        PRIMARY KEY (mese, tipo, categoria)
+    ) WITHOUT ROWID
+"""
+
+
+# Indice full-text su descrizione e categoria (contenuto letto da transazioni).
+# remove_diacritics fa trovare "caffè" cercando "caffe"; gli indici dei
+# prefissi velocizzano la ricerca mentre si scrive
+SQL_TABELLA_RICERCA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transazioni_fts USING fts5(
+        descrizione, categoria,
+        content='transazioni', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+"""
+
+# Corrispondenze più recenti ordinate per pertinenza: il punteggio BM25 costa
+# circa 1 µs per riga e una parola presente in metà del registro
+# (es. "pagamento") ne richiederebbe centinaia di migliaia a ogni tasto
+FINESTRA_PERTINENZA = 10_000
+
+
+def riga_transazione(cursore: sqlite3.Cursor, riga: tuple) -> RigaTransazione:
+    """
+    row_factory che crea RigaTransazione direttamente dalla riga letta
+
+    Equivale a RigaTransazione._make(riga) senza passare da una lista di
+    tuple intermedie: la riga di sqlite3 viene liberata subito, e il
+    garbage collector segue un solo oggetto per transazione invece di due.
+    Le query devono leggere esattamente COLONNE_TRANSAZIONI.
+    """
+    return tuple.__new__(RigaTransazione, riga)
+
+
+def testo_in_query_fts(testo: str) -> str:
+    """
+    Converte il testo cercato dall'utente in una query FTS5
+
+    Ogni parola diventa un prefisso tra virgolette, quindi caratteri
+    speciali e operatori (AND, OR, NOT, *) non vengono interpretati.
+
+    Args:
+        testo: Testo libero (es. "spesa coop")
+
+    Returns:
+        Query FTS5 (es. '"spesa"* "coop"*'), stringa vuota se non ci sono parole
+    """
+    return " ".join(f'"{parola}"*' for parola in re.findall(r"\w+", testo))
+
+
+# Ricalcola riepilogo_mensile dalle transazioni (tabella da svuotare prima)
+QUERY_RICOSTRUZIONE_RIEPILOGO = """
+    INSERT INTO riepilogo_mensile (mese, tipo, categoria, totale, conteggio)
+    SELECT substr(data, 1, 7), tipo, categoria, SUM(importo), COUNT(*)
+    FROM transazioni
+    GROUP BY 1, 2, 3
+"""
+
+
+class CacheAggregati:
+    """
+    Cache LRU dei risultati delle query aggregate
+
+    Ogni voce ricorda l'intervallo di mesi da cui dipende, così una modifica
+    invalida solo le voci che comprendono il mese toccato.
+    """
+
+    def __init__(self, capacita: int = 256):
+        """
+        Inizializza la cache
+
+        Args:
+            capacita: Numero massimo di voci (le meno usate vengono scartate)
+        """
+        self.capacita = capacita
+        self._voci: OrderedDict = OrderedDict()
+        self.riusi = 0
+        self.mancati = 0
+        self.invalidate = 0
+
+    def ottieni(self, chiave: tuple) -> Tuple[bool, Any]:
+        """
+        Cerca un risultato in cache
+
+        Args:
+            chiave: (metodo, filtri...)
+
+        Returns:
+            Tupla (trovato, valore)
+        """
+        voce = self._voci.get(chiave)
+        if voce is None:
+            self.mancati += 1
+            return False, None
+        self._voci.move_to_end(chiave)
+        self.riusi += 1
+        return True, voce[0]
+
+    def memorizza(self, chiave: tuple, valore: Any,
+                  da_mese: Optional[str], a_mese: Optional[str]) -> None:
+        """
+        Salva un risultato in cache
+
+        Args:
+            chiave: (metodo, filtri...)
+            valore: Risultato da salvare (non deve essere modificato in seguito)
+            da_mese: Primo mese da cui dipende il risultato (None: nessun limite)
+            a_mese: Ultimo mese da cui dipende il risultato (None: nessun limite)
+        """
+        self._voci[chiave] = (valore, da_mese, a_mese)
+        self._voci.move_to_end(chiave)
+        if len(self._voci) > self.capacita:
+            self._voci.popitem(last=False)
+
+    def invalida_mesi(self, mesi: Iterable[str]) -> None:
+        """Elimina le voci che dipendono da almeno uno dei mesi indicati"""
+        mesi = set(mesi)
+        da_eliminare = [
+            chiave for chiave, (_, da_mese, a_mese) in self._voci.items()
+            if any((da_mese is None or da_mese <= mese) and (a_mese is None or mese <= a_mese)
+                   for mese in mesi)
+        ]
+        for chiave in da_eliminare:
+            del self._voci[chiave]
+        self.invalidate += len(da_eliminare)
+
+    def svuota(self) -> None:
+        """Elimina tutte le voci"""
+        self.invalidate += len(self._voci)
+        self._voci.clear()
+
+    def statistiche(self) -> Dict[str, int]:
+        """Restituisce riusi, mancati, voci invalidate e voci presenti"""
+        return {'riusi': self.riusi, 'mancati': self.mancati,
+                'invalidate': self.invalidate, 'voci': len(self._voci)}
 
 
 class Database:
     """Classe per la gestione del database SQLite delle transazioni"""
 
-    def __init__(self, db_name: str = "budgettracker.db"):
+    def __init__(self, db_name: str = "budgettracker.db",
+                 profilo: Optional[Union[str, Dict]] = None,
+                 dimensione_cache: int = 256, sola_lettura: bool = False):
         """
         Inizializza la connessione al database
 
         Args:
             db_name: Nome del file database
+            profilo: Nome di un profilo in PROFILI_PRESTAZIONI o dizionario
+                {pragma: valore}; se None viene letto da FILE_CONFIGURAZIONE
+                (default: PROFILO_DEFAULT)
+            dimensione_cache: Risultati aggregati tenuti in CacheAggregati
+            sola_lettura: Apre un database esistente senza modificarlo (es.
+                rapporti): niente creazione delle tabelle, migrazioni o cambio
+                di journal_mode; lo schema deve essere già aggiornato
         """
         self.db_name = db_name
+        self.sola_lettura = sola_lettura
+        if profilo is None:
+            profilo = leggi_profilo_configurato() or PROFILO_DEFAULT
+        self.profilo = profilo
         self.conn = None
         self.cursor = None
+        # True se l'indice full-text FTS5 è disponibile (vedi _crea_trigger_ricerca)
+        self.ricerca_fts = False
+        # Saldo, spese per categoria e andamento già calcolati
+        self.cache = CacheAggregati(dimensione_cache)
+        self._versione_dati = None
+        # Trace SQL permanente della connessione (vedi imposta_traccia_sql)
+        self._traccia_sql: Optional[Callable[[str], None]] = None
+        self._osservatori: List[Callable[[str, Optional[RigaTransazione]], None]] = []
         self._connect()
-        self._create_tables()
+        if sola_lettura:
+            self._verifica_schema()
+        else:
+            self._create_tables()
+
+    def aggiungi_osservatore(self, callback: Callable[[str, Optional[RigaTransazione]], None]) -> None:
+        """
+        Registra una funzione chiamata dopo ogni modifica delle transazioni
+
+        Il callback riceve (evento, transazione) dove evento è:
+            'inserita'   - transazione è la RigaTransazione aggiunta
+            'eliminata'  - transazione è la RigaTransazione rimossa
+            'ricaricata' - modifica massiva, transazione è None
+
+        Args:
+            callback: Funzione da chiamare
+        """
+        self._osservatori.append(callback)
+
+    def rimuovi_osservatore(self, callback: Callable[[str, Optional[RigaTransazione]], None]) -> None:
+        """Rimuove un osservatore registrato con aggiungi_osservatore"""
+        if callback in self._osservatori:
+            self._osservatori.remove(callback)
+
+    def imposta_traccia_sql(self, callback: Optional[Callable[[str], None]]) -> None:
+        """
+        Imposta la funzione che riceve ogni statement SQL della connessione
+
+        A differenza di conn.set_trace_callback il trace viene ripristinato
+        dopo verifica_piani_query, che usa il trace temporaneamente.
+
+        Args:
+            callback: Funzione chiamata con il testo dello statement (None per toglierla)
+        """
+        self._traccia_sql = callback
+        self.conn.set_trace_callback(callback)
+
+    def _notifica(self, evento: str, transazione: Optional[RigaTransazione] = None) -> None:
+        """Avvisa gli osservatori di una modifica"""
+        for callback in list(self._osservatori):
+            callback(evento, transazione)
 
     def _connect(self) -> None:
         """Crea la connessione al database"""
         try:
-            self.conn = sqlite3.connect(self.db_name)
+            if self.sola_lettura:
+                self.conn = sqlite3.connect(uri_sola_lettura(self.db_name), uri=True,
+                                            cached_statements=DIMENSIONE_CACHE_STATEMENT)
+            else:
+                self.conn = sqlite3.connect(self.db_name,
+                                            cached_statements=DIMENSIONE_CACHE_STATEMENT)
             self.cursor = self.conn.cursor()
+            self._applica_profilo()
         except sqlite3.Error as e:
             raise Exception(f"Errore nella connessione al database: {e}")
 
+    def _applica_profilo(self) -> None:
+        """Applica i PRAGMA del profilo di prestazioni alla connessione"""
+        if isinstance(self.profilo, dict):
+            pragma = self.profilo
+        elif self.profilo in PROFILI_PRESTAZIONI:
+            pragma = PROFILI_PRESTAZIONI[self.profilo]
+        else:
+            raise Exception(f"Profilo di prestazioni sconosciuto: {self.profilo}")
+
+        for nome, valore in pragma.items():
+            if nome not in PRAGMA_CONSENTITI:
+                raise Exception(f"PRAGMA non consentito nel profilo: {nome}")
+            if not str(valore).lstrip('-').isalnum():
+                raise Exception(f"Valore non valido per il PRAGMA {nome}: {valore}")
+            if self.sola_lettura and nome in PRAGMA_SCRITTURA:
+                continue
+            self.cursor.execute(f"PRAGMA {nome} = {valore}")
+            self.cursor.fetchall()
+
     def _create_tables(self) -> None:
         """Crea le tabelle del database se non esistono"""
         try:
             # Tabella transazioni
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS transazioni (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tipo TEXT NOT NULL CHECK(tipo IN ('entrata', 'uscita')),
-                    importo REAL NOT NULL CHECK(importo > 0),
-                    categoria TEXT NOT NULL,
-                    descrizione TEXT,
-                    data TEXT NOT NULL,
-                    data_inserimento TEXT NOT NULL
-                )
-            """)
+            self.cursor.execute(SQL_TABELLA_TRANSAZIONI.format(nome="transazioni"))
 
             # Tabella categorie predefinite
             self.cursor.execute("""
@@ -88,14 +508,308 @@ class Database:
         except sqlite3.Error as e:
             raise Exception(f"Errore nella creazione delle tabelle: {e}")
 
-    def aggiungi_transazione(self, tipo: str, importo: float, categoria: str,
+        self._migra_schema()
+
+    def _verifica_schema(self) -> None:
+        """Controlla che un database aperto in sola lettura non vada migrato"""
+        try:
+            self.cursor.execute("PRAGMA user_version")
+            versione = self.cursor.fetchone()[0]
+            self.cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transazioni_fts'")
+            self.ricerca_fts = self.cursor.fetchone() is not None
+        except sqlite3.Error as e:
+            raise Exception(f"Errore nella lettura dello schema: {e}")
+        if versione != VERSIONE_SCHEMA:
+            raise Exception(f"Schema del database alla versione {versione} invece di "
+                            f"{VERSIONE_SCHEMA}: aprirlo una volta con l'applicazione")
+
+    def _migra_schema(self) -> None:
+        """Aggiorna lo schema del database alla versione corrente"""
+        try:
+            self.cursor.execute("PRAGMA user_version")
+            versione = self.cursor.fetchone()[0]
+
+            if versione < 1:
+                # Indici per i filtri per mese, tipo e categoria
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_transazioni_data "
+                    "ON transazioni (data, data_inserimento)")
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_transazioni_tipo_data "
+                    "ON transazioni (tipo, data)")
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_transazioni_categoria_data "
+                    "ON transazioni (categoria, data)")
+
+            if versione < 2:
+                # Riepilogo mensile mantenuto dai trigger su transazioni
+                self.cursor.execute(SQL_TABELLA_RIEPILOGO)
+                self.cursor.execute("DELETE FROM riepilogo_mensile")
+                self.cursor.execute(QUERY_RICOSTRUZIONE_RIEPILOGO)
+
+            if versione < 3:
+                # L'indice per categoria copre anche l'ordinamento della lista
+                self.cursor.execute("DROP INDEX IF EXISTS idx_transazioni_categoria_data")
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_transazioni_categoria_data "
+                    "ON transazioni (categoria, data, data_inserimento)")
+
+            if versione < 4:
+                self._migra_importi_centesimi()
+
+            if versione < 5:
+                self._crea_indice_ricerca()
+
+            if versione < VERSIONE_SCHEMA:
+                self.cursor.execute(f"PRAGMA user_version = {VERSIONE_SCHEMA}")
+            self._crea_trigger_riepilogo()
+            self._crea_trigger_ricerca()
+            self.conn.commit()
+        except sqlite3.Error as e:
+            raise Exception(f"Errore nell'aggiornamento dello schema: {e}")
+
+    def _migra_importi_centesimi(self) -> None:
+        """Converte gli importi REAL in euro in INTEGER in centesimi (senza commit)"""
+        self.cursor.execute("PRAGMA table_info(transazioni)")
+        tipi = {row[1]: row[2].upper() for row in self.cursor.fetchall()}
+        if tipi.get('importo') != 'INTEGER':
+            # SQLite non può cambiare il tipo di una colonna: la tabella
+            # viene ricreata (indici e trigger sono eliminati con la vecchia)
+            self.cursor.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'transazioni'")
+            sequenza = self.cursor.fetchone()
+            self.cursor.execute(SQL_TABELLA_TRANSAZIONI.format(nome="transazioni_centesimi"))
+            self.cursor.execute("""
+                INSERT INTO transazioni_centesimi
+                SELECT id, tipo, CAST(ROUND(importo * 100) AS INTEGER), categoria,
+                       descrizione, data, data_inserimento
+                FROM transazioni
+            """)
+            self.cursor.execute("DROP TABLE transazioni")
+            self.cursor.execute("ALTER TABLE transazioni_centesimi RENAME TO transazioni")
+            if sequenza:
+                # Gli id delle transazioni eliminate non vengono riutilizzati
+                self.cursor.execute(
+                    "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'transazioni'",
+                    (sequenza[0],))
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_transazioni_data "
+                "ON transazioni (data, data_inserimento)")
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_transazioni_tipo_data "
+                "ON transazioni (tipo, data)")
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_transazioni_categoria_data "
+                "ON transazioni (categoria, data, data_inserimento)")
+
+        self.cursor.execute("DROP TABLE IF EXISTS riepilogo_mensile")
+        self.cursor.execute(SQL_TABELLA_RIEPILOGO)
+        self.cursor.execute(QUERY_RICOSTRUZIONE_RIEPILOGO)
+
+    def _crea_trigger_riepilogo(self) -> None:
+        """Crea i trigger che aggiornano riepilogo_mensile a ogni modifica"""
+        aggiungi = """
+            INSERT INTO riepilogo_mensile (mese, tipo, categoria, totale, conteggio)
+            VALUES (substr(NEW.data, 1, 7), NEW.tipo, NEW.categoria, NEW.importo, 1)
+            ON CONFLICT (mese, tipo, categoria) DO UPDATE SET
+                totale = totale + excluded.totale,
+                conteggio = conteggio + 1;
+        """
+        togli = """
+            UPDATE riepilogo_mensile
+            SET totale = totale - OLD.importo, conteggio = conteggio - 1
+            WHERE mese = substr(OLD.data, 1, 7) AND tipo = OLD.tipo
+              AND categoria = OLD.categoria;
+            DELETE FROM riepilogo_mensile
+            WHERE mese = substr(OLD.data, 1, 7) AND tipo = OLD.tipo
+              AND categoria = OLD.categoria AND conteggio <= 0;
+        """
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_riepilogo_insert
+            AFTER INSERT ON transazioni
+            BEGIN {aggiungi} END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_riepilogo_delete
+            AFTER DELETE ON transazioni
+            BEGIN {togli} END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_riepilogo_update
+            AFTER UPDATE OF tipo, importo, categoria, data ON transazioni
+            BEGIN {togli} {aggiungi} END
+        """)
+
+    def _crea_indice_ricerca(self) -> None:
+        """Crea e popola l'indice full-text (senza commit)"""
+        try:
+            self.cursor.execute(SQL_TABELLA_RICERCA)
+        except sqlite3.OperationalError as e:
+            # SQLite compilato senza FTS5: cerca_transazioni userà LIKE
+            print(f"Ricerca full-text non disponibile: {e}")
+            return
+        self.cursor.execute("INSERT INTO transazioni_fts (transazioni_fts) VALUES ('rebuild')")
+
+    def _crea_trigger_ricerca(self) -> None:
+        """Crea i trigger che mantengono allineato l'indice full-text"""
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transazioni_fts'")
+        self.ricerca_fts = self.cursor.fetchone() is not None
+        if not self.ricerca_fts:
+            return
+
+        aggiungi = """
+            INSERT INTO transazioni_fts (rowid, descrizione, categoria)
+            VALUES (NEW.id, NEW.descrizione, NEW.categoria);
+        """
+        togli = """
+            INSERT INTO transazioni_fts (transazioni_fts, rowid, descrizione, categoria)
+            VALUES ('delete', OLD.id, OLD.descrizione, OLD.categoria);
+        """
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_ricerca_insert
+            AFTER INSERT ON transazioni
+            BEGIN {aggiungi} END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_ricerca_delete
+            AFTER DELETE ON transazioni
+            BEGIN {togli} END
+        """)
+        self.cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_ricerca_update
+            AFTER UPDATE OF descrizione, categoria ON transazioni
+            BEGIN {togli} {aggiungi} END
+        """)
+
+    def ricostruisci_riepilogo(self) -> bool:
+        """
+        Ricalcola da zero la tabella riepilogo_mensile dalle transazioni
+
+        Returns:
+            True se la ricostruzione è avvenuta con successo
+        """
+        try:
+            self.cursor.execute("DELETE FROM riepilogo_mensile")
+            self.cursor.execute(QUERY_RICOSTRUZIONE_RIEPILOGO)
+            self.conn.commit()
+            self.cache.svuota()
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Errore nella ricostruzione del riepilogo: {e}")
+            return False
+
+    def _ricalcola_riepilogo_mesi(self, mesi: Iterable[str]) -> None:
+        """Ricalcola il riepilogo dei mesi indicati (senza commit)"""
+        for mese in mesi:
+            self.cursor.execute("DELETE FROM riepilogo_mensile WHERE mese = ?", (mese,))
+            self.cursor.execute("""
+                INSERT INTO riepilogo_mensile (mese, tipo, categoria, totale, conteggio)
+                SELECT ?, tipo, categoria, SUM(importo), COUNT(*)
+                FROM transazioni
+                WHERE data >= ? AND data < ?
+                GROUP BY tipo, categoria
+            """, (mese,) + intervallo_mese(mese))
+
+    def verifica_riepilogo(self) -> List[Tuple[str, str, str]]:
+        """
+        Confronta riepilogo_mensile con i totali calcolati sulle transazioni
+
+        Returns:
+            Lista delle chiavi (mese, tipo, categoria) non coerenti
+            (lista vuota se il riepilogo è corretto)
+        """
+        try:
+            self.cursor.execute("""
+                SELECT substr(data, 1, 7), tipo, categoria, SUM(importo), COUNT(*)
+                FROM transazioni GROUP BY 1, 2, 3
+            """)
+            attesi = {(r[0], r[1], r[2]): (r[3], r[4]) for r in self.cursor.fetchall()}
+            self.cursor.execute(
+                "SELECT mese, tipo, categoria, totale, conteggio FROM riepilogo_mensile")
+            salvati = {(r[0], r[1], r[2]): (r[3], r[4]) for r in self.cursor.fetchall()}
+
+            return [chiave for chiave in sorted(set(attesi) | set(salvati))
+                    if attesi.get(chiave) != salvati.get(chiave)]
+        except sqlite3.Error as e:
+            print(f"Errore nella verifica del riepilogo: {e}")
+            return []
+
+    def verifica_piani_query(self) -> List[Tuple[str, str]]:
+        """
+        Controlla con EXPLAIN QUERY PLAN che le query frequenti usino un indice
+
+        Esegue i metodi usati dall'interfaccia con filtri di esempio, raccoglie
+        gli statement SELECT eseguiti e ne analizza il piano.
+
+        Returns:
+            Lista di (query, dettaglio del piano) per ogni tabella letta per
+            intero invece di cercare nell'indice (lista vuota se tutti i
+            piani sono corretti; l'indice full-text è escluso)
+        """
+        mese = datetime.now().strftime("%Y-%m")
+        inizio = intervallo_mese(mese)[0]
+        categoria = (self.ottieni_categorie('uscita') or ['Altro'])[0]
+        dopo = RigaTransazione(0, 'uscita', 1, categoria, None, inizio, f"{inizio} 00:00:00")
+
+        def prima_riga(righe: Iterator) -> None:
+            # Chiude subito il generatore: un cursore aperto bloccherebbe le modifiche
+            next(righe, None)
+            righe.close()
+
+        esempi = [
+            lambda: self.ottieni_transazioni(mese),
+            lambda: self.ottieni_transazioni(mese, categoria),
+            lambda: self.ottieni_transazioni(None, categoria),
+            lambda: self.ottieni_pagina_transazioni(mese, limite=1),
+            lambda: self.ottieni_pagina_transazioni(mese, dopo=dopo, limite=1),
+            lambda: self.ottieni_pagina_transazioni(mese, categoria, dopo, limite=1),
+            lambda: prima_riga(self.itera_transazioni(da_data=inizio, crescente=True)),
+            lambda: self.cerca_transazioni("a", mese, limite=1),
+            lambda: self.ottieni_saldo(mese),
+            lambda: self.ottieni_spese_per_categoria(mese),
+            lambda: self.ottieni_andamento_mensile(sposta_mese(mese, -11), mese),
+            lambda: self.ottieni_spese_mensili(sposta_mese(mese, -11), mese)
+        ]
+
+        # Una cache vuota e senza capacità: ogni esempio deve arrivare a SQLite
+        eseguite = []
+        cache, self.cache = self.cache, CacheAggregati(0)
+        self.conn.set_trace_callback(eseguite.append)
+        try:
+            for esempio in esempi:
+                esempio()
+        finally:
+            self.conn.set_trace_callback(self._traccia_sql)
+            self.cache = cache
+
+        problemi = []
+        try:
+            for query in dict.fromkeys(eseguite):
+                # Il trace include anche gli statement interni di FTS5
+                if not re.match(r"\s*SELECT\b.*\bFROM (transazioni|riepilogo_mensile)",
+                                query, re.DOTALL):
+                    continue
+                self.cursor.execute(f"EXPLAIN QUERY PLAN {query}")
+                for riga in self.cursor.fetchall():
+                    dettaglio = riga[3]
+                    # Anche "SCAN ... USING INDEX" legge tutta la tabella (solo in ordine)
+                    if dettaglio.startswith("SCAN") and "VIRTUAL TABLE" not in dettaglio:
+                        problemi.append((" ".join(query.split()), dettaglio))
+        except sqlite3.Error as e:
+            print(f"Errore nella verifica dei piani delle query: {e}")
+        return problemi
+
+    def aggiungi_transazione(self, tipo: str, importo: int, categoria: str,
                            descrizione: str, data: str) -> bool:
         """
         Aggiunge una nuova transazione al database
 
         Args:
             tipo: 'entrata' o 'uscita'
-            importo: Importo della transazione
+            importo: Importo della transazione in centesimi
             categoria: Categoria della transazione
             descrizione: Descrizione opzionale
             data: Data della transazione (formato YYYY-MM-DD)
@@ -109,14 +823,199 @@ class Database:
                 INSERT INTO transazioni (tipo, importo, categoria, descrizione, data, data_inserimento)
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (tipo, importo, categoria, descrizione, data, data_inserimento))
+            self.cache.invalida_mesi([data[:7]])
             self.conn.commit()
-            return True
         except sqlite3.Error as e:
             print(f"Errore nell'inserimento della transazione: {e}")
             return False
 
+        self._notifica('inserita', RigaTransazione(
+            self.cursor.lastrowid, tipo, importo, categoria, descrizione, data,
+            data_inserimento))
+        return True
+
+    def aggiungi_transazioni_bulk(self, transazioni: Iterable[Dict],
+                                  dimensione_blocco: int = 10000) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Aggiunge molte transazioni in un'unica transazione SQLite
+
+        Le righe vengono lette e validate a blocchi di dimensione_blocco
+        (importi in euro e date per colonne, vedi _valida_blocco); le righe
+        valide di ogni blocco vengono inserite con executemany e il commit
+        avviene una sola volta.
+        Se il chiamante ha già una transazione aperta, l'inserimento ne fa
+        parte (il commit resta al chiamante) e un errore annulla solo le
+        righe inserite qui.
+
+        Args:
+            transazioni: Iterabile di dizionari con chiavi tipo, importo,
+                categoria, descrizione (opzionale) e data; importo è un int
+                in centesimi oppure il testo in euro letto da un file
+            dimensione_blocco: Righe validate e inserite insieme
+
+        Returns:
+            Tupla (numero_inseriti, scarti) dove scarti è una lista di
+            tuple (indice_riga, messaggio_errore)
+        """
+        data_inserimento = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        categorie = {
+            'entrata': set(self.ottieni_categorie('entrata')),
+            'uscita': set(self.ottieni_categorie('uscita'))
+        }
+        mesi = set()
+        inseriti = 0
+        scarti = []
+        sorgente = iter(transazioni)
+        letti = 0
+
+        # Un savepoint invece di BEGIN: se il chiamante ha già una transazione
+        # aperta, un errore annulla solo l'inserimento massivo e il commit
+        # resta al chiamante
+        transazione_esterna = self.conn.in_transaction
+        try:
+            # I trigger di inserimento vengono sospesi: il riepilogo dei mesi
+            # toccati e l'indice full-text si aggiornano una volta sola alla
+            # fine, nello stesso savepoint
+            self.cursor.execute("SAVEPOINT bulk")
+            self.cursor.execute("DROP TRIGGER IF EXISTS trg_riepilogo_insert")
+            self.cursor.execute("DROP TRIGGER IF EXISTS trg_ricerca_insert")
+            self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transazioni")
+            ultimo_id = self.cursor.fetchone()[0]
+
+            while True:
+                righe = list(itertools.islice(sorgente, dimensione_blocco))
+                if not righe:
+                    break
+
+                blocco = []
+                for indice, (riga, msg) in enumerate(self._valida_blocco(righe, categorie),
+                                                     letti):
+                    if riga is None:
+                        scarti.append((indice, msg))
+                        continue
+                    mesi.add(riga[4][:7])
+                    blocco.append(riga + (data_inserimento,))
+                letti += len(righe)
+
+                if blocco:
+                    self._inserisci_blocco(blocco)
+                    inseriti += len(blocco)
+
+            self._ricalcola_riepilogo_mesi(mesi)
+            self._crea_trigger_riepilogo()
+            if self.ricerca_fts:
+                # Un solo statement: FTS5 scrive l'indice a segmenti grandi
+                # invece di uno per riga come farebbe il trigger
+                self.cursor.execute("""
+                    INSERT INTO transazioni_fts (rowid, descrizione, categoria)
+                    SELECT id, descrizione, categoria FROM transazioni WHERE id > ?
+                """, (ultimo_id,))
+            self._crea_trigger_ricerca()
+            self.cache.invalida_mesi(mesi)
+            self.cursor.execute("RELEASE bulk")
+        except sqlite3.Error as e:
+            self._annulla_savepoint_bulk()
+            print(f"Errore nell'inserimento delle transazioni: {e}")
+            return 0, scarti
+        except Exception:
+            # Errore del lettore (es. file non valido): annulla tutto
+            self._annulla_savepoint_bulk()
+            raise
+        if not transazione_esterna:
+            self.conn.commit()
+
+        if inseriti:
+            self._notifica('ricaricata')
+        return inseriti, scarti
+
+    def _annulla_savepoint_bulk(self) -> None:
+        """Annulla il savepoint di aggiungi_transazioni_bulk lasciando intatto il resto"""
+        try:
+            self.cursor.execute("ROLLBACK TO bulk")
+            self.cursor.execute("RELEASE bulk")
+        except sqlite3.Error:
+            # Savepoint mai aperto o già chiuso da SQLite
+            pass
+
+    @staticmethod
+    def _valida_blocco(righe: List[Dict],
+                       categorie: Dict[str, set]) -> List[Tuple[Optional[tuple], str]]:
+        """
+        Valida un blocco di righe per l'inserimento massivo
+
+        Gli importi in euro e le date vengono validati per colonne con
+        Validatore.valida_colonna_importi e valida_colonna_date (stessi esiti e
+        messaggi dei metodi riga per riga); i controlli restano nell'ordine
+        tipo, importo, categoria, data, descrizione.
+
+        Args:
+            righe: Dizionari delle transazioni
+            categorie: Categorie valide per tipo
+
+        Returns:
+            Lista di tuple (riga, messaggio_errore); riga è None se non valida
+        """
+        # Gli importi già in centesimi non passano dalla colonna dei testi
+        posizioni, testi = {}, []
+        for i, trans in enumerate(righe):
+            importo = trans.get('importo')
+            if not isinstance(importo, int) or isinstance(importo, bool):
+                posizioni[i] = len(testi)
+                testi.append(importo if isinstance(importo, str) else str(importo or ""))
+        colonna_importi = Validatore.valida_colonna_importi(testi)
+        colonna_date = Validatore.valida_colonna_date([trans.get('data') for trans in righe])
+        importi, errori_importi = (colonna_importi.valori.tolist(),
+                                   colonna_importi.errori.tolist())
+        date_valide, errori_date = colonna_date.valori.tolist(), colonna_date.errori.tolist()
+
+        esiti = []
+        for i, trans in enumerate(righe):
+            tipo = trans.get('tipo')
+            valido, msg = Validatore.valida_tipo(tipo)
+            if not valido:
+                esiti.append((None, msg))
+                continue
+
+            posizione = posizioni.get(i)
+            if posizione is None:
+                importo = trans['importo']
+                valido, msg = Validatore.valida_centesimi(importo)
+                if not valido:
+                    esiti.append((None, msg))
+                    continue
+            elif errori_importi[posizione]:
+                esiti.append((None, colonna_importi.messaggi[errori_importi[posizione]]))
+                continue
+            else:
+                importo = importi[posizione]
+
+            categoria = trans.get('categoria')
+            valido, msg = Validatore.valida_categoria(categoria, categorie[tipo])
+            if not valido:
+                esiti.append((None, msg))
+                continue
+
+            if errori_date[i]:
+                esiti.append((None, colonna_date.messaggi[errori_date[i]]))
+                continue
+
+            valido, descrizione, msg = Validatore.valida_descrizione(trans.get('descrizione'))
+            if not valido:
+                esiti.append((None, msg))
+                continue
+
+            esiti.append(((tipo, importo, categoria, descrizione, date_valide[i]), ""))
+        return esiti
+
+    def _inserisci_blocco(self, blocco: List[tuple]) -> None:
+        """Inserisce un blocco di righe già validate (senza commit)"""
+        self.cursor.executemany("""
+            INSERT INTO transazioni (tipo, importo, categoria, descrizione, data, data_inserimento)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, blocco)
+
     def ottieni_transazioni(self, mese: Optional[str] = None,
-                           categoria: Optional[str] = None) -> List[Dict]:
+                           categoria: Optional[str] = None) -> List[RigaTransazione]:
         """
         Recupera le transazioni dal database con filtri opzionali
 
@@ -125,42 +1024,205 @@ class Database:
             categoria: Filtro per categoria
 
         Returns:
-            Lista di dizionari con le transazioni
+            Lista di RigaTransazione
         """
         try:
-            query = "SELECT * FROM transazioni WHERE 1=1"
-            params = []
+            condizioni, params = condizioni_transazioni(mese, categoria)
+            query = (f"SELECT {COLONNE_TRANSAZIONI} FROM transazioni"
+                     f"{clausola_where(condizioni)}"
+                     f" ORDER BY data DESC, data_inserimento DESC")
 
-            if mese:
-                query += " AND strftime('%Y-%m', data) = ?"
-                params.append(mese)
+            return self._leggi_transazioni(query, params)
+        except sqlite3.Error as e:
+            print(f"Errore nel recupero delle transazioni: {e}")
+            return []
 
-            if categoria and categoria != "Tutte":
-                query += " AND categoria = ?"
-                params.append(categoria)
+    def itera_transazioni(self, mese: Optional[str] = None,
+                          categoria: Optional[str] = None,
+                          da_data: Optional[str] = None,
+                          a_data: Optional[str] = None,
+                          dimensione_blocco: int = 1000,
+                          crescente: bool = False) -> Iterator[RigaTransazione]:
+        """
+        Restituisce le transazioni una alla volta senza caricarle tutte in memoria
 
-            query += " ORDER BY data DESC, data_inserimento DESC"
+        Usa un cursore proprio (le altre query restano utilizzabili durante
+        l'iterazione) e legge dal database blocchi di dimensione_blocco righe.
 
-            self.cursor.execute(query, params)
-            rows = self.cursor.fetchall()
-
-            transazioni = []
-            for row in rows:
-                transazioni.append({
-                    'id': row[0],
-                    'tipo': row[1],
-                    'importo': row[2],
-                    'categoria': row[3],
-                    'descrizione': row[4],
-                    'data': row[5],
-                    'data_inserimento': row[6]
-                })
-
-            return transazioni
+        Args:
+            mese: Filtro per mese (formato YYYY-MM)
+            categoria: Filtro per categoria
+            da_data: Data iniziale inclusa (formato YYYY-MM-DD)
+            a_data: Data finale inclusa (formato YYYY-MM-DD)
+            dimensione_blocco: Righe lette per ogni fetchmany
+            crescente: True per l'ordine cronologico, False come ottieni_transazioni
+
+        Yields:
+            RigaTransazione
+
+        Raises:
+            sqlite3.Error: Se la query fallisce (come itera_blocchi_transazioni:
+                chi consuma il flusso non deve scambiarlo per completo)
+        """
+        for blocco in self.itera_blocchi_transazioni(
+                COLONNE_TRANSAZIONI, mese, categoria, da_data, a_data,
+                dimensione_blocco, crescente):
+            yield from map(RigaTransazione._make, blocco)
+
+    def itera_blocchi_transazioni(self, espressioni: str,
+                                  mese: Optional[str] = None,
+                                  categoria: Optional[str] = None,
+                                  da_data: Optional[str] = None,
+                                  a_data: Optional[str] = None,
+                                  dimensione_blocco: int = 1000,
+                                  crescente: bool = False) -> Iterator[List[tuple]]:
+        """
+        Restituisce a blocchi le righe grezze di una SELECT sulle transazioni
+
+        Permette di far calcolare a SQLite i valori da esportare o analizzare
+        (es. importi formattati, JSON) senza creare oggetti Python per riga.
+        Filtri e ordinamento sono quelli di itera_transazioni.
+
+        Args:
+            espressioni: Espressioni SQL della SELECT (scritte nel codice,
+                mai ricevute dall'utente)
+            mese, categoria, da_data, a_data: Filtri come in itera_transazioni
+            dimensione_blocco: Righe per blocco
+            crescente: True per l'ordine cronologico
+
+        Yields:
+            Liste di al massimo dimensione_blocco tuple
+
+        Raises:
+            sqlite3.Error: Se la query fallisce (un'esportazione non deve
+                risultare completa se interrotta)
+        """
+        condizioni, params = condizioni_transazioni(mese, categoria, da_data, a_data)
+        verso = "ASC" if crescente else "DESC"
+        query = (f"SELECT {espressioni} FROM transazioni{clausola_where(condizioni)}"
+                 f" ORDER BY data {verso}, data_inserimento {verso}, id {verso}")
+
+        cursore = self.conn.cursor()
+        try:
+            cursore.execute(query, params)
+            while True:
+                righe = cursore.fetchmany(dimensione_blocco)
+                if not righe:
+                    break
+                yield righe
+        finally:
+            cursore.close()
+
+    def ottieni_pagina_transazioni(self, mese: Optional[str] = None,
+                                   categoria: Optional[str] = None,
+                                   dopo: Optional[RigaTransazione] = None,
+                                   limite: int = 100) -> List[RigaTransazione]:
+        """
+        Recupera una pagina di transazioni con paginazione keyset
+
+        L'ordinamento è lo stesso di ottieni_transazioni (più l'id per
+        rendere la chiave univoca), quindi pagine consecutive equivalgono
+        alla lista completa senza mai leggere le righe già mostrate.
+
+        Args:
+            mese: Filtro per mese (formato YYYY-MM)
+            categoria: Filtro per categoria
+            dopo: Ultima transazione della pagina precedente (None per la prima)
+            limite: Numero massimo di transazioni restituite
+
+        Returns:
+            Lista di RigaTransazione
+        """
+        try:
+            # Un solo limite superiore su 'data': l'indice parte dalla pagina precedente
+            condizioni, params = condizioni_transazioni(
+                mese, categoria, a_data=dopo.data if dopo else None)
+            if dopo:
+                condizioni.append("(data, data_inserimento, id) < (?, ?, ?)")
+                params.extend([dopo.data, dopo.data_inserimento, dopo.id])
+
+            query = (f"SELECT {COLONNE_TRANSAZIONI} FROM transazioni"
+                     f"{clausola_where(condizioni)}"
+                     f" ORDER BY data DESC, data_inserimento DESC, id DESC LIMIT ?")
+            params.append(limite)
+
+            return self._leggi_transazioni(query, params)
         except sqlite3.Error as e:
             print(f"Errore nel recupero delle transazioni: {e}")
             return []
 
+    def cerca_transazioni(self, testo: str, mese: Optional[str] = None,
+                          categoria: Optional[str] = None, limite: int = 100,
+                          scostamento: int = 0) -> List[RigaTransazione]:
+        """
+        Cerca le transazioni per parole contenute in descrizione o categoria
+
+        Le parole sono cercate come prefissi ("sup" trova "Supermercato")
+        e tutte devono comparire. I risultati sono ordinati per pertinenza
+        (BM25) e, a parità, dal più recente; senza filtro per mese vengono
+        ordinate solo le FINESTRA_PERTINENZA corrispondenze inserite per ultime.
+
+        Args:
+            testo: Testo da cercare
+            mese: Filtro per mese (formato YYYY-MM)
+            categoria: Filtro per categoria
+            limite: Numero massimo di transazioni restituite
+            scostamento: Risultati da saltare (per le pagine successive)
+
+        Returns:
+            Lista di RigaTransazione (vuota se il testo non contiene parole)
+        """
+        query_fts = testo_in_query_fts(testo)
+        if not query_fts:
+            return []
+
+        try:
+            colonne = ", ".join(f"t.{nome}" for nome in COLONNE_TRANSAZIONI.split(", "))
+            condizioni, params = condizioni_transazioni(mese, categoria, prefisso="t.")
+            if self.ricerca_fts:
+                query = (f"SELECT {colonne} FROM transazioni_fts "
+                         f"JOIN transazioni t ON t.id = transazioni_fts.rowid")
+                condizioni.insert(0, "transazioni_fts MATCH ?")
+                params.insert(0, query_fts)
+                ordine = "transazioni_fts.rank, t.data DESC, t.id DESC"
+            else:
+                query = f"SELECT {colonne} FROM transazioni t"
+                for parola in re.findall(r"\w+", testo):
+                    condizioni.append("(t.descrizione LIKE ? OR t.categoria LIKE ?)")
+                    params.extend([f"%{parola}%"] * 2)
+                ordine = "t.data DESC, t.id DESC"
+            query += clausola_where(condizioni)
+
+            finestra = max(FINESTRA_PERTINENZA, scostamento + limite)
+            if self.ricerca_fts and not mese:
+                # Scorrere gli id delle corrispondenze è molto più veloce che
+                # calcolarne il punteggio: trova il più vecchio della finestra
+                self.cursor.execute(
+                    f"{query} ORDER BY transazioni_fts.rowid DESC LIMIT 1 OFFSET ?",
+                    params + [finestra - 1])
+                limite_finestra = self.cursor.fetchone()
+                if limite_finestra:
+                    query += " AND transazioni_fts.rowid >= ?"
+                    params.append(limite_finestra[0])
+
+            query += f" ORDER BY {ordine} LIMIT ? OFFSET ?"
+            params.extend([limite, scostamento])
+
+            return self._leggi_transazioni(query, params)
+        except sqlite3.Error as e:
+            print(f"Errore nella ricerca delle transazioni: {e}")
+            return []
+
+    def _leggi_transazioni(self, query: str, params: List) -> List[RigaTransazione]:
+        """Esegue una query su COLONNE_TRANSAZIONI e crea le RigaTransazione"""
+        cursore = self.conn.cursor()
+        cursore.row_factory = riga_transazione
+        try:
+            cursore.execute(query, params)
+            return cursore.fetchall()
+        finally:
+            cursore.close()
+
     def elimina_transazione(self, id_transazione: int) -> bool:
         """
         Elimina una transazione dal database
@@ -172,13 +1234,19 @@ class Database:
             True se l'eliminazione è avvenuta con successo
         """
         try:
+            eliminate = self._leggi_transazioni(
+                f"SELECT {COLONNE_TRANSAZIONI} FROM transazioni WHERE id = ?", [id_transazione])
             self.cursor.execute("DELETE FROM transazioni WHERE id = ?", (id_transazione,))
+            self.cache.invalida_mesi([riga.data[:7] for riga in eliminate])
             self.conn.commit()
-            return True
         except sqlite3.Error as e:
             print(f"Errore nell'eliminazione della transazione: {e}")
             return False
 
+        if eliminate:
+            self._notifica('eliminata', eliminate[0])
+        return True
+
     def ottieni_categorie(self, tipo: Optional[str] = None) -> List[str]:
         """
         Recupera le categorie dal database
@@ -200,7 +1268,30 @@ class Database:
             print(f"Errore nel recupero delle categorie: {e}")
             return []
 
-    def ottieni_saldo(self, mese: Optional[str] = None) -> Tuple[float, float, float]:
+    def _da_cache(self, chiave: tuple) -> Tuple[bool, Any]:
+        """
+        Cerca un risultato aggregato in cache
+
+        Le modifiche fatte da questa connessione invalidano solo i mesi
+        toccati; se PRAGMA data_version indica un commit di un'altra
+        connessione (es. il thread dell'interfaccia) la cache viene svuotata.
+        """
+        try:
+            self.cursor.execute("PRAGMA data_version")
+            versione = self.cursor.fetchone()[0]
+        except sqlite3.Error:
+            self.cache.svuota()
+            return False, None
+        if versione != self._versione_dati:
+            self.cache.svuota()
+            self._versione_dati = versione
+        return self.cache.ottieni(chiave)
+
+    def statistiche_cache(self) -> Dict[str, int]:
+        """Restituisce i contatori della cache dei risultati aggregati"""
+        return self.cache.statistiche()
+
+    def ottieni_saldo(self, mese: Optional[str] = None) -> Tuple[int, int, int]:
         """
         Calcola il saldo per un determinato mese
 
@@ -208,23 +1299,27 @@ class Database:
             mese: Mese da analizzare (formato YYYY-MM)
 
         Returns:
-            Tupla (entrate_totali, uscite_totali, saldo)
+            Tupla (entrate_totali, uscite_totali, saldo) in centesimi
         """
-        try:
-            query_base = "SELECT tipo, SUM(importo) FROM transazioni WHERE 1=1"
-            params = []
+        chiave = ('saldo', mese)
+        trovato, saldo = self._da_cache(chiave)
+        if trovato:
+            return saldo
 
+        try:
+            # Legge dal riepilogo mensile: O(categorie) invece di O(transazioni)
             if mese:
-                query_base += " AND strftime('%Y-%m', data) = ?"
-                params.append(mese)
-
-            query_base += " GROUP BY tipo"
-
-            self.cursor.execute(query_base, params)
+                self.cursor.execute("""
+                    SELECT tipo, SUM(totale) FROM riepilogo_mensile
+                    WHERE mese = ? GROUP BY tipo
+                """, (mese,))
+            else:
+                self.cursor.execute(
+                    "SELECT tipo, SUM(totale) FROM riepilogo_mensile GROUP BY tipo")
             risultati = self.cursor.fetchall()
 
-            entrate = 0.0
-            uscite = 0.0
+            entrate = 0
+            uscite = 0
 
             for row in risultati:
                 if row[0] == 'entrata':
@@ -232,13 +1327,14 @@ class Database:
                 elif row[0] == 'uscita':
                     uscite = row[1]
 
-            saldo = entrate - uscite
-            return (entrate, uscite, saldo)
+            saldo = (entrate, uscite, entrate - uscite)
+            self.cache.memorizza(chiave, saldo, mese, mese)
+            return saldo
         except sqlite3.Error as e:
             print(f"Errore nel calcolo del saldo: {e}")
-            return (0.0, 0.0, 0.0)
+            return (0, 0, 0)
 
-    def ottieni_spese_per_categoria(self, mese: Optional[str] = None) -> Dict[str, float]:
+    def ottieni_spese_per_categoria(self, mese: Optional[str] = None) -> Dict[str, int]:
         """
         Calcola le spese totali per categoria
 
@@ -246,45 +1342,248 @@ class Database:
             mese: Mese da analizzare (formato YYYY-MM)
 
         Returns:
-            Dizionario {categoria: importo_totale}
+            Dizionario {categoria: importo_totale} in centesimi
         """
+        chiave = ('spese', mese)
+        trovato, spese = self._da_cache(chiave)
+        if trovato:
+            return dict(spese)
+
         try:
-            query = "SELECT categoria, SUM(importo) FROM transazioni WHERE tipo = 'uscita'"
+            query = "SELECT categoria, SUM(totale) FROM riepilogo_mensile WHERE tipo = 'uscita'"
             params = []
 
             if mese:
-                query += " AND strftime('%Y-%m', data) = ?"
+                query += " AND mese = ?"
                 params.append(mese)
 
-            query += " GROUP BY categoria ORDER BY SUM(importo) DESC"
+            query += " GROUP BY categoria ORDER BY SUM(totale) DESC"
 
             self.cursor.execute(query, params)
             risultati = self.cursor.fetchall()
 
-            return {row[0]: row[1] for row in risultati}
+            spese = {row[0]: row[1] for row in risultati}
+            self.cache.memorizza(chiave, spese, mese, mese)
+            return dict(spese)
         except sqlite3.Error as e:
             print(f"Errore nel calcolo delle spese per categoria: {e}")
             return {}
 
+    def ottieni_spese_mensili(self, da_mese: str, a_mese: str) -> Dict[str, Dict[str, int]]:
+        """
+        Calcola le spese per categoria di ogni mese di un intervallo con una sola query
+
+        Args:
+            da_mese: Primo mese dell'intervallo (formato YYYY-MM)
+            a_mese: Ultimo mese dell'intervallo, incluso (formato YYYY-MM)
+
+        Returns:
+            Dizionario {mese: {categoria: importo_totale}} in centesimi con
+            tutti i mesi dell'intervallo e le categorie in ordine di spesa
+        """
+        chiave = ('spese_mensili', da_mese, a_mese)
+        trovato, spese = self._da_cache(chiave)
+        if trovato:
+            return {mese: dict(categorie) for mese, categorie in spese.items()}
+
+        spese = {}
+        mese = da_mese
+        while mese <= a_mese:
+            spese[mese] = {}
+            mese = sposta_mese(mese, 1)
+
+        try:
+            self.cursor.execute("""
+                SELECT mese, categoria, totale
+                FROM riepilogo_mensile
+                WHERE tipo = 'uscita' AND mese >= ? AND mese <= ?
+                ORDER BY mese, totale DESC
+            """, (da_mese, a_mese))
+            for row in self.cursor.fetchall():
+                spese[row[0]][row[1]] = row[2]
+            self.cache.memorizza(chiave, spese, da_mese, a_mese)
+            return {mese: dict(categorie) for mese, categorie in spese.items()}
+        except sqlite3.Error as e:
+            print(f"Errore nel calcolo delle spese mensili: {e}")
+            return spese
+
+    def ottieni_andamento_mensile(self, da_mese: str, a_mese: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Calcola entrate e uscite di ogni mese di un intervallo con una sola query
+
+        Args:
+            da_mese: Primo mese dell'intervallo (formato YYYY-MM)
+            a_mese: Ultimo mese dell'intervallo, incluso (formato YYYY-MM)
+
+        Returns:
+            Dizionario ordinato {mese: (entrate, uscite)} in centesimi con
+            tutti i mesi dell'intervallo (zero per i mesi senza transazioni)
+        """
+        chiave = ('andamento', da_mese, a_mese)
+        trovato, andamento = self._da_cache(chiave)
+        if trovato:
+            return dict(andamento)
+
+        andamento = {}
+        mese = da_mese
+        while mese <= a_mese:
+            andamento[mese] = (0, 0)
+            mese = sposta_mese(mese, 1)
+
+        try:
+            self.cursor.execute("""
+                SELECT mese,
+                       SUM(CASE WHEN tipo = 'entrata' THEN totale ELSE 0 END),
+                       SUM(CASE WHEN tipo = 'uscita' THEN totale ELSE 0 END)
+                FROM riepilogo_mensile
+                WHERE mese >= ? AND mese <= ?
+                GROUP BY mese
+            """, (da_mese, a_mese))
+            for row in self.cursor.fetchall():
+                andamento[row[0]] = (row[1], row[2])
+            self.cache.memorizza(chiave, andamento, da_mese, a_mese)
+            return dict(andamento)
+        except sqlite3.Error as e:
+            print(f"Errore nel calcolo dell'andamento mensile: {e}")
+            return andamento
+
     def chiudi(self) -> None:
         """Chiude la connessione al database"""
         if self.conn:
             self.conn.close()
 
-    def backup(self, percorso_backup: str) -> bool:
+    def backup(self, percorso_backup: str, pagine_per_passo: int = 1024,
+               callback_progresso: Optional[Callable[[int, int], None]] = None,
+               comprimi: bool = False) -> bool:
         """
-        Crea un backup del database
+        Crea un backup del database con l'API di backup di SQLite
+
+        La copia avviene a passi di poche pagine mentre il database resta
+        utilizzabile, e produce sempre un'immagine coerente (anche in WAL).
 
         Args:
             percorso_backup: Percorso del file di backup
+            pagine_per_passo: Pagine copiate a ogni passo
+            callback_progresso: Funzione chiamata con (pagine_copiate, pagine_totali)
+            comprimi: Se True il backup viene salvato compresso con gzip
+
+        Returns:
+            True se il backup è stato creato con successo
+        """
+        if comprimi:
+            return self._backup_compresso(percorso_backup, pagine_per_passo, callback_progresso)
+
+        def progresso(stato, rimanenti, totali):
+            if callback_progresso:
+                callback_progresso(totali - rimanenti, totali)
+
+        try:
+            destinazione = sqlite3.connect(percorso_backup)
+            try:
+                self.conn.backup(destinazione, pages=pagine_per_passo, progress=progresso)
+            finally:
+                destinazione.close()
+            return True
+        except (sqlite3.Error, OSError) as e:
+            print(f"Errore nel backup del database: {e}")
+            return False
+
+    def _backup_compresso(self, percorso_backup: str, pagine_per_passo: int,
+                          callback_progresso: Optional[Callable[[int, int], None]]) -> bool:
+        """
+        Scrive il backup compresso con gzip senza copie intermedie
+
+        Le pagine vengono lette dal file del database a blocchi di
+        pagine_per_passo, dentro una sola transazione di lettura che rende
+        l'immagine coerente, e compresse man mano: in memoria resta un solo
+        blocco. Con il rollback journal la transazione blocca le scritture
+        fino alla fine del backup; in WAL le scritture continuano.
+        Se l'immagine non si può leggere dal file (database in memoria o
+        WAL mai svuotato) la copia passa da un file temporaneo.
 
         Returns:
             True se il backup è stato creato con successo
         """
+        import gzip
+        import tempfile
+
+        copia = None
+        lettura_aperta = False
         try:
-            import shutil
-            shutil.copy2(self.db_name, percorso_backup)
+            percorso = self._inizia_lettura_da_file()
+            lettura_aperta = percorso is not None
+            if percorso is None:
+                descrittore, copia = tempfile.mkstemp(suffix=".db")
+                os.close(descrittore)
+                destinazione = sqlite3.connect(copia)
+                try:
+                    self.conn.backup(destinazione, pages=pagine_per_passo)
+                finally:
+                    destinazione.close()
+                percorso = copia
+
+            dimensione_pagina = self.conn.execute("PRAGMA page_size").fetchone()[0]
+            # Nella transazione di lettura page_count è quello dell'immagine letta
+            totali = (self.conn.execute("PRAGMA page_count").fetchone()[0] if lettura_aperta
+                      else os.path.getsize(percorso) // dimensione_pagina)
+
+            with open(percorso, 'rb') as sorgente:
+                with gzip.open(percorso_backup, 'wb', compresslevel=6) as compresso:
+                    copiate = 0
+                    while copiate < totali:
+                        pagine = min(pagine_per_passo, totali - copiate)
+                        blocco = sorgente.read(dimensione_pagina * pagine)
+                        if len(blocco) != dimensione_pagina * pagine:
+                            raise OSError("File del database più corto del previsto")
+                        compresso.write(blocco)
+                        copiate += pagine
+                        if callback_progresso:
+                            callback_progresso(copiate, totali)
             return True
-        except Exception as e:
+        except (sqlite3.Error, OSError) as e:
             print(f"Errore nel backup del database: {e}")
+            if os.path.exists(percorso_backup):
+                os.remove(percorso_backup)
             return False
+        finally:
+            if lettura_aperta:
+                self.conn.rollback()
+            if copia and os.path.exists(copia):
+                os.remove(copia)
+
+    def _inizia_lettura_da_file(self, tentativi: int = 3) -> Optional[str]:
+        """
+        Apre una transazione di lettura la cui immagine coincide con il file
+
+        In WAL il log viene prima svuotato (checkpoint TRUNCATE): una lettura
+        iniziata con il log vuoto legge solo dal file del database, e finché
+        resta aperta nessun checkpoint può modificarlo. Con il rollback
+        journal basta il lock condiviso della lettura.
+
+        Args:
+            tentativi: Checkpoint tentati se un'altra connessione scrive nel log
+
+        Returns:
+            Percorso del file del database, None se l'immagine non è nel file
+            (nessuna transazione resta aperta)
+        """
+        percorso = self.conn.execute("PRAGMA database_list").fetchone()[2]
+        if not percorso or self.conn.in_transaction:
+            return None
+        wal = self.conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+
+        log = percorso + "-wal"
+        for _ in range(tentativi):
+            try:
+                if wal:
+                    self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+                self.conn.execute("BEGIN")
+                self.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                if not wal or not os.path.exists(log) or os.path.getsize(log) == 0:
+                    return percorso
+            except (sqlite3.Error, OSError):
+                # Es. connessione in sola lettura: si ripiega sulla copia
+                self.conn.rollback()
+                return None
+            self.conn.rollback()
+        return None
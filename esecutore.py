@@ -0,0 +1,234 @@
+"""
+BudgetTracker - Modulo Esecutore
+Esegue query e rendering in un thread separato dall'interfaccia grafica
+
+Studente: Cattano Lorenzo
+Anno: 2025/2026
+"""
+
+import itertools
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from database import Database
+
+
+class RichiestaAnnullata(Exception):
+    """Sollevata nel thread di lavoro quando una richiesta più recente sostituisce quella in corso"""
+
+
+class EsecutoreDatabase:
+    """
+    Thread di lavoro con una propria connessione al database
+
+    Le connessioni sqlite3 appartengono al thread che le ha create, quindi
+    il thread apre la sua istanza di Database. I risultati vengono letti
+    dal thread di tkinter con root.after, l'unico che può toccare i widget.
+    Ogni richiesta ha una chiave: una nuova richiesta con la stessa chiave
+    annulla quella precedente, che riceve solo il callback di annullamento.
+    Una richiesta non ancora eseguita viene saltata; una in corso si ferma
+    al successivo verifica_annullamento (la query in esecuzione termina:
+    interromperla la farebbe risultare un errore del Database).
+    """
+
+    def __init__(self, root, db_name: str, profilo=None, intervallo_ms: int = 30,
+                 strumentazione=None):
+        """
+        Inizializza e avvia il thread di lavoro
+
+        Args:
+            root: Finestra principale tkinter
+            db_name: Nome del file database
+            profilo: Profilo di prestazioni della connessione (vedi Database)
+            intervallo_ms: Ogni quanti millisecondi controllare i risultati
+            strumentazione: Strumentazione che misura i metodi del Database
+                del thread (None per non misurare)
+        """
+        self.root = root
+        self.db_name = db_name
+        self.profilo = profilo
+        self.intervallo_ms = intervallo_ms
+        self.strumentazione = strumentazione
+        self._richieste = queue.Queue()
+        self._risultati = queue.Queue()
+        self._chiamate_gui = queue.Queue()
+        self._generazioni: Dict[str, int] = {}
+        self._annullamenti: Dict[str, Callable[[], None]] = {}
+        self._contatore = itertools.count(1)
+        self._attivo = None
+        self._db: Optional[Database] = None
+        self._lock = threading.Lock()
+        self._callback_stato: Optional[Callable[[bool], None]] = None
+
+        self._thread = threading.Thread(target=self._ciclo, name="EsecutoreDatabase",
+                                        daemon=True)
+        self._thread.start()
+        self._id_after = self.root.after(self.intervallo_ms, self._controlla_risultati)
+
+    def imposta_callback_stato(self, callback: Callable[[bool], None]) -> None:
+        """
+        Imposta la funzione chiamata quando cambia lo stato di attività
+
+        Args:
+            callback: Riceve True se ci sono richieste in corso, False altrimenti
+        """
+        self._callback_stato = callback
+
+    def invia(self, chiave: str, lavoro: Callable[[Database], Any],
+              callback: Callable[[Any], None],
+              callback_errore: Optional[Callable[[Exception], None]] = None,
+              callback_annullato: Optional[Callable[[], None]] = None) -> None:
+        """
+        Accoda un lavoro da eseguire nel thread
+
+        Args:
+            chiave: Identifica il tipo di richiesta (es. 'vista')
+            lavoro: Funzione eseguita nel thread, riceve il Database del thread
+            callback: Chiamata nel thread di tkinter con il risultato
+            callback_errore: Chiamata nel thread di tkinter se il lavoro fallisce
+            callback_annullato: Chiamata nel thread di tkinter se una richiesta
+                più recente con la stessa chiave annulla questa (es. per
+                chiudere una finestra di avanzamento)
+        """
+        with self._lock:
+            generazione = next(self._contatore)
+            superata = (self._annullamenti.pop(chiave, None)
+                        if chiave in self._generazioni else None)
+            self._generazioni[chiave] = generazione
+            if callback_annullato:
+                self._annullamenti[chiave] = callback_annullato
+
+        if superata:
+            # La richiesta superata non avrà altri callback
+            self.chiama_in_gui(superata)
+        self._richieste.put((chiave, generazione, lavoro, callback, callback_errore))
+        self._notifica_stato()
+
+    def verifica_annullamento(self) -> None:
+        """
+        Ferma il lavoro in corso se una richiesta più recente lo ha sostituito
+
+        Da chiamare dentro il lavoro tra un passo e l'altro (es. tra due query).
+
+        Raises:
+            RichiestaAnnullata: Se la richiesta in esecuzione è stata superata
+        """
+        with self._lock:
+            if self._attivo and self._generazioni.get(self._attivo[0]) != self._attivo[1]:
+                raise RichiestaAnnullata()
+
+    def chiama_in_gui(self, funzione: Callable, *args) -> None:
+        """
+        Esegue una funzione nel thread di tkinter (utilizzabile da qualunque thread)
+
+        Args:
+            funzione: Funzione da chiamare (es. aggiornamento di una barra di avanzamento)
+            *args: Argomenti della funzione
+        """
+        self._chiamate_gui.put((funzione, args))
+
+    def in_attesa(self, chiave: Optional[str] = None) -> bool:
+        """
+        Indica se ci sono richieste non ancora completate
+
+        Args:
+            chiave: Limita il controllo a una chiave (default: tutte)
+        """
+        with self._lock:
+            if chiave is None:
+                return bool(self._generazioni)
+            return chiave in self._generazioni
+
+    def chiudi(self) -> None:
+        """Ferma il thread e chiude la sua connessione"""
+        self.root.after_cancel(self._id_after)
+        self._richieste.put(None)
+        self._thread.join(timeout=2)
+
+    def _ciclo(self) -> None:
+        """Ciclo del thread di lavoro"""
+        errore_apertura = None
+        try:
+            self._db = Database(self.db_name, self.profilo)
+            if self.strumentazione:
+                self.strumentazione.strumenta(self._db)
+        except Exception as e:
+            # Senza connessione ogni richiesta fallisce con l'errore di apertura
+            print(f"Errore nell'apertura del database in background: {e}")
+            errore_apertura = e
+        try:
+            while True:
+                richiesta = self._richieste.get()
+                if richiesta is None:
+                    break
+
+                chiave, generazione, lavoro, callback, callback_errore = richiesta
+                with self._lock:
+                    if self._generazioni.get(chiave) != generazione:
+                        continue  # annullata da una richiesta più recente
+                    self._attivo = (chiave, generazione)
+
+                annullata = False
+                if errore_apertura is not None:
+                    risultato, errore = None, errore_apertura
+                else:
+                    try:
+                        risultato, errore = lavoro(self._db), None
+                    except RichiestaAnnullata:
+                        # Il callback di annullamento è già stato chiamato da invia
+                        risultato, errore, annullata = None, None, True
+                    except Exception as e:
+                        risultato, errore = None, e
+
+                with self._lock:
+                    self._attivo = None
+                if annullata:
+                    continue
+                self._risultati.put((chiave, generazione, risultato, errore,
+                                     callback, callback_errore))
+        finally:
+            if self._db is not None:
+                self._db.chiudi()
+
+    def _controlla_risultati(self) -> None:
+        """Consegna i risultati pronti nel thread di tkinter"""
+        try:
+            self._consegna_risultati()
+        finally:
+            self._id_after = self.root.after(self.intervallo_ms, self._controlla_risultati)
+
+    def _consegna_risultati(self) -> None:
+        """Chiama i callback dei risultati disponibili"""
+        try:
+            while True:
+                funzione, args = self._chiamate_gui.get_nowait()
+                funzione(*args)
+        except queue.Empty:
+            pass
+
+        try:
+            while True:
+                chiave, generazione, risultato, errore, callback, callback_errore = \
+                    self._risultati.get_nowait()
+
+                with self._lock:
+                    if self._generazioni.get(chiave) != generazione:
+                        continue  # risultato superato da una richiesta più recente
+                    del self._generazioni[chiave]
+                    self._annullamenti.pop(chiave, None)
+
+                if errore is None:
+                    callback(risultato)
+                elif callback_errore:
+                    callback_errore(errore)
+                else:
+                    print(f"Errore nell'esecuzione in background: {errore}")
+                self._notifica_stato()
+        except queue.Empty:
+            pass
+
+    def _notifica_stato(self) -> None:
+        """Avvisa l'interfaccia se ci sono richieste in corso"""
+        if self._callback_stato:
+            self._callback_stato(self.in_attesa())
@@ -0,0 +1,274 @@
+"""
+BudgetTracker - Modulo Esportazione
+Esporta le transazioni in CSV, JSON Lines e formato colonnare in streaming
+
+Studente: Cattano Lorenzo
+Anno: 2025/2026
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import struct
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from database import Database, COLONNE_TRANSAZIONI, SQL_GIORNO_ORDINALE, intervallo_mese
+from logica import RigaTransazione
+
+
+# Formati riconosciuti dall'estensione del file
+ESTENSIONI = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.btcol': 'colonnare'
+}
+
+# Intestazione del CSV (compatibile con ImportatoreEstratti)
+COLONNE_CSV = ['data', 'tipo', 'importo', 'categoria', 'descrizione']
+
+# Valori calcolati da SQLite per ogni formato: nessun oggetto Python per campo
+SELECT_CSV = ("data, tipo, printf('%d.%02d', importo / 100, importo % 100), "
+              "categoria, COALESCE(descrizione, '')")
+SELECT_JSONL = ("json_object('id', id, 'tipo', tipo, 'importo', importo, "
+                "'categoria', categoria, 'descrizione', descrizione, 'data', data, "
+                "'data_inserimento', data_inserimento)")
+
+# Formato colonnare: MAGIA, gruppi di righe, piè di pagina JSON,
+# lunghezza del piè di pagina (uint64 little endian), MAGIA
+MAGIA_COLONNARE = b"BTCOL1"
+VERSIONE_COLONNARE = 1
+
+# Tipo di ogni colonna del formato colonnare ('testo': UTF-8 separato da NUL)
+COLONNE_COLONNARE = {
+    'id': '<i8',
+    'data': '<i4',            # ordinale di date.toordinal
+    'tipo': '|u1',            # 1 entrata, 0 uscita
+    'importo': '<i8',         # centesimi
+    'categoria': '<i2',       # indice nella lista 'categorie' del piè di pagina
+    'descrizione': 'testo',
+    'data_inserimento': 'testo'
+}
+
+SELECT_COLONNARE = (f"id, {SQL_GIORNO_ORDINALE}, "
+                    f"tipo = 'entrata', importo, categoria, COALESCE(descrizione, ''), "
+                    f"data_inserimento")
+
+
+class EsportatoreTransazioni:
+    """Classe per l'esportazione delle transazioni dal database"""
+
+    def __init__(self, db: Database,
+                 callback_progresso: Optional[Callable[[int], None]] = None,
+                 dimensione_blocco: int = 50_000):
+        """
+        Inizializza l'esportatore
+
+        Args:
+            db: Database da cui leggere le transazioni
+            callback_progresso: Funzione chiamata con il numero di righe scritte
+            dimensione_blocco: Righe scritte insieme (e gruppo del formato colonnare)
+        """
+        self.db = db
+        self.callback_progresso = callback_progresso
+        self.dimensione_blocco = dimensione_blocco
+
+    def esporta(self, percorso: str, formato: Optional[str] = None,
+                da_mese: Optional[str] = None, a_mese: Optional[str] = None,
+                categoria: Optional[str] = None) -> int:
+        """
+        Esporta le transazioni in ordine cronologico
+
+        Il file viene scritto accanto con estensione .tmp e rinominato solo
+        a esportazione completata.
+
+        Args:
+            percorso: File di destinazione
+            formato: 'csv', 'jsonl' o 'colonnare' (default: dedotto dall'estensione)
+            da_mese: Primo mese esportato (formato YYYY-MM, default: nessun limite)
+            a_mese: Ultimo mese esportato, incluso (formato YYYY-MM)
+            categoria: Filtro per categoria
+
+        Returns:
+            Numero di transazioni esportate
+        """
+        if formato is None:
+            formato = ESTENSIONI.get(os.path.splitext(percorso)[1].lower(), 'csv')
+        scrittori = {'csv': self._scrivi_csv, 'jsonl': self._scrivi_jsonl,
+                     'colonnare': self._scrivi_colonnare}
+        if formato not in scrittori:
+            raise ValueError(f"Formato non supportato: {formato}")
+
+        da_data = intervallo_mese(da_mese)[0] if da_mese else None
+        a_data = None
+        if a_mese:
+            fine = date.fromisoformat(intervallo_mese(a_mese)[1])
+            a_data = (fine - timedelta(days=1)).isoformat()
+
+        def blocchi(espressioni: str) -> Iterator[List[tuple]]:
+            return self.db.itera_blocchi_transazioni(
+                espressioni, categoria=categoria, da_data=da_data, a_data=a_data,
+                dimensione_blocco=self.dimensione_blocco, crescente=True)
+
+        temporaneo = percorso + ".tmp"
+        try:
+            numero = scrittori[formato](temporaneo, blocchi)
+            os.replace(temporaneo, percorso)
+        except BaseException:
+            if os.path.exists(temporaneo):
+                os.remove(temporaneo)
+            raise
+        return numero
+
+    def _scrivi_csv(self, percorso: str, blocchi: Callable) -> int:
+        """Scrive le transazioni in CSV con importi in euro (es. 1234.56)"""
+        numero = 0
+        with open(percorso, 'w', encoding='utf-8', newline='') as f:
+            scrittore = csv.writer(f)
+            scrittore.writerow(COLONNE_CSV)
+            for blocco in blocchi(SELECT_CSV):
+                scrittore.writerows(blocco)
+                numero += len(blocco)
+                self._notifica(numero)
+        return numero
+
+    def _scrivi_jsonl(self, percorso: str, blocchi: Callable) -> int:
+        """Scrive un oggetto JSON per riga con importi in centesimi"""
+        numero = 0
+        with open(percorso, 'w', encoding='utf-8', newline='\n') as f:
+            for blocco in self._blocchi_json(blocchi):
+                f.write("\n".join(blocco))
+                f.write("\n")
+                numero += len(blocco)
+                self._notifica(numero)
+        return numero
+
+    @staticmethod
+    def _blocchi_json(blocchi: Callable) -> Iterator[List[str]]:
+        """Restituisce blocchi di righe JSON codificate da SQLite (o da Python)"""
+        righe = blocchi(SELECT_JSONL)
+        try:
+            primo = next(righe, None)
+        except sqlite3.OperationalError:
+            # SQLite senza funzioni JSON: stessa codifica compatta in Python
+            codifica = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+            for blocco in blocchi(COLONNE_TRANSAZIONI):
+                yield [codifica(RigaTransazione._make(riga)._asdict()) for riga in blocco]
+            return
+
+        if primo is not None:
+            yield [riga[0] for riga in primo]
+            for blocco in righe:
+                yield [riga[0] for riga in blocco]
+
+    def _scrivi_colonnare(self, percorso: str, blocchi: Callable) -> int:
+        """Scrive un gruppo di colonne per blocco e l'indice nel piè di pagina"""
+        # NumPy solo per il formato colonnare: l'interfaccia importa questo
+        # modulo all'avvio
+        import numpy as np
+
+        categorie: Dict[str, int] = {}
+        gruppi = []
+        numero = 0
+        with open(percorso, 'wb') as f:
+            f.write(MAGIA_COLONNARE)
+            for blocco in blocchi(SELECT_COLONNARE):
+                id_, giorni, entrate, importi, nomi, descrizioni, inserimenti = zip(*blocco)
+                colonne = {
+                    'id': np.array(id_, dtype='<i8'),
+                    'data': np.array(giorni, dtype='<i4'),
+                    'tipo': np.array(entrate, dtype='|u1'),
+                    'importo': np.array(importi, dtype='<i8'),
+                    'categoria': np.array(
+                        [categorie.setdefault(nome, len(categorie)) for nome in nomi],
+                        dtype='<i2'),
+                    'descrizione': self._codifica_testi(descrizioni),
+                    'data_inserimento': self._codifica_testi(inserimenti)
+                }
+
+                posizioni = {}
+                for nome, valori in colonne.items():
+                    dati = valori if isinstance(valori, bytes) else valori.tobytes()
+                    posizioni[nome] = [f.tell(), len(dati)]
+                    f.write(dati)
+                gruppi.append({'righe': len(blocco), 'colonne': posizioni})
+                numero += len(blocco)
+                self._notifica(numero)
+
+            piede = json.dumps({
+                'versione': VERSIONE_COLONNARE,
+                'righe': numero,
+                'colonne': COLONNE_COLONNARE,
+                'categorie': list(categorie),
+                'gruppi': gruppi
+            }, ensure_ascii=False).encode('utf-8')
+            f.write(piede)
+            f.write(struct.pack('<Q', len(piede)))
+            f.write(MAGIA_COLONNARE)
+        return numero
+
+    @staticmethod
+    def _codifica_testi(valori: tuple) -> bytes:
+        """Unisce una colonna di testi in UTF-8 separati da NUL"""
+        testo = "\x00".join(valori)
+        if testo.count("\x00") != len(valori) - 1:
+            # Un NUL dentro un valore sposterebbe le righe successive
+            testo = "\x00".join(valore.replace("\x00", "") for valore in valori)
+        return testo.encode('utf-8')
+
+    def _notifica(self, righe: int) -> None:
+        """Chiama il callback di avanzamento se presente"""
+        if self.callback_progresso:
+            self.callback_progresso(righe)
+
+
+def leggi_colonnare(percorso: str, colonne: Optional[List[str]] = None) -> Dict:
+    """
+    Legge un file esportato in formato colonnare
+
+    Vengono lette solo le colonne richieste, saltando le altre nel file.
+
+    Args:
+        percorso: File .btcol
+        colonne: Nomi delle colonne da leggere (default: tutte)
+
+    Returns:
+        Dizionario {colonna: array NumPy o lista di testi} più la chiave
+        'categorie' con i nomi corrispondenti ai codici della colonna categoria
+    """
+    import numpy as np
+
+    with open(percorso, 'rb') as f:
+        coda = len(MAGIA_COLONNARE) + 8
+        f.seek(-coda, os.SEEK_END)
+        lunghezza = struct.unpack('<Q', f.read(8))[0]
+        if f.read() != MAGIA_COLONNARE:
+            raise ValueError("Il file non è in formato colonnare BudgetTracker")
+        f.seek(-(coda + lunghezza), os.SEEK_END)
+        piede = json.loads(f.read(lunghezza).decode('utf-8'))
+        if piede.get('versione') != VERSIONE_COLONNARE:
+            raise ValueError(f"Versione del formato non supportata: {piede.get('versione')}")
+
+        risultato = {}
+        for nome in colonne or list(piede['colonne']):
+            tipo = piede['colonne'].get(nome)
+            if tipo is None:
+                raise ValueError(f"Colonna inesistente: {nome}")
+            parti = []
+            for gruppo in piede['gruppi']:
+                posizione, dimensione = gruppo['colonne'][nome]
+                f.seek(posizione)
+                dati = f.read(dimensione)
+                if tipo == 'testo':
+                    parti.extend(dati.decode('utf-8').split("\x00") if gruppo['righe'] else [])
+                else:
+                    parti.append(np.frombuffer(dati, dtype=tipo))
+            if tipo == 'testo':
+                risultato[nome] = parti
+            else:
+                risultato[nome] = (np.concatenate(parti) if parti
+                                   else np.empty(0, dtype=tipo))
+        risultato['categorie'] = piede['categorie']
+        return risultato
@@ -6,14 +6,24 @@ Studente: Cattano Lorenzo
 Anno: 2025/2026
 """
 
+import os
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib
-from typing import Dict, Optional, Tuple
+import math
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
 
-# Configura matplotlib per usare un backend compatibile con tkinter
-matplotlib.use('TkAgg')
+if TYPE_CHECKING:
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+# Configura matplotlib per usare un backend compatibile con tkinter, a meno
+# che sia già scelto da MPLBACKEND (es. Agg per i rapporti senza display)
+if not os.environ.get('MPLBACKEND'):
+    try:
+        matplotlib.use('TkAgg')
+    except ImportError:
+        # Nessun display disponibile (es. benchmark): solo rendering su file
+        matplotlib.use('Agg')
 
 
 class GeneratoreGrafici:
@@ -28,6 +38,9 @@ class GeneratoreGrafici:
             '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E2',
             '#F8B195', '#C06C84'
         ]
+        # Figure e canvas persistenti, riutilizzati a ogni aggiornamento
+        self._artisti: Dict[Figure, dict] = {}
+        self._canvas: Dict[tuple, 'FigureCanvasTkAgg'] = {}
 
     def crea_grafico_torta(self, spese_per_categoria: Dict[str, float],
                           titolo: str = "Distribuzione Spese per Categoria",
@@ -44,8 +57,17 @@ class GeneratoreGrafici:
             Figure matplotlib
         """
         fig = Figure(figsize=dimensione, dpi=100)
-        ax = fig.add_subplot(111)
+        self._disegna_torta(fig, fig.add_subplot(111), spese_per_categoria, titolo)
+        return fig
 
+    def _disegna_torta(self, fig: Figure, ax, spese_per_categoria: Dict[str, float],
+                       titolo: str) -> Optional[dict]:
+        """
+        Disegna il grafico a torta sugli assi indicati
+
+        Returns:
+            Dizionario degli artisti da aggiornare in seguito (None se non ci sono dati)
+        """
         if not spese_per_categoria or sum(spese_per_categoria.values()) == 0:
             ax.text(0.5, 0.5, 'Nessun dato disponibile',
                    horizontalalignment='center',
@@ -53,7 +75,7 @@ class GeneratoreGrafici:
                    fontsize=14,
                    color='gray')
             ax.set_title(titolo, fontsize=16, fontweight='bold', pad=20)
-            return fig
+            return None
 
         # Ordina per importo decrescente
         categorie = list(spese_per_categoria.keys())
@@ -77,13 +99,40 @@ class GeneratoreGrafici:
 
         # Aggiungi una legenda con gli importi
         legenda_labels = [f'{cat}: {imp:,.2f} €' for cat, imp in zip(categorie, importi)]
-        ax.legend(legenda_labels, loc='center left', bbox_to_anchor=(1, 0, 0.5, 1),
-                 fontsize=9)
+        legenda = ax.legend(legenda_labels, loc='center left', bbox_to_anchor=(1, 0, 0.5, 1),
+                            fontsize=9)
 
         ax.set_title(titolo, fontsize=16, fontweight='bold', pad=20)
 
         fig.tight_layout()
-        return fig
+        return {'chiave': tuple(categorie), 'ax': ax, 'wedges': wedges, 'texts': texts,
+                'autotexts': autotexts, 'legenda': legenda}
+
+    @staticmethod
+    def _aggiorna_torta(artisti: dict, spese_per_categoria: Dict[str, float], titolo: str) -> None:
+        """Aggiorna angoli ed etichette di una torta con le stesse categorie"""
+        importi = list(spese_per_categoria.values())
+        totale = sum(importi)
+        theta1 = 90 / 360
+        for i, importo in enumerate(importi):
+            frazione = importo / totale
+            theta2 = theta1 + frazione
+            artisti['wedges'][i].set_theta1(360 * theta1)
+            artisti['wedges'][i].set_theta2(360 * theta2)
+
+            # Stesse posizioni calcolate da Axes.pie
+            angolo = math.pi * (theta1 + theta2)
+            x, y = math.cos(angolo), math.sin(angolo)
+            artisti['texts'][i].set_position((1.1 * x, 1.1 * y))
+            artisti['texts'][i].set_horizontalalignment('left' if x > 0 else 'right')
+            artisti['autotexts'][i].set_position((0.6 * x, 0.6 * y))
+            percentuale = frazione * 100
+            artisti['autotexts'][i].set_text(f'{percentuale:.1f}%' if percentuale > 5 else '')
+            theta1 = theta2
+
+        for testo, (cat, imp) in zip(artisti['legenda'].get_texts(), spese_per_categoria.items()):
+            testo.set_text(f'{cat}: {imp:,.2f} €')
+        artisti['ax'].set_title(titolo, fontsize=16, fontweight='bold', pad=20)
 
     def crea_grafico_barre(self, dati: Dict[str, float], titolo: str = "Confronto",
                           xlabel: str = "Categoria", ylabel: str = "Importo (€)",
@@ -104,8 +153,17 @@ class GeneratoreGrafici:
             Figure matplotlib
         """
         fig = Figure(figsize=dimensione, dpi=100)
-        ax = fig.add_subplot(111)
+        self._disegna_barre(fig, fig.add_subplot(111), dati, titolo, xlabel, ylabel, orizzontale)
+        return fig
+
+    def _disegna_barre(self, fig: Figure, ax, dati: Dict[str, float], titolo: str,
+                       xlabel: str, ylabel: str, orizzontale: bool) -> Optional[dict]:
+        """
+        Disegna il grafico a barre sugli assi indicati
 
+        Returns:
+            Dizionario degli artisti da aggiornare in seguito (None se non ci sono dati)
+        """
         if not dati or sum(dati.values()) == 0:
             ax.text(0.5, 0.5, 'Nessun dato disponibile',
                    horizontalalignment='center',
@@ -113,7 +171,7 @@ class GeneratoreGrafici:
                    fontsize=14,
                    color='gray')
             ax.set_title(titolo, fontsize=16, fontweight='bold', pad=20)
-            return fig
+            return None
 
         categorie = list(dati.keys())
         valori = list(dati.values())
@@ -131,19 +189,41 @@ class GeneratoreGrafici:
                 plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
 
         # Aggiungi valori sopra le barre
+        etichette = []
         for i, (bar, valore) in enumerate(zip(bars, valori)):
             if orizzontale:
-                ax.text(valore, i, f' {valore:,.2f}€',
-                       va='center', fontsize=9)
+                etichette.append(ax.text(valore, i, f' {valore:,.2f}€',
+                                         va='center', fontsize=9))
             else:
-                ax.text(i, valore, f'{valore:,.2f}€',
-                       ha='center', va='bottom', fontsize=9)
+                etichette.append(ax.text(i, valore, f'{valore:,.2f}€',
+                                         ha='center', va='bottom', fontsize=9))
 
         ax.set_title(titolo, fontsize=16, fontweight='bold', pad=20)
         ax.grid(True, alpha=0.3)
 
         fig.tight_layout()
-        return fig
+        return {'chiave': (tuple(categorie), orizzontale), 'ax': ax, 'bars': bars,
+                'etichette': etichette}
+
+    @staticmethod
+    def _aggiorna_barre(artisti: dict, dati: Dict[str, float], titolo: str) -> None:
+        """Aggiorna altezze ed etichette di un grafico a barre con le stesse categorie"""
+        orizzontale = artisti['chiave'][1]
+        for i, (bar, etichetta, valore) in enumerate(
+                zip(artisti['bars'], artisti['etichette'], dati.values())):
+            if orizzontale:
+                bar.set_width(valore)
+                etichetta.set_position((valore, i))
+                etichetta.set_text(f' {valore:,.2f}€')
+            else:
+                bar.set_height(valore)
+                etichetta.set_position((i, valore))
+                etichetta.set_text(f'{valore:,.2f}€')
+
+        ax = artisti['ax']
+        ax.set_title(titolo, fontsize=16, fontweight='bold', pad=20)
+        ax.relim()
+        ax.autoscale_view()
 
     def crea_grafico_confronto_entrate_uscite(self, entrate: float, uscite: float,
                                               dimensione: Tuple[int, int] = (8, 6)) -> Figure:
@@ -159,8 +239,17 @@ class GeneratoreGrafici:
             Figure matplotlib
         """
         fig = Figure(figsize=dimensione, dpi=100)
-        ax = fig.add_subplot(111)
+        self._disegna_confronto(fig, fig.add_subplot(111), entrate, uscite)
+        return fig
+
+    @staticmethod
+    def _disegna_confronto(fig: Figure, ax, entrate: float, uscite: float) -> dict:
+        """
+        Disegna il confronto entrate/uscite sugli assi indicati
 
+        Returns:
+            Dizionario degli artisti da aggiornare in seguito
+        """
         categorie = ['Entrate', 'Uscite', 'Saldo']
         valori = [entrate, uscite, entrate - uscite]
         colori_custom = ['#2ECC71', '#E74C3C', '#3498DB' if valori[2] >= 0 else '#E74C3C']
@@ -168,13 +257,14 @@ class GeneratoreGrafici:
         bars = ax.bar(categorie, valori, color=colori_custom, width=0.6)
 
         # Aggiungi valori sopra le barre
+        etichette = []
         for i, (bar, valore) in enumerate(zip(bars, valori)):
-            ax.text(i, valore if valore >= 0 else 0,
-                   f'{valore:,.2f}€',
-                   ha='center',
-                   va='bottom' if valore >= 0 else 'top',
-                   fontsize=12,
-                   fontweight='bold')
+            etichette.append(ax.text(i, valore if valore >= 0 else 0,
+                                     f'{valore:,.2f}€',
+                                     ha='center',
+                                     va='bottom' if valore >= 0 else 'top',
+                                     fontsize=12,
+                                     fontweight='bold'))
 
         ax.set_ylabel('Importo (€)', fontsize=12)
         ax.set_title('Riepilogo Finanziario', fontsize=16, fontweight='bold', pad=20)
@@ -182,7 +272,23 @@ class GeneratoreGrafici:
         ax.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
 
         fig.tight_layout()
-        return fig
+        return {'chiave': None, 'ax': ax, 'bars': bars, 'etichette': etichette}
+
+    @staticmethod
+    def _aggiorna_confronto(artisti: dict, entrate: float, uscite: float) -> None:
+        """Aggiorna le tre barre del confronto entrate/uscite"""
+        valori = [entrate, uscite, entrate - uscite]
+        for i, (bar, etichetta, valore) in enumerate(
+                zip(artisti['bars'], artisti['etichette'], valori)):
+            bar.set_height(valore)
+            etichetta.set_position((i, valore if valore >= 0 else 0))
+            etichetta.set_verticalalignment('bottom' if valore >= 0 else 'top')
+            etichetta.set_text(f'{valore:,.2f}€')
+        artisti['bars'][2].set_color('#3498DB' if valori[2] >= 0 else '#E74C3C')
+
+        ax = artisti['ax']
+        ax.relim()
+        ax.autoscale_view()
 
     def crea_grafico_andamento_mensile(self, dati_mensili: Dict[str, Tuple[float, float]],
                                       dimensione: Tuple[int, int] = (12, 6)) -> Figure:
@@ -197,8 +303,18 @@ class GeneratoreGrafici:
             Figure matplotlib
         """
         fig = Figure(figsize=dimensione, dpi=100)
-        ax = fig.add_subplot(111)
+        self._disegna_andamento(fig, fig.add_subplot(111), dati_mensili)
+        return fig
 
+    @staticmethod
+    def _disegna_andamento(fig: Figure, ax,
+                           dati_mensili: Dict[str, Tuple[float, float]]) -> Optional[dict]:
+        """
+        Disegna l'andamento mensile sugli assi indicati
+
+        Returns:
+            Dizionario degli artisti da aggiornare in seguito (None se non ci sono dati)
+        """
         if not dati_mensili:
             ax.text(0.5, 0.5, 'Nessun dato disponibile',
                    horizontalalignment='center',
@@ -206,7 +322,7 @@ class GeneratoreGrafici:
                    fontsize=14,
                    color='gray')
             ax.set_title('Andamento Mensile', fontsize=16, fontweight='bold', pad=20)
-            return fig
+            return None
 
         mesi = list(dati_mensili.keys())
         entrate = [dati[0] for dati in dati_mensili.values()]
@@ -216,15 +332,18 @@ class GeneratoreGrafici:
         x = range(len(mesi))
 
         # Crea linee per entrate, uscite e saldo
-        ax.plot(x, entrate, marker='o', label='Entrate', color='#2ECC71',
-               linewidth=2, markersize=8)
-        ax.plot(x, uscite, marker='s', label='Uscite', color='#E74C3C',
-               linewidth=2, markersize=8)
-        ax.plot(x, saldi, marker='^', label='Saldo', color='#3498DB',
-               linewidth=2, markersize=8, linestyle='--')
-
-        ax.set_xticks(x)
-        ax.set_xticklabels(mesi, rotation=45, ha='right')
+        dimensione_marker = 8 if len(mesi) <= 24 else 3
+        linea_entrate, = ax.plot(x, entrate, marker='o', label='Entrate', color='#2ECC71',
+                                 linewidth=2, markersize=dimensione_marker)
+        linea_uscite, = ax.plot(x, uscite, marker='s', label='Uscite', color='#E74C3C',
+                                linewidth=2, markersize=dimensione_marker)
+        linea_saldo, = ax.plot(x, saldi, marker='^', label='Saldo', color='#3498DB',
+                               linewidth=2, markersize=dimensione_marker, linestyle='--')
+
+        # Su intervalli lunghi (es. 10 anni) mostra al massimo 24 etichette
+        passo = max(1, -(-len(mesi) // 24))
+        ax.set_xticks(x[::passo])
+        ax.set_xticklabels(mesi[::passo], rotation=45, ha='right')
         ax.set_xlabel('Mese', fontsize=12)
         ax.set_ylabel('Importo (€)', fontsize=12)
         ax.set_title('Andamento Mensile', fontsize=16, fontweight='bold', pad=20)
@@ -233,10 +352,113 @@ class GeneratoreGrafici:
         ax.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
 
         fig.tight_layout()
-        return fig
+        return {'chiave': tuple(mesi), 'ax': ax,
+                'linee': (linea_entrate, linea_uscite, linea_saldo)}
 
     @staticmethod
-    def incorpora_grafico_in_tkinter(figura: Figure, container) -> FigureCanvasTkAgg:
+    def _aggiorna_andamento(artisti: dict, dati_mensili: Dict[str, Tuple[float, float]]) -> None:
+        """Aggiorna i dati delle linee di un andamento con gli stessi mesi"""
+        entrate = [dati[0] for dati in dati_mensili.values()]
+        uscite = [dati[1] for dati in dati_mensili.values()]
+        saldi = [e - u for e, u in zip(entrate, uscite)]
+        for linea, valori in zip(artisti['linee'], (entrate, uscite, saldi)):
+            linea.set_ydata(valori)
+
+        ax = artisti['ax']
+        ax.relim()
+        ax.autoscale_view()
+
+    def aggiorna_figura(self, figura: Figure, tipo: str, dati, titolo: str = "",
+                        **opzioni) -> None:
+        """
+        Aggiorna una figura persistente con nuovi dati
+
+        Se la struttura del grafico non cambia (stesse categorie o mesi)
+        vengono modificati solo i dati degli artisti esistenti, altrimenti
+        la figura viene ridisegnata senza crearne una nuova.
+
+        Args:
+            figura: Figure da aggiornare
+            tipo: 'torta', 'barre', 'confronto' o 'andamento'
+            dati: Dizionario dei dati ({categoria: importo}, {mese: (entrate, uscite)})
+                oppure tupla (entrate, uscite) per il confronto
+            titolo: Titolo del grafico (torta e barre)
+            **opzioni: xlabel, ylabel, orizzontale per il grafico a barre
+        """
+        artisti = self._artisti.get(figura)
+
+        if tipo == 'torta':
+            chiave = tuple(dati.keys()) if dati and sum(dati.values()) > 0 else None
+        elif tipo == 'barre':
+            chiave = ((tuple(dati.keys()), opzioni.get('orizzontale', False))
+                      if dati and sum(dati.values()) != 0 else None)
+        elif tipo == 'confronto':
+            chiave = None
+        elif tipo == 'andamento':
+            chiave = tuple(dati.keys()) if dati else None
+        else:
+            raise ValueError(f"Tipo di grafico non valido: {tipo}")
+
+        # Aggiornamento in place se la struttura è la stessa
+        if artisti and artisti['tipo'] == tipo and artisti['chiave'] == chiave:
+            if tipo == 'torta':
+                self._aggiorna_torta(artisti, dati, titolo)
+            elif tipo == 'barre':
+                self._aggiorna_barre(artisti, dati, titolo)
+            elif tipo == 'confronto':
+                self._aggiorna_confronto(artisti, *dati)
+            else:
+                self._aggiorna_andamento(artisti, dati)
+            return
+
+        # Altrimenti ridisegna sulla stessa figura
+        figura.clear()
+        ax = figura.add_subplot(111)
+        if tipo == 'torta':
+            nuovi = self._disegna_torta(figura, ax, dati, titolo)
+        elif tipo == 'barre':
+            nuovi = self._disegna_barre(figura, ax, dati, titolo,
+                                        opzioni.get('xlabel', "Categoria"),
+                                        opzioni.get('ylabel', "Importo (€)"),
+                                        opzioni.get('orizzontale', False))
+        elif tipo == 'confronto':
+            nuovi = self._disegna_confronto(figura, ax, *dati)
+        else:
+            nuovi = self._disegna_andamento(figura, ax, dati)
+
+        if nuovi is None:
+            self._artisti.pop(figura, None)
+        else:
+            nuovi['tipo'] = tipo
+            self._artisti[figura] = nuovi
+
+    def mostra_grafico(self, tipo: str, container, dati, titolo: str = "",
+                       **opzioni) -> 'FigureCanvasTkAgg':
+        """
+        Mostra un grafico in tkinter riusando la stessa figura e lo stesso canvas
+
+        Args:
+            tipo: 'torta', 'barre', 'confronto' o 'andamento'
+            container: Widget tkinter contenitore
+            dati: Dati del grafico (vedi aggiorna_figura)
+            titolo: Titolo del grafico
+            **opzioni: Opzioni passate ad aggiorna_figura
+
+        Returns:
+            Canvas del grafico (sempre lo stesso per tipo e contenitore)
+        """
+        canvas = self._canvas.get((tipo, container))
+        if canvas is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            canvas = FigureCanvasTkAgg(Figure(figsize=(10, 8), dpi=100), master=container)
+            self._canvas[(tipo, container)] = canvas
+
+        self.aggiorna_figura(canvas.figure, tipo, dati, titolo, **opzioni)
+        canvas.draw_idle()
+        return canvas
+
+    @staticmethod
+    def incorpora_grafico_in_tkinter(figura: Figure, container) -> 'FigureCanvasTkAgg':
         """
         Incorpora un grafico matplotlib in un widget tkinter
 
@@ -247,6 +469,8 @@ class GeneratoreGrafici:
         Returns:
             Canvas del grafico
         """
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         canvas = FigureCanvasTkAgg(figura, master=container)
         canvas.draw()
         return canvas
@@ -6,13 +6,36 @@ Studente: Cattano Lorenzo
 Anno: 2025/2026
 """
 
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Optional, Callable
-from database import Database
-from logica import Validatore, Formattatore, Bilancio, CalcolatoreStatistiche
-from grafici import GeneratoreGrafici
+from database import Database, sposta_mese
+from logica import Validatore, Formattatore, Bilancio, CalcolatoreStatistiche, RigaTransazione
+from importatore import ImportatoreEstratti
+from esportatore import EsportatoreTransazioni
+from esecutore import EsecutoreDatabase
+from strumentazione import da_ambiente
+
+
+# Transazioni caricate per ogni pagina della lista
+DIMENSIONE_PAGINA = 100
+
+# Mesi mostrati nel grafico di andamento (fino al mese selezionato)
+MESI_ANDAMENTO = 12
+
+# Attesa dopo l'ultimo tasto prima di avviare la ricerca
+RITARDO_RICERCA_MS = 250
+
+# Intervallo di aggiornamento della finestra di diagnostica
+INTERVALLO_DIAGNOSTICA_MS = 1000
+
+# Voci del menu File disattivate mentre il lavoro corrispondente è in corso
+VOCE_IMPORTA = "Importa Estratto Conto..."
+VOCE_BACKUP = "Backup Database"
+VOCE_ESPORTA = "Esporta Transazioni..."
 
 
 class InterfacciaGrafica:
@@ -30,16 +53,28 @@ class InterfacciaGrafica:
         self.root.geometry("1200x800")
         self.root.minsize(1000, 700)
 
+        # Strumentazione dei tempi, attiva solo se richiesta (vedi strumentazione.py)
+        self.strumentazione = da_ambiente()
+
         # Inizializza i moduli
         self.db = Database()
+        if self.strumentazione:
+            self.strumentazione.strumenta(self.db)
+        self.esecutore = EsecutoreDatabase(self.root, self.db.db_name, self.db.profilo,
+                                           strumentazione=self.strumentazione)
         self.validatore = Validatore()
         self.formattatore = Formattatore()
-        self.generatore_grafici = GeneratoreGrafici()
+        # Il modulo grafici (matplotlib) viene caricato alla prima apertura del tab Grafici
+        self.generatore_grafici = None
+        self._grafico_da_aggiornare = True
         self.statistiche = CalcolatoreStatistiche()
 
         # Variabili
         self.mese_corrente = datetime.now().strftime("%Y-%m")
         self.categoria_filtro = "Tutte"
+        self.bilancio = Bilancio()
+        self.spese_correnti = {}
+        self.andamento_corrente = {}
 
         # Configura stile
         self._configura_stile()
@@ -51,6 +86,9 @@ class InterfacciaGrafica:
         # Carica dati iniziali
         self.aggiorna_visualizzazione()
 
+        # Aggiorna solo le parti interessate quando cambia il database
+        self.db.aggiungi_osservatore(self._on_modifica_database)
+
         # Gestisci chiusura
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
 
@@ -82,16 +120,22 @@ class InterfacciaGrafica:
         self.root.config(menu=menubar)
 
         # Menu File
-        file_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="Backup Database", command=self._backup_database)
-        file_menu.add_separator()
-        file_menu.add_command(label="Esci", command=self._on_closing)
+        self.file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="File", menu=self.file_menu)
+        self.file_menu.add_command(label=VOCE_IMPORTA, command=self._importa_estratto)
+        self.file_menu.add_command(label=VOCE_BACKUP, command=self._backup_database)
+        self.file_menu.add_command(label=VOCE_ESPORTA, command=self._esporta_transazioni)
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label="Esci", command=self._on_closing)
 
         # Menu Visualizza
         view_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Visualizza", menu=view_menu)
         view_menu.add_command(label="Aggiorna", command=self.aggiorna_visualizzazione)
+        view_menu.add_command(label="Verifica Riepiloghi", command=self._verifica_riepiloghi)
+        if self.strumentazione:
+            view_menu.add_command(label="Diagnostica Prestazioni",
+                                  command=self._mostra_diagnostica)
 
         # Menu Aiuto
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -211,6 +255,12 @@ class InterfacciaGrafica:
         self.saldo_label = ttk.Label(frame, text="0,00 €", style='Saldo.TLabel')
         self.saldo_label.grid(row=4, column=1, sticky=tk.E, pady=5)
 
+        # Indicatore di caricamento (visibile solo durante le richieste in background)
+        self.caricamento_bar = ttk.Progressbar(frame, mode='indeterminate', length=120)
+        self.caricamento_bar.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        self.caricamento_bar.grid_remove()
+        self.esecutore.imposta_callback_stato(self._mostra_caricamento)
+
         frame.columnconfigure(1, weight=1)
 
     def _crea_pannello_centrale(self, parent) -> None:
@@ -224,6 +274,7 @@ class InterfacciaGrafica:
 
         # Tab Grafici
         self._crea_tab_grafici()
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_cambiato)
 
     def _crea_tab_transazioni(self) -> None:
         """Crea il tab delle transazioni"""
@@ -245,6 +296,15 @@ class InterfacciaGrafica:
         categorie = ["Tutte"] + self.db.ottieni_categorie()
         filtro_combo['values'] = categorie
 
+        # Ricerca su tutti i mesi mentre si scrive (Esc per cancellare)
+        ttk.Label(filtri_frame, text="Cerca:").pack(side=tk.LEFT, padx=(15, 5))
+        self.ricerca_var = tk.StringVar()
+        ricerca_entry = ttk.Entry(filtri_frame, textvariable=self.ricerca_var, width=25)
+        ricerca_entry.pack(side=tk.LEFT, padx=5)
+        ricerca_entry.bind("<Escape>", lambda e: self.ricerca_var.set(""))
+        self.ricerca_var.trace_add("write", self._on_ricerca_modificata)
+        self._ricerca_pianificata = None
+
         ttk.Button(filtri_frame, text="Elimina Selezionata",
                   command=self._elimina_transazione_selezionata).pack(side=tk.RIGHT, padx=5)
 
@@ -259,9 +319,20 @@ class InterfacciaGrafica:
         # Treeview
         columns = ('Data', 'Tipo', 'Categoria', 'Descrizione', 'Importo')
         self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings',
-                                yscrollcommand=scrollbar.set)
+                                yscrollcommand=self._on_scroll_lista)
+        self.tree_scrollbar = scrollbar
         scrollbar.config(command=self.tree.yview)
 
+        # Stato della paginazione della lista
+        self._filtri_lista = (None, None)
+        self._ricerca_lista = ""
+        self._chiavi_lista = {}
+        self._ultima_transazione = None
+        self._lista_completa = True
+        self._caricamento_pianificato = False
+        # Cambia a ogni nuova lista: le pagine chieste per una lista precedente si scartano
+        self._versione_lista = 0
+
         # Configura colonne
         self.tree.heading('Data', text='Data')
         self.tree.heading('Tipo', text='Tipo')
@@ -285,6 +356,7 @@ class InterfacciaGrafica:
         """Crea il tab dei grafici"""
         tab = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(tab, text="Grafici")
+        self.tab_grafici = tab
 
         # Frame controlli
         controlli_frame = ttk.Frame(tab)
@@ -298,6 +370,8 @@ class InterfacciaGrafica:
                        value="barre", command=self._aggiorna_grafico).pack(side=tk.LEFT, padx=5)
         ttk.Radiobutton(controlli_frame, text="Confronto", variable=self.tipo_grafico_var,
                        value="confronto", command=self._aggiorna_grafico).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(controlli_frame, text="Andamento", variable=self.tipo_grafico_var,
+                       value="andamento", command=self._aggiorna_grafico).pack(side=tk.LEFT, padx=5)
 
         ttk.Button(controlli_frame, text="Salva Grafico",
                   command=self._salva_grafico).pack(side=tk.RIGHT, padx=5)
@@ -384,8 +458,6 @@ class InterfacciaGrafica:
             self.descrizione_entry.delete(0, tk.END)
             self.data_entry.delete(0, tk.END)
             self.data_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
-            # Aggiorna visualizzazione
-            self.aggiorna_visualizzazione()
         else:
             messagebox.showerror("Errore", "Errore nell'aggiunta della transazione")
 
@@ -410,19 +482,81 @@ class InterfacciaGrafica:
             id_transazione = int(tags[1])
             if self.db.elimina_transazione(id_transazione):
                 messagebox.showinfo("Successo", "Transazione eliminata con successo!")
-                self.aggiorna_visualizzazione()
             else:
                 messagebox.showerror("Errore", "Errore nell'eliminazione della transazione")
 
     def aggiorna_visualizzazione(self) -> None:
-        """Aggiorna tutti i dati visualizzati"""
+        """Ricarica in background tutti i dati visualizzati"""
         mese = self.mese_var.get()
         filtro_cat = self.filtro_categoria_var.get() if hasattr(self, 'filtro_categoria_var') else None
+        cat_filtro = None if filtro_cat == "Tutte" else filtro_cat
+        ricerca = self.ricerca_var.get().strip() if hasattr(self, 'ricerca_var') else ""
+
+        inizio = time.perf_counter()
+
+        def carica(db: Database) -> tuple:
+            # Tra una query e l'altra: se è già stato scelto un altro mese
+            # le query rimanenti non vengono eseguite
+            verifica = self.esecutore.verifica_annullamento
+            with self._fase('vista.query'):
+                saldo = db.ottieni_saldo(mese)
+                verifica()
+                spese = db.ottieni_spese_per_categoria(mese)
+                verifica()
+                prima_pagina = self._leggi_prima_pagina(db, mese, cat_filtro, ricerca)
+                verifica()
+                andamento = db.ottieni_andamento_mensile(
+                    sposta_mese(mese, -(MESI_ANDAMENTO - 1)), mese)
+                return saldo, spese, prima_pagina, andamento
+
+        def applica(risultato: tuple) -> None:
+            self._applica_visualizzazione(mese, filtro_cat, ricerca, risultato)
+            if self.strumentazione:
+                # Dalla richiesta alla vista aggiornata, attesa nella coda compresa
+                self.strumentazione.registra('vista.totale',
+                                             (time.perf_counter() - inizio) * 1000)
+
+        # Una nuova richiesta annulla quella per il mese selezionato in precedenza
+        self.esecutore.invia('vista', carica, applica)
+
+    def _applica_visualizzazione(self, mese: str, filtro_cat: Optional[str],
+                                 ricerca: str, risultato: tuple) -> None:
+        """Mostra i dati caricati in background"""
+        (entrate, uscite, saldo), spese, prima_pagina, andamento = risultato
+        self.bilancio = Bilancio(entrate, uscite)
+        self.spese_correnti = spese
+        self.andamento_corrente = andamento
 
         # Aggiorna riepilogo
-        entrate, uscite, saldo = self.db.ottieni_saldo(mese)
-        self.entrate_label.config(text=self.formattatore.formatta_valuta(entrate))
-        self.uscite_label.config(text=self.formattatore.formatta_valuta(uscite))
+        with self._fase('vista.riepilogo'):
+            self._aggiorna_riepilogo()
+
+        # Aggiorna lista transazioni
+        with self._fase('vista.lista'):
+            self._aggiorna_lista_transazioni(mese, filtro_cat, prima_pagina, ricerca)
+
+        # Aggiorna grafico
+        with self._fase('vista.grafico'):
+            self._aggiorna_grafico()
+
+    def _fase(self, nome: str):
+        """Misura un blocco con la strumentazione, se attiva"""
+        return self.strumentazione.misura(nome) if self.strumentazione else nullcontext()
+
+    def _mostra_caricamento(self, attivo: bool) -> None:
+        """Mostra o nasconde l'indicatore di caricamento"""
+        if attivo:
+            self.caricamento_bar.grid()
+            self.caricamento_bar.start(15)
+        else:
+            self.caricamento_bar.stop()
+            self.caricamento_bar.grid_remove()
+
+    def _aggiorna_riepilogo(self) -> None:
+        """Aggiorna le etichette del riepilogo dal bilancio corrente"""
+        saldo = self.bilancio.saldo
+        self.entrate_label.config(text=self.formattatore.formatta_valuta(self.bilancio.entrate))
+        self.uscite_label.config(text=self.formattatore.formatta_valuta(self.bilancio.uscite))
         self.saldo_label.config(text=self.formattatore.formatta_valuta(saldo))
 
         # Colora saldo
@@ -431,64 +565,279 @@ class InterfacciaGrafica:
         else:
             self.saldo_label.config(foreground=self.colore_errore)
 
-        # Aggiorna lista transazioni
-        self._aggiorna_lista_transazioni(mese, filtro_cat)
+    def _on_modifica_database(self, evento: str, trans: Optional[RigaTransazione]) -> None:
+        """
+        Applica alla vista una modifica del database
+
+        Args:
+            evento: 'inserita', 'eliminata' o 'ricaricata'
+            trans: Transazione inserita o eliminata (None per 'ricaricata')
+        """
+        # Con un caricamento in corso i dati in memoria non sono affidabili
+        if evento == 'ricaricata' or trans is None or self.esecutore.in_attesa('vista'):
+            self.aggiorna_visualizzazione()
+            return
+
+        importo = trans.importo if evento == 'inserita' else -trans.importo
+
+        # L'andamento copre anche i mesi precedenti a quello selezionato
+        mese_trans = trans.data[:7]
+        if mese_trans in self.andamento_corrente:
+            entrate, uscite = self.andamento_corrente[mese_trans]
+            if trans.tipo == 'entrata':
+                entrate += importo
+            else:
+                uscite += importo
+            self.andamento_corrente[mese_trans] = (entrate, uscite)
+
+        # I risultati della ricerca comprendono tutti i mesi
+        if self._ricerca_lista:
+            if evento == 'inserita':
+                self._avvia_ricerca()
+            elif self.tree.exists(str(trans.id)):
+                self.tree.delete(str(trans.id))
+                self._chiavi_lista.pop(str(trans.id), None)
+                self._risultati_caricati -= 1
+
+        # Le modifiche ad altri mesi non cambiano il resto della vista corrente
+        if mese_trans != self.mese_var.get():
+            if mese_trans in self.andamento_corrente and \
+                    self.tipo_grafico_var.get() == "andamento":
+                self._aggiorna_grafico()
+            return
+
+        # Aggiorna riepilogo e dati del grafico
+        if trans.tipo == 'entrata':
+            self.bilancio.aggiungi_entrata(importo)
+        else:
+            self.bilancio.aggiungi_uscita(importo)
+            totale = self.spese_correnti.get(trans.categoria, 0) + importo
+            if totale > 0:
+                self.spese_correnti[trans.categoria] = totale
+            else:
+                self.spese_correnti.pop(trans.categoria, None)
+            self.spese_correnti = dict(
+                sorted(self.spese_correnti.items(), key=lambda v: v[1], reverse=True))
+        self._aggiorna_riepilogo()
+
+        # Aggiorna la singola riga della lista (i risultati della ricerca sono già aggiornati)
+        if not self._ricerca_lista:
+            if evento == 'inserita':
+                self._inserisci_riga_lista(trans)
+            elif self.tree.exists(str(trans.id)):
+                self.tree.delete(str(trans.id))
+                self._chiavi_lista.pop(str(trans.id), None)
 
-        # Aggiorna grafico
         self._aggiorna_grafico()
 
-    def _aggiorna_lista_transazioni(self, mese: str, categoria: Optional[str]) -> None:
-        """Aggiorna la lista delle transazioni"""
-        # Pulisci treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def _on_ricerca_modificata(self, *args) -> None:
+        """Riavvia l'attesa prima della ricerca a ogni tasto premuto"""
+        if self._ricerca_pianificata is not None:
+            self.root.after_cancel(self._ricerca_pianificata)
+        self._ricerca_pianificata = self.root.after(RITARDO_RICERCA_MS, self._avvia_ricerca)
+
+    def _avvia_ricerca(self) -> None:
+        """Carica in background la prima pagina della lista per il testo cercato"""
+        self._ricerca_pianificata = None
+        mese = self.mese_var.get()
+        filtro_cat = self.filtro_categoria_var.get()
+        cat_filtro = None if filtro_cat == "Tutte" else filtro_cat
+        ricerca = self.ricerca_var.get().strip()
+
+        # Una ricerca più recente sostituisce quella ancora in attesa
+        self.esecutore.invia('lista',
+                             lambda db: self._leggi_prima_pagina(db, mese, cat_filtro, ricerca),
+                             lambda pagina: self._aggiorna_lista_transazioni(
+                                 mese, filtro_cat, pagina, ricerca))
+
+    @staticmethod
+    def _leggi_prima_pagina(db: Database, mese: str, cat_filtro: Optional[str],
+                            ricerca: str) -> list:
+        """Legge la prima pagina della lista: risultati della ricerca o transazioni del mese"""
+        if ricerca:
+            return db.cerca_transazioni(ricerca, categoria=cat_filtro, limite=DIMENSIONE_PAGINA)
+        return db.ottieni_pagina_transazioni(mese, cat_filtro, None, DIMENSIONE_PAGINA)
+
+    def _aggiorna_lista_transazioni(self, mese: str, categoria: Optional[str],
+                                    prima_pagina: Optional[list] = None,
+                                    ricerca: str = "") -> None:
+        """
+        Aggiorna la lista delle transazioni caricando solo la prima pagina
+
+        Args:
+            mese: Mese da visualizzare
+            categoria: Filtro per categoria ("Tutte" per nessun filtro)
+            prima_pagina: Prima pagina già caricata (None per leggerla in background)
+            ricerca: Testo cercato in tutti i mesi ("" per la lista del mese)
+        """
+        # Pulisci treeview con una sola chiamata
+        self.tree.delete(*self.tree.get_children())
+        self._chiavi_lista = {}
 
-        # Ottieni transazioni
         cat_filtro = None if categoria == "Tutte" else categoria
-        transazioni = self.db.ottieni_transazioni(mese, cat_filtro)
+        self._filtri_lista = (mese, cat_filtro)
+        self._ricerca_lista = ricerca
+        self._risultati_caricati = 0
+        self._ultima_transazione = None
+        self._lista_completa = False
+        self._versione_lista += 1
+        self._caricamento_pianificato = False
+        if prima_pagina is None:
+            self._richiedi_pagina_transazioni()
+        else:
+            self._carica_pagina_transazioni(prima_pagina)
+
+    def _richiedi_pagina_transazioni(self) -> None:
+        """Legge in background la pagina successiva della lista"""
+        self._caricamento_pianificato = True
+        (mese, cat_filtro), ricerca = self._filtri_lista, self._ricerca_lista
+        scostamento, dopo = self._risultati_caricati, self._ultima_transazione
+        versione = self._versione_lista
+
+        def leggi(db: Database) -> list:
+            if ricerca:
+                # I risultati sono ordinati per pertinenza: pagine per posizione
+                return db.cerca_transazioni(ricerca, categoria=cat_filtro,
+                                            limite=DIMENSIONE_PAGINA, scostamento=scostamento)
+            return db.ottieni_pagina_transazioni(mese, cat_filtro, dopo, DIMENSIONE_PAGINA)
+
+        def applica(transazioni: list) -> None:
+            if versione == self._versione_lista:
+                self._carica_pagina_transazioni(transazioni)
+
+        def fine_caricamento(*args) -> None:
+            if versione == self._versione_lista:
+                self._caricamento_pianificato = False
+
+        self.esecutore.invia('lista', leggi, applica, fine_caricamento, fine_caricamento)
+
+    def _carica_pagina_transazioni(self, transazioni: list) -> None:
+        """Aggiunge alla lista una pagina di transazioni già caricata"""
+        self._caricamento_pianificato = False
+        if self._lista_completa:
+            return
+
+        self._risultati_caricati += len(transazioni)
+        if len(transazioni) < DIMENSIONE_PAGINA:
+            self._lista_completa = True
+        if transazioni:
+            self._ultima_transazione = transazioni[-1]
 
         # Popola treeview
         for trans in transazioni:
-            data_formattata = self.formattatore.formatta_data(trans['data'])
-            importo_formattato = self.formattatore.formatta_valuta(trans['importo'])
-            tipo_label = trans['tipo'].capitalize()
+            self._inserisci_riga_treeview(trans, tk.END)
+
+    def _inserisci_riga_treeview(self, trans: RigaTransazione, posizione) -> None:
+        """Inserisce una transazione nella treeview alla posizione indicata"""
+        data_formattata = self.formattatore.formatta_data(trans.data)
+        importo_formattato = self.formattatore.formatta_valuta(trans.importo)
+        tipo_label = trans.tipo.capitalize()
+
+        # Inserisci con tag per colore e ID
+        iid = str(trans.id)
+        self.tree.insert('', posizione, iid=iid,
+                       values=(data_formattata, tipo_label, trans.categoria,
+                             trans.descrizione, importo_formattato),
+                       tags=(trans.tipo, iid))
+        self._chiavi_lista[iid] = (trans.data, trans.data_inserimento, trans.id)
+
+    def _inserisci_riga_lista(self, trans: RigaTransazione) -> None:
+        """Inserisce una nuova transazione nella lista mantenendo l'ordinamento"""
+        _, cat_filtro = self._filtri_lista
+        if cat_filtro and trans.categoria != cat_filtro:
+            return
 
-            # Inserisci con tag per colore e ID
-            self.tree.insert('', tk.END,
-                           values=(data_formattata, tipo_label, trans['categoria'],
-                                 trans['descrizione'], importo_formattato),
-                           tags=(trans['tipo'], str(trans['id'])))
+        chiave = (trans.data, trans.data_inserimento, trans.id)
+        for indice, iid in enumerate(self.tree.get_children()):
+            if self._chiavi_lista[iid] < chiave:
+                self._inserisci_riga_treeview(trans, indice)
+                return
+
+        # Dopo l'ultima riga caricata: la mostrerà la pagina successiva
+        if self._lista_completa:
+            self._inserisci_riga_treeview(trans, tk.END)
+
+    def _on_scroll_lista(self, primo: str, ultimo: str) -> None:
+        """Aggiorna la scrollbar e carica altre righe vicino alla fine della lista"""
+        self.tree_scrollbar.set(primo, ultimo)
+        # Una ricerca in attesa sostituirà comunque la lista
+        if (float(ultimo) > 0.9 and not self._lista_completa
+                and not self._caricamento_pianificato
+                and not self.esecutore.in_attesa('lista')):
+            self._richiedi_pagina_transazioni()
+
+    def _ottieni_generatore_grafici(self):
+        """Importa matplotlib e crea il generatore di grafici al primo utilizzo"""
+        if self.generatore_grafici is None:
+            from grafici import GeneratoreGrafici
+            self.generatore_grafici = GeneratoreGrafici()
+            if self.strumentazione:
+                self.strumentazione.strumenta(self.generatore_grafici)
+        return self.generatore_grafici
+
+    def _on_tab_cambiato(self, event=None) -> None:
+        """Disegna il grafico rimandato quando si apre il tab Grafici"""
+        if self._grafico_da_aggiornare:
+            self._aggiorna_grafico()
 
     def _aggiorna_grafico(self) -> None:
-        """Aggiorna il grafico visualizzato"""
-        # Pulisci frame
-        for widget in self.grafico_frame.winfo_children():
-            widget.destroy()
+        """Aggiorna il grafico visualizzato riusando il canvas del tipo scelto"""
+        # Se il tab Grafici non è visibile il disegno viene rimandato
+        if self.notebook.select() != str(self.tab_grafici):
+            self._grafico_da_aggiornare = True
+            return
+        self._grafico_da_aggiornare = False
 
         mese = self.mese_var.get()
         tipo_grafico = self.tipo_grafico_var.get()
+        titolo = f"Spese per Categoria - {self.formattatore.ottieni_nome_mese(mese)}"
 
         try:
             if tipo_grafico == "torta":
-                spese = self.db.ottieni_spese_per_categoria(mese)
-                figura = self.generatore_grafici.crea_grafico_torta(
-                    spese, f"Spese per Categoria - {self.formattatore.ottieni_nome_mese(mese)}")
+                canvas = self._ottieni_generatore_grafici().mostra_grafico(
+                    "torta", self.grafico_frame, self._spese_in_euro(self.spese_correnti),
+                    titolo)
             elif tipo_grafico == "barre":
-                spese = self.db.ottieni_spese_per_categoria(mese)
-                figura = self.generatore_grafici.crea_grafico_barre(
-                    spese, f"Spese per Categoria - {self.formattatore.ottieni_nome_mese(mese)}",
-                    "Categoria", "Importo (€)", orizzontale=True)
-            else:  # confronto
-                entrate, uscite, saldo = self.db.ottieni_saldo(mese)
-                figura = self.generatore_grafici.crea_grafico_confronto_entrate_uscite(
-                    entrate, uscite)
-
-            # Incorpora in tkinter
-            canvas = self.generatore_grafici.incorpora_grafico_in_tkinter(
-                figura, self.grafico_frame)
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+                canvas = self._ottieni_generatore_grafici().mostra_grafico(
+                    "barre", self.grafico_frame, self._spese_in_euro(self.spese_correnti),
+                    titolo, xlabel="Categoria", ylabel="Importo (€)", orizzontale=True)
+            elif tipo_grafico == "confronto":
+                canvas = self._ottieni_generatore_grafici().mostra_grafico(
+                    "confronto", self.grafico_frame,
+                    (self.formattatore.in_euro(self.bilancio.entrate),
+                     self.formattatore.in_euro(self.bilancio.uscite)))
+            else:  # andamento
+                canvas = self._ottieni_generatore_grafici().mostra_grafico(
+                    "andamento", self.grafico_frame,
+                    self._andamento_in_euro(self.andamento_corrente))
+            if self.strumentazione:
+                # Il disegno avviene dopo, quando tkinter è inattivo (draw_idle)
+                self.strumentazione.strumenta(canvas, "Grafico", ['draw'])
+            widget_grafico = canvas.get_tk_widget()
         except Exception as e:
-            ttk.Label(self.grafico_frame, text=f"Errore nella generazione del grafico: {e}").pack()
+            widget_grafico = ttk.Label(self.grafico_frame,
+                                       text=f"Errore nella generazione del grafico: {e}")
+
+        # Mostra solo il widget del grafico corrente
+        for widget in self.grafico_frame.winfo_children():
+            if widget is not widget_grafico:
+                if isinstance(widget, ttk.Label):
+                    widget.destroy()
+                else:
+                    widget.pack_forget()
+        if not widget_grafico.winfo_manager():
+            widget_grafico.pack(fill=tk.BOTH, expand=True)
+
+    @staticmethod
+    def _spese_in_euro(spese: dict) -> dict:
+        """Converte {categoria: centesimi} in euro per i grafici"""
+        return {categoria: Formattatore.in_euro(importo) for categoria, importo in spese.items()}
+
+    @staticmethod
+    def _andamento_in_euro(andamento: dict) -> dict:
+        """Converte {mese: (entrate, uscite)} da centesimi in euro per i grafici"""
+        return {mese: (Formattatore.in_euro(entrate), Formattatore.in_euro(uscite))
+                for mese, (entrate, uscite) in andamento.items()}
 
     def _salva_grafico(self) -> None:
         """Salva il grafico corrente su file"""
@@ -496,42 +845,322 @@ class InterfacciaGrafica:
             defaultextension=".png",
             filetypes=[("PNG", "*.png"), ("PDF", "*.pdf"), ("Tutti i file", "*.*")]
         )
-        if percorso:
-            mese = self.mese_var.get()
-            tipo_grafico = self.tipo_grafico_var.get()
-
-            try:
-                if tipo_grafico == "torta":
-                    spese = self.db.ottieni_spese_per_categoria(mese)
-                    figura = self.generatore_grafici.crea_grafico_torta(spese)
-                elif tipo_grafico == "barre":
-                    spese = self.db.ottieni_spese_per_categoria(mese)
-                    figura = self.generatore_grafici.crea_grafico_barre(spese, orizzontale=True)
-                else:
-                    entrate, uscite, saldo = self.db.ottieni_saldo(mese)
-                    figura = self.generatore_grafici.crea_grafico_confronto_entrate_uscite(
-                        entrate, uscite)
+        if not percorso:
+            return
 
-                if self.generatore_grafici.salva_grafico(figura, percorso):
-                    messagebox.showinfo("Successo", "Grafico salvato con successo!")
-                else:
-                    messagebox.showerror("Errore", "Errore nel salvataggio del grafico")
-            except Exception as e:
-                messagebox.showerror("Errore", f"Errore: {e}")
+        mese = self.mese_var.get()
+        tipo_grafico = self.tipo_grafico_var.get()
+        generatore = self._ottieni_generatore_grafici()
+
+        def salva(db: Database) -> bool:
+            # Rendering fuori schermo (Agg) nel thread di lavoro
+            if tipo_grafico == "torta":
+                spese = self._spese_in_euro(db.ottieni_spese_per_categoria(mese))
+                figura = generatore.crea_grafico_torta(spese)
+            elif tipo_grafico == "barre":
+                spese = self._spese_in_euro(db.ottieni_spese_per_categoria(mese))
+                figura = generatore.crea_grafico_barre(spese, orizzontale=True)
+            elif tipo_grafico == "confronto":
+                entrate, uscite, saldo = db.ottieni_saldo(mese)
+                figura = generatore.crea_grafico_confronto_entrate_uscite(
+                    Formattatore.in_euro(entrate), Formattatore.in_euro(uscite))
+            else:
+                andamento = db.ottieni_andamento_mensile(
+                    sposta_mese(mese, -(MESI_ANDAMENTO - 1)), mese)
+                figura = generatore.crea_grafico_andamento_mensile(
+                    self._andamento_in_euro(andamento))
+            return generatore.salva_grafico(figura, percorso)
+
+        def completato(salvato: bool) -> None:
+            if salvato:
+                messagebox.showinfo("Successo", "Grafico salvato con successo!")
+            else:
+                messagebox.showerror("Errore", "Errore nel salvataggio del grafico")
+
+        self.esecutore.invia('salvataggio', salva, completato,
+                             lambda e: messagebox.showerror("Errore", f"Errore: {e}"))
+
+    def _importa_estratto(self) -> None:
+        """Importa un estratto conto bancario (CSV o OFX) nel thread di lavoro"""
+        percorso = filedialog.askopenfilename(
+            filetypes=[("Estratti conto", "*.csv *.ofx *.qfx"), ("CSV", "*.csv"),
+                       ("OFX", "*.ofx *.qfx"), ("Tutti i file", "*.*")]
+        )
+        if not percorso or self.esecutore.in_attesa('importazione'):
+            return
+
+        # Finestra di avanzamento (modale: l'importazione cambia i dati mostrati)
+        self._abilita_voce(VOCE_IMPORTA, False)
+        finestra = tk.Toplevel(self.root)
+        finestra.title("Importazione in corso")
+        finestra.transient(self.root)
+        finestra.grab_set()
+        ttk.Label(finestra, text="Importazione dell'estratto conto...").pack(padx=20, pady=(15, 5))
+        barra = ttk.Progressbar(finestra, length=300, mode='determinate', maximum=100)
+        barra.pack(padx=20, pady=5)
+        stato_label = ttk.Label(finestra, text="0 righe lette")
+        stato_label.pack(padx=20, pady=(5, 15))
+
+        def aggiorna_progresso(letti: int, totale: int, righe: int) -> None:
+            if finestra.winfo_exists():
+                barra['value'] = (letti / totale * 100) if totale else 100
+                stato_label.config(text=f"{righe} righe lette")
+
+        def esegui_importazione(db: Database) -> tuple:
+            importatore = ImportatoreEstratti(
+                db, callback_progresso=lambda letti, totale, righe: self.esecutore.chiama_in_gui(
+                    aggiorna_progresso, letti, totale, righe))
+            return importatore.importa(percorso)
+
+        def chiudi() -> None:
+            finestra.destroy()
+            self._abilita_voce(VOCE_IMPORTA, True)
+
+        def completato(risultato: tuple) -> None:
+            chiudi()
+            inseriti, scarti = risultato
+            # Gli osservatori sono registrati sul Database dell'interfaccia,
+            # non su quello del thread che ha importato
+            if inseriti:
+                self._on_modifica_database('ricaricata', None)
+            messaggio = f"Transazioni importate: {inseriti}"
+            if scarti:
+                messaggio += f"\nRighe scartate: {len(scarti)}"
+                for indice, errore in scarti[:5]:
+                    messaggio += f"\n  riga {indice + 1}: {errore}"
+            messagebox.showinfo("Importazione completata", messaggio)
+
+        def errore(e: Exception) -> None:
+            # File illeggibile, CSV malformato (csv.Error) o qualunque altro errore
+            # del lettore: l'importazione è già stata annullata dal Database
+            chiudi()
+            messagebox.showerror("Errore", f"Errore nell'importazione: {e}")
+
+        self.esecutore.invia('importazione', esegui_importazione, completato, errore, chiudi)
 
     def _backup_database(self) -> None:
-        """Crea un backup del database"""
+        """Crea un backup del database in background"""
         percorso = filedialog.asksaveasfilename(
             defaultextension=".db",
-            filetypes=[("Database SQLite", "*.db"), ("Tutti i file", "*.*")],
+            filetypes=[("Database SQLite", "*.db"), ("Database compresso", "*.db.gz"),
+                       ("Tutti i file", "*.*")],
             initialfile=f"backup_budgettracker_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
         )
-        if percorso:
-            if self.db.backup(percorso):
+        if not percorso or self.esecutore.in_attesa('backup'):
+            return
+
+        # Finestra di avanzamento (non modale: l'applicazione resta utilizzabile)
+        self._abilita_voce(VOCE_BACKUP, False)
+        finestra = tk.Toplevel(self.root)
+        finestra.title("Backup in corso")
+        finestra.transient(self.root)
+        ttk.Label(finestra, text="Backup del database...").pack(padx=20, pady=(15, 5))
+        barra = ttk.Progressbar(finestra, length=300, mode='determinate', maximum=100)
+        barra.pack(padx=20, pady=(5, 15))
+
+        def aggiorna_progresso(copiate: int, totali: int) -> None:
+            if finestra.winfo_exists():
+                barra['value'] = (copiate / totali * 100) if totali else 100
+
+        def esegui_backup(db: Database) -> bool:
+            return db.backup(
+                percorso, comprimi=percorso.endswith(".gz"),
+                callback_progresso=lambda c, t: self.esecutore.chiama_in_gui(
+                    aggiorna_progresso, c, t))
+
+        def chiudi() -> None:
+            finestra.destroy()
+            self._abilita_voce(VOCE_BACKUP, True)
+
+        def completato(riuscito: bool) -> None:
+            chiudi()
+            if riuscito:
                 messagebox.showinfo("Successo", "Backup creato con successo!")
             else:
                 messagebox.showerror("Errore", "Errore nella creazione del backup")
 
+        def errore(e: Exception) -> None:
+            chiudi()
+            messagebox.showerror("Errore", f"Errore nella creazione del backup: {e}")
+
+        self.esecutore.invia('backup', esegui_backup, completato, errore, chiudi)
+
+    def _esporta_transazioni(self) -> None:
+        """Chiede filtri e file di destinazione ed esporta le transazioni in background"""
+        finestra = tk.Toplevel(self.root)
+        finestra.title("Esporta Transazioni")
+        finestra.transient(self.root)
+        finestra.grab_set()
+
+        frame = ttk.Frame(finestra, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frame, text="Da mese (YYYY-MM):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        da_entry = ttk.Entry(frame, width=12)
+        da_entry.grid(row=0, column=1, sticky=tk.W, pady=5)
+
+        ttk.Label(frame, text="A mese (YYYY-MM):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        a_entry = ttk.Entry(frame, width=12)
+        a_entry.grid(row=1, column=1, sticky=tk.W, pady=5)
+
+        ttk.Label(frame, text="Categoria:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        categoria_var = tk.StringVar(value="Tutte")
+        ttk.Combobox(frame, textvariable=categoria_var, state="readonly", width=15,
+                     values=["Tutte"] + sorted(set(self.db.ottieni_categorie()))
+                     ).grid(row=2, column=1, sticky=tk.W, pady=5)
+
+        ttk.Label(frame, text="Lasciare vuoti i mesi per esportare tutto",
+                  foreground='gray').grid(row=3, column=0, columnspan=2, sticky=tk.W)
+
+        def conferma() -> None:
+            mesi = []
+            for entry in (da_entry, a_entry):
+                mese = entry.get().strip()
+                if mese:
+                    try:
+                        datetime.strptime(mese, "%Y-%m")
+                    except ValueError:
+                        messagebox.showerror("Errore", "Formato mese non valido. Usare YYYY-MM",
+                                             parent=finestra)
+                        return
+                mesi.append(mese or None)
+
+            percorso = filedialog.asksaveasfilename(
+                parent=finestra,
+                defaultextension=".csv",
+                filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"),
+                           ("Colonnare (analisi)", "*.btcol"), ("Tutti i file", "*.*")],
+                initialfile=f"transazioni_{datetime.now().strftime('%Y%m%d')}.csv"
+            )
+            if not percorso:
+                return
+            finestra.destroy()
+            categoria = categoria_var.get()
+            self._avvia_esportazione(percorso, mesi[0], mesi[1],
+                                     None if categoria == "Tutte" else categoria)
+
+        ttk.Button(frame, text="Esporta...", command=conferma).grid(
+            row=4, column=0, columnspan=2, pady=(15, 0))
+
+    def _avvia_esportazione(self, percorso: str, da_mese: Optional[str],
+                            a_mese: Optional[str], categoria: Optional[str]) -> None:
+        """Esegue l'esportazione nel thread di lavoro mostrando le righe scritte"""
+        if self.esecutore.in_attesa('esportazione'):
+            return
+        self._abilita_voce(VOCE_ESPORTA, False)
+        finestra = tk.Toplevel(self.root)
+        finestra.title("Esportazione in corso")
+        finestra.transient(self.root)
+        ttk.Label(finestra, text="Esportazione delle transazioni...").pack(padx=20, pady=(15, 5))
+        barra = ttk.Progressbar(finestra, length=300, mode='indeterminate')
+        barra.pack(padx=20, pady=5)
+        barra.start(15)
+        stato_label = ttk.Label(finestra, text="0 righe scritte")
+        stato_label.pack(padx=20, pady=(5, 15))
+
+        def aggiorna_progresso(righe: int) -> None:
+            if finestra.winfo_exists():
+                stato_label.config(text=f"{righe} righe scritte")
+
+        def esegui_esportazione(db: Database) -> int:
+            esportatore = EsportatoreTransazioni(
+                db, callback_progresso=lambda righe: self.esecutore.chiama_in_gui(
+                    aggiorna_progresso, righe))
+            return esportatore.esporta(percorso, da_mese=da_mese, a_mese=a_mese,
+                                       categoria=categoria)
+
+        def chiudi() -> None:
+            finestra.destroy()
+            self._abilita_voce(VOCE_ESPORTA, True)
+
+        def completato(numero: int) -> None:
+            chiudi()
+            messagebox.showinfo("Esportazione completata", f"Transazioni esportate: {numero}")
+
+        def errore(e: Exception) -> None:
+            chiudi()
+            messagebox.showerror("Errore", f"Errore nell'esportazione: {e}")
+
+        self.esecutore.invia('esportazione', esegui_esportazione, completato, errore, chiudi)
+
+    def _abilita_voce(self, etichetta: str, attiva: bool) -> None:
+        """Attiva o disattiva una voce del menu File"""
+        self.file_menu.entryconfig(etichetta, state=tk.NORMAL if attiva else tk.DISABLED)
+
+    def _verifica_riepiloghi(self) -> None:
+        """Verifica il riepilogo mensile e lo ricostruisce se non coerente"""
+        differenze = self.db.verifica_riepilogo()
+        if not differenze:
+            messagebox.showinfo("Verifica", "Il riepilogo mensile è coerente con le transazioni.")
+            return
+
+        mesi = sorted({mese for mese, _, _ in differenze})
+        risposta = messagebox.askyesno(
+            "Verifica",
+            f"Trovate {len(differenze)} differenze nei mesi: {', '.join(mesi[:6])}"
+            f"{'...' if len(mesi) > 6 else ''}\n\nRicostruire il riepilogo?")
+        if risposta:
+            if self.db.ricostruisci_riepilogo():
+                messagebox.showinfo("Successo", "Riepilogo ricostruito con successo!")
+                self.aggiorna_visualizzazione()
+            else:
+                messagebox.showerror("Errore", "Errore nella ricostruzione del riepilogo")
+
+    def _mostra_diagnostica(self) -> None:
+        """Mostra i tempi misurati dalla strumentazione, aggiornati ogni secondo"""
+        finestra = getattr(self, '_finestra_diagnostica', None)
+        if finestra is not None and finestra.winfo_exists():
+            finestra.lift()
+            return
+
+        finestra = tk.Toplevel(self.root)
+        finestra.title("Diagnostica Prestazioni")
+        finestra.geometry("760x520")
+        self._finestra_diagnostica = finestra
+
+        frame = ttk.Frame(finestra, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        colonne = ('chiamate', 'p50', 'p95', 'p99', 'massimo', 'righe')
+        tabella = ttk.Treeview(frame, columns=colonne, height=14)
+        tabella.heading('#0', text="Operazione")
+        tabella.column('#0', width=280)
+        intestazioni = ("Chiamate", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)", "Ultime righe")
+        for colonna, intestazione in zip(colonne, intestazioni):
+            tabella.heading(colonna, text=intestazione)
+            tabella.column(colonna, width=75, anchor=tk.E)
+        tabella.pack(fill=tk.BOTH, expand=True)
+
+        strumentazione = self.strumentazione
+        destinazione = (f" - log: {strumentazione.file_log}"
+                        if strumentazione.file_log else "")
+        ttk.Label(frame, text=f"Operazioni oltre {strumentazione.soglia_lenta_ms:.0f} ms"
+                              f"{destinazione}").pack(anchor=tk.W, pady=(10, 2))
+        lente_text = tk.Text(frame, height=8, font=('Courier', 9), wrap=tk.NONE)
+        lente_text.pack(fill=tk.BOTH)
+
+        def aggiorna() -> None:
+            if not finestra.winfo_exists():
+                return
+            tabella.delete(*tabella.get_children())
+            for nome, valori in strumentazione.statistiche().items():
+                righe = valori['righe']
+                tabella.insert('', tk.END, text=nome, values=(
+                    valori['chiamate'], f"{valori['p50']:.1f}", f"{valori['p95']:.1f}",
+                    f"{valori['p99']:.1f}", f"{valori['massimo']:.1f}",
+                    "" if righe is None else righe))
+
+            lente_text.delete('1.0', tk.END)
+            lente_text.insert('1.0', "\n".join(strumentazione.operazioni_lente()))
+            finestra.after(INTERVALLO_DIAGNOSTICA_MS, aggiorna)
+
+        pulsanti = ttk.Frame(frame)
+        pulsanti.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(pulsanti, text="Azzera", command=strumentazione.azzera).pack(side=tk.LEFT)
+        ttk.Button(pulsanti, text="Chiudi", command=finestra.destroy).pack(side=tk.RIGHT)
+
+        aggiorna()
+
     def _mostra_info(self) -> None:
         """Mostra informazioni sull'applicazione"""
         info = """BudgetTracker - Gestione Spese Personali
@@ -550,6 +1179,7 @@ con supporto per entrate, uscite e analisi statistiche."""
     def _on_closing(self) -> None:
         """Gestisce la chiusura dell'applicazione"""
         if messagebox.askokcancel("Uscita", "Vuoi uscire dall'applicazione?"):
+            self.esecutore.chiudi()
             self.db.chiudi()
             self.root.destroy()
 
@@ -0,0 +1,240 @@
+"""
+BudgetTracker - Modulo Importazione
+Importa gli estratti conto bancari (CSV e OFX) in streaming
+
+Studente: Cattano Lorenzo
+Anno: 2025/2026
+"""
+
+import csv
+import io
+import os
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from database import Database
+
+
+# Nomi di colonna riconosciuti per ogni campo (confronto senza maiuscole)
+MAPPATURA_DEFAULT = {
+    'tipo': ['tipo', 'type'],
+    'importo': ['importo', 'amount', 'valore', 'ammontare'],
+    'categoria': ['categoria', 'category'],
+    'descrizione': ['descrizione', 'description', 'causale', 'memo'],
+    'data': ['data', 'date', 'data operazione', 'data contabile', 'data valuta']
+}
+
+# Lunghezza massima accettata da Validatore.valida_descrizione
+MAX_DESCRIZIONE = 200
+
+# Dimensione dei blocchi letti dai file OFX
+DIMENSIONE_LETTURA = 64 * 1024
+
+_TRANSAZIONE_OFX = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.IGNORECASE | re.DOTALL)
+_CAMPO_OFX = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+# Solo punti seguiti da tre cifre (es. "1.234" o "1.234.567"): separatori delle migliaia
+_MIGLIAIA_CON_PUNTO = re.compile(r'[1-9]\d{0,2}(?:\.\d{3})+')
+
+
+class ImportatoreEstratti:
+    """Classe per l'importazione degli estratti conto nel database"""
+
+    def __init__(self, db: Database, categoria_default: str = "Altro",
+                 callback_progresso: Optional[Callable[[int, int, int], None]] = None,
+                 intervallo_progresso: int = 5000):
+        """
+        Inizializza l'importatore
+
+        Args:
+            db: Database in cui inserire le transazioni
+            categoria_default: Categoria usata quando il file non la specifica
+            callback_progresso: Funzione chiamata con (byte_letti, byte_totali, righe_lette)
+            intervallo_progresso: Ogni quante righe chiamare il callback
+        """
+        self.db = db
+        self.categoria_default = categoria_default
+        self.callback_progresso = callback_progresso
+        self.intervallo_progresso = intervallo_progresso
+
+    def importa(self, percorso: str, formato: Optional[str] = None,
+                dimensione_blocco: int = 10000, **opzioni) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Importa un estratto conto nel database
+
+        Args:
+            percorso: Percorso del file da importare
+            formato: 'csv' o 'ofx' (default: dedotto dall'estensione)
+            dimensione_blocco: Righe per ogni inserimento massivo
+            **opzioni: Opzioni passate al lettore (es. mappatura, delimitatore)
+
+        Returns:
+            Tupla (numero_inseriti, scarti) come Database.aggiungi_transazioni_bulk
+        """
+        if formato is None:
+            estensione = os.path.splitext(percorso)[1].lower()
+            formato = 'ofx' if estensione in ('.ofx', '.qfx') else 'csv'
+
+        if formato == 'ofx':
+            righe = self.leggi_ofx(percorso, **opzioni)
+        elif formato == 'csv':
+            righe = self.leggi_csv(percorso, **opzioni)
+        else:
+            raise ValueError(f"Formato non supportato: {formato}")
+
+        return self.db.aggiungi_transazioni_bulk(righe, dimensione_blocco)
+
+    def leggi_csv(self, percorso: str, mappatura: Optional[Dict[str, str]] = None,
+                  delimitatore: Optional[str] = None,
+                  encoding: str = "utf-8-sig") -> Iterator[Dict]:
+        """
+        Legge un file CSV riga per riga
+
+        Args:
+            percorso: Percorso del file CSV
+            mappatura: Dizionario {campo: nome_colonna} che sostituisce
+                il riconoscimento automatico delle intestazioni
+            delimitatore: Separatore di campo (default: rilevato dal file)
+            encoding: Codifica del file
+
+        Yields:
+            Dizionari con chiavi tipo, importo, categoria, descrizione, data
+        """
+        totale = os.path.getsize(percorso)
+        with open(percorso, 'rb') as grezzo:
+            testo = io.TextIOWrapper(grezzo, encoding=encoding, newline='')
+            if delimitatore is None:
+                delimitatore = self._rileva_delimitatore(testo.readline())
+                testo.seek(0)
+
+            lettore = csv.reader(testo, delimiter=delimitatore)
+            intestazione = next(lettore, None)
+            if intestazione is None:
+                return
+            indici = self._indici_colonne(intestazione, mappatura)
+            if 'importo' not in indici or 'data' not in indici:
+                raise ValueError("Il file CSV deve contenere le colonne importo e data")
+
+            numero = 0
+            for numero, campi in enumerate(lettore, 1):
+                if not campi:
+                    continue
+                valori = {campo: campi[i].strip() if i < len(campi) else ""
+                          for campo, i in indici.items()}
+                yield self._crea_riga(valori.get('tipo'), valori['importo'],
+                                      valori.get('categoria'), valori.get('descrizione'),
+                                      valori['data'])
+                if numero % self.intervallo_progresso == 0:
+                    self._notifica(grezzo.tell(), totale, numero)
+
+            self._notifica(totale, totale, numero)
+
+    def leggi_ofx(self, percorso: str, encoding: str = "latin-1") -> Iterator[Dict]:
+        """
+        Legge le transazioni (<STMTTRN>) di un file OFX a blocchi
+
+        Args:
+            percorso: Percorso del file OFX
+            encoding: Codifica del file
+
+        Yields:
+            Dizionari con chiavi tipo, importo, categoria, descrizione, data
+        """
+        totale = os.path.getsize(percorso)
+        numero = 0
+        with open(percorso, 'rb') as grezzo:
+            testo = io.TextIOWrapper(grezzo, encoding=encoding)
+            buffer = ""
+            while True:
+                blocco = testo.read(DIMENSIONE_LETTURA)
+                buffer += blocco
+                fine = 0
+                for corrispondenza in _TRANSAZIONE_OFX.finditer(buffer):
+                    fine = corrispondenza.end()
+                    campi = {nome.upper(): valore.strip()
+                             for nome, valore in _CAMPO_OFX.findall(corrispondenza.group(1))}
+                    descrizione = " - ".join(
+                        v for v in (campi.get('NAME'), campi.get('MEMO')) if v)
+                    data = campi.get('DTPOSTED', '')[:8]
+                    if len(data) == 8:
+                        data = f"{data[:4]}-{data[4:6]}-{data[6:]}"
+                    yield self._crea_riga(None, campi.get('TRNAMT', ''), None,
+                                          descrizione, data)
+                    numero += 1
+                    if numero % self.intervallo_progresso == 0:
+                        self._notifica(grezzo.tell(), totale, numero)
+
+                # Conserva solo la parte non ancora elaborata
+                if fine:
+                    buffer = buffer[fine:]
+                else:
+                    inizio = buffer.upper().rfind('<STMTTRN>')
+                    buffer = buffer[inizio:] if inizio >= 0 else buffer[-len('<STMTTRN>'):]
+                if not blocco:
+                    break
+
+        self._notifica(totale, totale, numero)
+
+    def _crea_riga(self, tipo: Optional[str], importo: str, categoria: Optional[str],
+                   descrizione: Optional[str], data: str) -> Dict:
+        """Normalizza i campi letti in un dizionario per Database"""
+        segno, importo = self.normalizza_importo(importo)
+        tipo = (tipo or "").strip().lower() or segno
+        return {
+            'tipo': tipo,
+            'importo': importo,
+            'categoria': categoria or self.categoria_default,
+            'descrizione': (descrizione or "")[:MAX_DESCRIZIONE],
+            'data': data
+        }
+
+    @staticmethod
+    def normalizza_importo(importo_str: str) -> Tuple[str, str]:
+        """
+        Normalizza un importo bancario (es. "-1.234,56", "1,234.56" o "1.234")
+
+        Args:
+            importo_str: Importo come letto dal file
+
+        Returns:
+            Tupla (tipo dedotto dal segno, importo senza segno per valida_importo)
+        """
+        importo_str = (importo_str or "").strip().replace('€', '').replace(' ', '')
+        tipo = 'uscita' if importo_str.startswith('-') else 'entrata'
+        importo_str = importo_str.lstrip('+-')
+
+        # Il separatore decimale è quello che compare per ultimo
+        if ',' in importo_str and '.' in importo_str:
+            if importo_str.rfind(',') > importo_str.rfind('.'):
+                importo_str = importo_str.replace('.', '')
+            else:
+                importo_str = importo_str.replace(',', '')
+        elif _MIGLIAIA_CON_PUNTO.fullmatch(importo_str):
+            # Formato italiano senza decimali: "1.234" sono 1234 euro
+            importo_str = importo_str.replace('.', '')
+        return tipo, importo_str
+
+    @staticmethod
+    def _rileva_delimitatore(prima_riga: str) -> str:
+        """Sceglie il separatore più frequente nell'intestazione"""
+        candidati = [';', ',', '\t', '|']
+        return max(candidati, key=prima_riga.count)
+
+    @staticmethod
+    def _indici_colonne(intestazione: List[str],
+                        mappatura: Optional[Dict[str, str]]) -> Dict[str, int]:
+        """Associa ogni campo all'indice della colonna corrispondente"""
+        colonne = [nome.strip().lower() for nome in intestazione]
+        indici = {}
+        for campo, alias in MAPPATURA_DEFAULT.items():
+            nomi = [mappatura[campo].lower()] if mappatura and campo in mappatura else alias
+            for nome in nomi:
+                if nome in colonne:
+                    indici[campo] = colonne.index(nome)
+                    break
+        return indici
+
+    def _notifica(self, letti: int, totale: int, righe: int) -> None:
+        """Chiama il callback di avanzamento se presente"""
+        if self.callback_progresso:
+            self.callback_progresso(letti, totale, righe)
@@ -6,22 +6,51 @@ Studente: Cattano Lorenzo
 Anno: 2025/2026
 """
 
-from datetime import datetime
-from typing import Tuple, Optional
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, Overflow, ROUND_HALF_UP
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple, Optional
 import re
 
 
+# Importo massimo accettato (un miliardo di euro) in centesimi
+IMPORTO_MASSIMO = 100_000_000_000
+
+# Formati accettati da Validatore.valida_data, nell'ordine in cui vengono provati
+FORMATI_DATA = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"]
+
+# Posizioni di anno, mese e giorno e dei separatori nelle date di 10 caratteri
+_SCHEMI_DATA = {
+    "%Y-%m-%d": ((0, 4), (5, 7), (8, 10), ord('-'), (4, 7)),
+    "%d/%m/%Y": ((6, 10), (3, 5), (0, 2), ord('/'), (2, 5)),
+    "%d-%m-%Y": ((6, 10), (3, 5), (0, 2), ord('-'), (2, 5)),
+    "%Y/%m/%d": ((0, 4), (5, 7), (8, 10), ord('/'), (4, 7))
+}
+
+# Giorni di ogni mese (indice 1-12) negli anni non bisestili
+_GIORNI_MESE = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Cifre oltre le quali un importo viene lasciato al controllo riga per riga,
+# in totale e nella parte intera (così i valori restano entro int64)
+_CIFRE_MASSIME = 18
+_CIFRE_INTERE_MASSIME = 15
+
+# Righe validate insieme dai metodi a colonne (limita la memoria delle matrici)
+_BLOCCO_COLONNA = 65_536
+
+
 class Transazione:
     """Classe che rappresenta una singola transazione"""
 
-    def __init__(self, tipo: str, importo: float, categoria: str,
+    __slots__ = ('tipo', 'importo', 'categoria', 'descrizione', 'data')
+
+    def __init__(self, tipo: str, importo: int, categoria: str,
                  descrizione: str = "", data: Optional[str] = None):
         """
         Inizializza una transazione
 
         Args:
             tipo: 'entrata' o 'uscita'
-            importo: Importo della transazione
+            importo: Importo della transazione in centesimi
             categoria: Categoria della transazione
             descrizione: Descrizione opzionale
             data: Data in formato YYYY-MM-DD (default: oggi)
@@ -33,33 +62,73 @@ class Transazione:
         self.data = data if data else datetime.now().strftime("%Y-%m-%d")
 
     def __str__(self) -> str:
-        return f"{self.tipo.upper()}: {self.importo}€ - {self.categoria} ({self.data})"
+        return (f"{self.tipo.upper()}: {Formattatore.formatta_valuta(self.importo)} - "
+                f"{self.categoria} ({self.data})")
+
+
+class RigaTransazione(NamedTuple):
+    """
+    Transazione letta dal database
+
+    È una tupla con campi nominati (nell'ordine delle colonne della
+    tabella): occupa molta meno memoria di un dizionario e si crea
+    direttamente dalla riga letta (vedi database.riga_transazione).
+    """
+    id: int
+    tipo: str
+    importo: int
+    categoria: str
+    descrizione: str
+    data: str
+    data_inserimento: str
+
+
+class ColonnaValidata(NamedTuple):
+    """
+    Esito della validazione di una colonna (vedi Validatore.valida_colonna_importi)
+
+    errori è la maschera degli errori per riga: 0 se la riga è valida,
+    altrimenti l'indice del messaggio in messaggi (gli stessi messaggi dei
+    metodi di validazione riga per riga).
+    """
+    valori: Any                  # array NumPy dei valori validati
+    errori: Any                  # array NumPy uint8 dei codici di errore
+    messaggi: Tuple[str, ...]
+
+    @property
+    def validi(self) -> Any:
+        """Maschera booleana delle righe valide"""
+        return self.errori == 0
+
+    def messaggio(self, indice: int) -> str:
+        """Restituisce il messaggio di errore di una riga ("" se valida)"""
+        return self.messaggi[self.errori[indice]]
 
 
 class Bilancio:
-    """Classe per la gestione del bilancio"""
+    """Classe per la gestione del bilancio (importi in centesimi)"""
 
-    def __init__(self, entrate: float = 0.0, uscite: float = 0.0):
+    def __init__(self, entrate: int = 0, uscite: int = 0):
         """
         Inizializza il bilancio
 
         Args:
-            entrate: Totale entrate
-            uscite: Totale uscite
+            entrate: Totale entrate in centesimi
+            uscite: Totale uscite in centesimi
         """
         self.entrate = entrate
         self.uscite = uscite
 
     @property
-    def saldo(self) -> float:
+    def saldo(self) -> int:
         """Calcola il saldo corrente"""
         return self.entrate - self.uscite
 
-    def aggiungi_entrata(self, importo: float) -> None:
+    def aggiungi_entrata(self, importo: int) -> None:
         """Aggiunge un'entrata al bilancio"""
         self.entrate += importo
 
-    def aggiungi_uscita(self, importo: float) -> None:
+    def aggiungi_uscita(self, importo: int) -> None:
         """Aggiunge un'uscita al bilancio"""
         self.uscite += importo
 
@@ -70,22 +139,24 @@ class Bilancio:
         return (self.saldo / self.entrate) * 100
 
     def __str__(self) -> str:
-        return f"Entrate: {self.entrate}€ | Uscite: {self.uscite}€ | Saldo: {self.saldo}€"
+        return (f"Entrate: {Formattatore.formatta_valuta(self.entrate)} | "
+                f"Uscite: {Formattatore.formatta_valuta(self.uscite)} | "
+                f"Saldo: {Formattatore.formatta_valuta(self.saldo)}")
 
 
 class Validatore:
     """Classe per la validazione degli input utente"""
 
     @staticmethod
-    def valida_importo(importo_str: str) -> Tuple[bool, Optional[float], str]:
+    def valida_importo(importo_str: str) -> Tuple[bool, Optional[int], str]:
         """
-        Valida un importo inserito dall'utente
+        Valida un importo in euro inserito dall'utente
 
         Args:
-            importo_str: Stringa contenente l'importo
+            importo_str: Stringa contenente l'importo (es. "12,50")
 
         Returns:
-            Tupla (valido, importo_float, messaggio_errore)
+            Tupla (valido, importo_centesimi, messaggio_errore)
         """
         if not importo_str or importo_str.strip() == "":
             return False, None, "L'importo non può essere vuoto"
@@ -94,17 +165,39 @@ class Validatore:
         importo_str = importo_str.replace(',', '.')
 
         try:
-            importo = float(importo_str)
-            if importo <= 0:
+            # Decimal evita gli errori di rappresentazione dei float (es. 0.29)
+            valore = Decimal(importo_str.strip())
+            centesimi = valore.scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+            if centesimi <= 0:
                 return False, None, "L'importo deve essere maggiore di zero"
-            if importo > 1000000000:
+            if centesimi > IMPORTO_MASSIMO:
                 return False, None, "L'importo è troppo grande"
-            # Arrotonda a 2 decimali
-            importo = round(importo, 2)
-            return True, importo, ""
-        except ValueError:
+            return True, int(centesimi), ""
+        except Overflow:
+            # Esponente oltre i limiti di Decimal (es. "1e999999")
+            if valore < 0:
+                return False, None, "L'importo deve essere maggiore di zero"
+            return False, None, "L'importo è troppo grande"
+        except (InvalidOperation, ValueError):
             return False, None, "L'importo deve essere un numero valido"
 
+    @staticmethod
+    def valida_centesimi(centesimi: int) -> Tuple[bool, str]:
+        """
+        Valida un importo già espresso in centesimi
+
+        Args:
+            centesimi: Importo in centesimi
+
+        Returns:
+            Tupla (valido, messaggio_errore)
+        """
+        if centesimi <= 0:
+            return False, "L'importo deve essere maggiore di zero"
+        if centesimi > IMPORTO_MASSIMO:
+            return False, "L'importo è troppo grande"
+        return True, ""
+
     @staticmethod
     def valida_data(data_str: str) -> Tuple[bool, Optional[str], str]:
         """
@@ -120,9 +213,7 @@ class Validatore:
             return False, None, "La data non può essere vuota"
 
         # Prova diversi formati
-        formati = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"]
-
-        for formato in formati:
+        for formato in FORMATI_DATA:
             try:
                 data_obj = datetime.strptime(data_str, formato)
                 # Verifica che la data non sia futura
@@ -193,22 +284,299 @@ class Validatore:
 
         return True, descrizione, ""
 
+    @staticmethod
+    def valida_colonna_importi(valori: Sequence[str]) -> ColonnaValidata:
+        """
+        Valida una colonna di importi in euro con le regole di valida_importo
+
+        Gli importi nella forma più comune (cifre con al più un separatore
+        decimale e un segno iniziale opzionale) vengono convertiti con
+        operazioni NumPy su tutta la colonna; gli altri valori passano da
+        valida_importo, quindi esiti e messaggi coincidono riga per riga.
+
+        Args:
+            valori: Importi come stringhe (es. "12,50")
+
+        Returns:
+            ColonnaValidata con i centesimi (int64, 0 nelle righe non valide)
+        """
+        return _valida_a_blocchi(valori, 'int64', 0, _valida_blocco_importi)
+
+    @staticmethod
+    def valida_colonna_date(valori: Sequence[str]) -> ColonnaValidata:
+        """
+        Valida una colonna di date con le regole di valida_data
+
+        Le date di 10 caratteri in uno dei FORMATI_DATA vengono controllate
+        con operazioni NumPy, un formato alla volta a partire da quello ISO
+        (in una colonna omogenea il formato viene quindi riconosciuto una
+        volta sola); la data odierna viene letta una volta per colonna. Le
+        date ISO valide vengono restituite senza ricostruirle, gli altri
+        valori passano da valida_data.
+
+        Args:
+            valori: Date come stringhe (es. "2025-03-14" o "14/03/2025")
+
+        Returns:
+            ColonnaValidata con le date in formato YYYY-MM-DD (None se non valide)
+        """
+        oggi = date.today()
+
+        def valida_blocco(np, blocco, risultati, errori, codici):
+            _valida_blocco_date(np, blocco, risultati, errori, codici, oggi)
+
+        return _valida_a_blocchi(valori, object, None, valida_blocco)
+
+
+def _valida_a_blocchi(valori: Sequence[str], tipo: Any, vuoto: Any,
+                      valida_blocco) -> ColonnaValidata:
+    """
+    Applica una validazione a colonne a blocchi di _BLOCCO_COLONNA righe
+
+    Args:
+        valori: Valori da validare
+        tipo: Tipo NumPy dei valori validati
+        vuoto: Valore delle righe non valide
+        valida_blocco: Funzione (np, blocco, risultati, errori, codici) che
+            scrive nelle viste del blocco i valori validati e i codici di errore
+
+    Returns:
+        ColonnaValidata della colonna
+    """
+    # NumPy viene importato solo qui: il resto del modulo (usato anche dal
+    # rapporto da riga di comando) non ne ha bisogno
+    import numpy as np
+
+    if not isinstance(valori, list):
+        valori = list(valori)
+    risultati = np.full(len(valori), vuoto, dtype=tipo)
+    errori = np.zeros(len(valori), dtype=np.uint8)
+    codici: Dict[str, int] = {"": 0}
+
+    for inizio in range(0, len(valori), _BLOCCO_COLONNA):
+        blocco = valori[inizio:inizio + _BLOCCO_COLONNA]
+        fine = inizio + len(blocco)
+        valida_blocco(np, blocco, risultati[inizio:fine], errori[inizio:fine], codici)
+
+    return ColonnaValidata(risultati, errori, tuple(codici))
+
+
+def _byte_righe(np, blocco: List[Any]) -> Tuple[Any, Any, Any, Any]:
+    """
+    Unisce un blocco di testi in un unico buffer di byte, una riga per valore
+
+    Ogni valore è seguito da un a capo e il buffer termina con
+    _CIFRE_MASSIME + 2 a capo di riserva, così i primi caratteri di ogni
+    riga si possono leggere senza controllare la fine del buffer. I valori
+    che non sono testi ASCII senza a capo diventano stringhe vuote e
+    restano da validare riga per riga.
+
+    Returns:
+        Tupla (buffer uint8, inizio di ogni riga, lunghezza di ogni riga,
+        maschera dei valori convertiti)
+    """
+    riserva = "\n" * (_CIFRE_MASSIME + 3)
+    try:
+        testo = "\n".join(blocco)
+        convertibili = testo.isascii()
+    except TypeError:
+        convertibili = False
+
+    if convertibili:
+        utilizzabili = np.ones(len(blocco), dtype=bool)
+        buffer = np.frombuffer((testo + riserva).encode('ascii'), dtype=np.uint8)
+        fini = np.flatnonzero(buffer == ord("\n"))
+        # Un a capo dentro un valore sposterebbe le righe successive
+        convertibili = len(fini) == len(blocco) - 1 + len(riserva)
+
+    if not convertibili:
+        utilizzabili = np.array([isinstance(valore, str) and valore.isascii()
+                                 and "\n" not in valore for valore in blocco], dtype=bool)
+        testo = "\n".join(valore if ok else "" for valore, ok in zip(blocco, utilizzabili))
+        buffer = np.frombuffer((testo + riserva).encode('ascii'), dtype=np.uint8)
+        fini = np.flatnonzero(buffer == ord("\n"))
+
+    fini = fini[:len(blocco)]
+    inizi = np.empty_like(fini)
+    inizi[0] = 0
+    inizi[1:] = fini[:-1] + 1
+    return buffer, inizi, fini - inizi, utilizzabili
+
+
+def _valida_righe(blocco: List[Any], righe, valida, risultati, errori,
+                  codici: Dict[str, int]) -> None:
+    """Valida riga per riga i valori non gestiti dal percorso vettoriale"""
+    for i in righe:
+        valido, valore, messaggio = valida(blocco[i])
+        if valido:
+            risultati[i] = valore
+        else:
+            errori[i] = codici.setdefault(messaggio, len(codici))
+
+
+def _valida_blocco_importi(np, blocco: List[Any], risultati, errori,
+                           codici: Dict[str, int]) -> None:
+    """Validazione vettoriale di un blocco di importi (vedi valida_colonna_importi)"""
+    buffer, inizi, lunghezze, utilizzabili = _byte_righe(np, blocco)
+
+    primo = buffer[inizi]
+    segno = (primo == ord('+')) | (primo == ord('-'))
+    negativo = primo == ord('-')
+
+    # Lettura di una colonna di caratteri alla volta (la colonna 0 è il primo
+    # carattere di ogni importo): gli importi più lunghi di _CIFRE_MASSIME
+    # cifre più segno e separatore restano a valida_importo
+    larghezza = int(min(lunghezze.max(initial=0), _CIFRE_MASSIME + 2))
+    irregolari = ~utilizzabili | (lunghezze > larghezza)
+    lunghezze = lunghezze.astype(np.int32)
+    intero = np.zeros(len(blocco), dtype=np.int64)
+    numero_cifre = np.zeros(len(blocco), dtype=np.int32)
+    separatore = np.full(len(blocco), -1, dtype=np.int32)
+    posizioni = inizi.copy()
+
+    for colonna in range(larghezza):
+        caratteri = buffer[posizioni]
+        posizioni += 1
+        corpo = lunghezze > colonna
+        if colonna == 0:
+            corpo &= ~segno
+        valori_cifre = caratteri - np.uint8(ord('0'))
+        cifre = corpo & (valori_cifre < 10)
+        separatori = corpo & ((caratteri == ord('.')) | (caratteri == ord(',')))
+        # Spazi, esponenti, underscore, altri caratteri e separatori ripetuti
+        # restano a valida_importo
+        irregolari |= (corpo & ~cifre & ~separatori) | (separatori & (separatore >= 0))
+        separatore[separatori] = colonna
+        numero_cifre += cifre
+        # Tutte le cifre come un unico intero, poi riportato ai centesimi
+        intero = np.where(cifre, intero * 10 + valori_cifre, intero)
+
+    decimali = np.where(separatore >= 0, lunghezze - 1 - separatore, 0)
+    regolari = (~irregolari
+                & (numero_cifre > 0)
+                & (numero_cifre <= _CIFRE_MASSIME)
+                & (numero_cifre - decimali <= _CIFRE_INTERE_MASSIME))
+
+    potenze = 10 ** np.arange(_CIFRE_MASSIME + 1, dtype=np.int64)
+    eccesso = decimali - 2
+    centesimi = np.where(eccesso <= 0,
+                         intero * potenze[np.clip(-eccesso, 0, 2)],
+                         intero // potenze[np.clip(eccesso, 0, _CIFRE_MASSIME)])
+    # ROUND_HALF_UP: si arrotonda per eccesso se la terza cifra decimale è almeno 5
+    terza_cifra = intero // potenze[np.clip(eccesso - 1, 0, _CIFRE_MASSIME)] % 10
+    centesimi += (eccesso > 0) & (terza_cifra >= 5)
+
+    non_positivi = regolari & (negativo | (centesimi == 0))
+    troppo_grandi = regolari & ~non_positivi & (centesimi > IMPORTO_MASSIMO)
+    validi = regolari & ~non_positivi & ~troppo_grandi
+
+    risultati[validi] = centesimi[validi]
+    errori[non_positivi] = codici.setdefault("L'importo deve essere maggiore di zero",
+                                             len(codici))
+    errori[troppo_grandi] = codici.setdefault("L'importo è troppo grande", len(codici))
+
+    _valida_righe(blocco, np.flatnonzero(~regolari), Validatore.valida_importo,
+                  risultati, errori, codici)
+
+
+def _valida_blocco_date(np, blocco: List[Any], risultati, errori,
+                        codici: Dict[str, int], oggi: date) -> None:
+    """Validazione vettoriale di un blocco di date (vedi valida_colonna_date)"""
+    buffer, inizi, lunghezze, utilizzabili = _byte_righe(np, blocco)
+    da_controllare = utilizzabili & (lunghezze == 10)
+    decise = np.zeros(len(blocco), dtype=bool)
+
+    if da_controllare.any():
+        # Primi 10 caratteri di ogni riga (quelli delle righe più corte non contano)
+        matrice = buffer[inizi[:, None] + np.arange(10)]
+        cifre = matrice.astype(np.int32) - ord('0')
+        originali = np.array(blocco, dtype=object)
+        limite_vecchie = oggi.year - 100
+        oggi_numero = oggi.year * 10000 + oggi.month * 100 + oggi.day
+        giorni_mese = np.array(_GIORNI_MESE, dtype=np.int32)
+        codice_futura = codici.setdefault("La data non può essere futura", len(codici))
+        codice_vecchia = codici.setdefault("La data è troppo vecchia", len(codici))
+
+        for formato in FORMATI_DATA:
+            if not da_controllare.any():
+                break
+            (a1, a2), (m1, m2), (g1, g2), separatore, (s1, s2) = _SCHEMI_DATA[formato]
+            posizioni_cifre = [p for p in range(10) if p not in (s1, s2)]
+            schema = (da_controllare
+                      & (matrice[:, s1] == separatore) & (matrice[:, s2] == separatore)
+                      & ((cifre[:, posizioni_cifre] >= 0)
+                         & (cifre[:, posizioni_cifre] <= 9)).all(axis=1))
+            if not schema.any():
+                continue
+            # Le date di altri formati non possono avere questa disposizione
+            da_controllare &= ~schema
+
+            righe = np.flatnonzero(schema)
+            scelte = cifre[righe]
+            anno = (scelte[:, a1] * 1000 + scelte[:, a1 + 1] * 100
+                    + scelte[:, a1 + 2] * 10 + scelte[:, a1 + 3])
+            mese = scelte[:, m1] * 10 + scelte[:, m1 + 1]
+            giorno = scelte[:, g1] * 10 + scelte[:, g1 + 1]
+
+            bisestile = (anno % 4 == 0) & ((anno % 100 != 0) | (anno % 400 == 0))
+            massimo = giorni_mese[np.clip(mese, 0, 12)] + (bisestile & (mese == 2))
+            # Le date inesistenti restano a valida_data (e al suo messaggio)
+            esistenti = ((anno >= 1) & (mese >= 1) & (mese <= 12)
+                         & (giorno >= 1) & (giorno <= massimo))
+            righe, anno, mese, giorno = (righe[esistenti], anno[esistenti],
+                                         mese[esistenti], giorno[esistenti])
+            decise[righe] = True
+
+            future = anno * 10000 + mese * 100 + giorno > oggi_numero
+            vecchie = ~future & (anno < limite_vecchie)
+            errori[righe[future]] = codice_futura
+            errori[righe[vecchie]] = codice_vecchia
+
+            valide = righe[~future & ~vecchie]
+            if formato == "%Y-%m-%d":
+                risultati[valide] = originali[valide]
+            elif len(valide):
+                iso = np.empty((len(valide), 10), dtype=np.uint8)
+                iso[:, 0:4] = matrice[valide, a1:a2]
+                iso[:, 5:7] = matrice[valide, m1:m2]
+                iso[:, 8:10] = matrice[valide, g1:g2]
+                iso[:, [4, 7]] = ord('-')
+                risultati[valide] = iso.view('S10').ravel().astype(str).tolist()
+
+    _valida_righe(blocco, np.flatnonzero(~decise), Validatore.valida_data,
+                  risultati, errori, codici)
+
 
 class Formattatore:
     """Classe per la formattazione dei dati"""
 
     @staticmethod
-    def formatta_valuta(importo: float) -> str:
+    def formatta_valuta(centesimi: int) -> str:
         """
         Formatta un importo come valuta
 
         Args:
-            importo: Importo da formattare
+            centesimi: Importo in centesimi
 
         Returns:
             Stringa formattata (es. "1.234,56 €")
         """
-        return f"{importo:,.2f} €".replace(',', 'X').replace('.', ',').replace('X', '.')
+        euro, resto = divmod(abs(centesimi), 100)
+        segno = "-" if centesimi < 0 else ""
+        return f"{segno}{euro:,}".replace(',', '.') + f",{resto:02d} €"
+
+    @staticmethod
+    def in_euro(centesimi: int) -> float:
+        """
+        Converte un importo in centesimi in euro (per i grafici)
+
+        Args:
+            centesimi: Importo in centesimi
+
+        Returns:
+            Importo in euro
+        """
+        return centesimi / 100
 
     @staticmethod
     def formatta_data(data_str: str, formato_output: str = "%d/%m/%Y") -> str:
@@ -12,17 +12,32 @@ Descrizione:
 Applicazione desktop per la gestione delle finanze personali.
 Permette di registrare entrate e uscite, visualizzare il saldo mensile,
 analizzare le spese per categoria e consultare lo storico delle transazioni.
+
+Uso:
+    python main.py                                      # interfaccia grafica
+    python main.py report --from 2024-01 --to 2025-12   # rapporto senza interfaccia
 """
 
 import sys
-import tkinter as tk
-from tkinter import messagebox
 
 
 def main():
     """
     Funzione principale dell'applicazione
     """
+    # Rapporti da riga di comando: tkinter e matplotlib non vengono importati
+    if sys.argv[1:2] == ["report"]:
+        from rapporto import main as main_rapporto
+        sys.exit(main_rapporto(sys.argv[2:]))
+
+    # Intestazione
+    print("=" * 60)
+    print("BudgetTracker - Gestione Spese Personali")
+    print("Studente: Cattano Lorenzo")
+    print("Anno: 2025/2026")
+    print("=" * 60)
+    print("\nAvvio dell'applicazione...\n")
+
     try:
         # Importa il modulo GUI
         from gui import avvia_applicazione
@@ -42,13 +57,5 @@ def main():
 
 
 if __name__ == "__main__":
-    # Intestazione
-    print("=" * 60)
-    print("BudgetTracker - Gestione Spese Personali")
-    print("Studente: Cattano Lorenzo")
-    print("Anno: 2025/2026")
-    print("=" * 60)
-    print("\nAvvio dell'applicazione...\n")
-
     # Avvia l'applicazione
     main()
@@ -0,0 +1,352 @@
+"""
+BudgetTracker - Modulo Rapporti
+Rapporti da riga di comando, senza interfaccia grafica
+
+Uso:
+    python main.py report --from 2024-01 --to 2025-12
+    python main.py report --from 2024-01 --to 2025-12 --json --output rapporto.json
+    python main.py report --from 2025-01 --to 2025-12 --grafici cartella_grafici
+    python main.py report --from 2025-01 --to 2025-12 --grafici-mensili cartella --dpi 300
+
+Senza --grafici e --grafici-mensili non vengono importati né tkinter né matplotlib.
+
+Studente: Cattano Lorenzo
+Anno: 2025/2026
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from database import Database, intervallo_mese
+from logica import Bilancio, CalcolatoreStatistiche, Formattatore
+
+
+# Grafici disponibili per ogni mese con --grafici-mensili
+TIPI_GRAFICI_MENSILI = ('torta', 'barre', 'confronto')
+
+# Generatore di grafici di ogni processo di lavoro (vedi _inizializza_processo)
+_generatore = None
+
+
+class GeneratoreRapporti:
+    """Classe per la creazione di rapporti su un intervallo di mesi"""
+
+    def __init__(self, db: Database):
+        """
+        Inizializza il generatore
+
+        Args:
+            db: Database da cui leggere i riepiloghi
+        """
+        self.db = db
+
+    def crea(self, da_mese: str, a_mese: str) -> Dict:
+        """
+        Calcola i totali dell'intervallo dai riepiloghi mensili
+
+        Args:
+            da_mese: Primo mese (formato YYYY-MM)
+            a_mese: Ultimo mese, incluso (formato YYYY-MM)
+
+        Returns:
+            Dizionario con i totali per mese e per categoria (importi in centesimi)
+        """
+        andamento = self.db.ottieni_andamento_mensile(da_mese, a_mese)
+
+        spese: Dict[str, int] = {}
+        for spese_mese in self.db.ottieni_spese_mensili(da_mese, a_mese).values():
+            for categoria, importo in spese_mese.items():
+                spese[categoria] = spese.get(categoria, 0) + importo
+        spese = dict(sorted(spese.items(), key=lambda v: v[1], reverse=True))
+
+        bilancio = Bilancio(sum(e for e, _ in andamento.values()),
+                            sum(u for _, u in andamento.values()))
+        giorni = (date.fromisoformat(intervallo_mese(a_mese)[1])
+                  - date.fromisoformat(intervallo_mese(da_mese)[0])).days
+        categoria_principale, _ = CalcolatoreStatistiche.categoria_piu_costosa(spese)
+
+        return {
+            'da_mese': da_mese,
+            'a_mese': a_mese,
+            'mesi': [{'mese': mese, 'entrate': entrate, 'uscite': uscite,
+                      'saldo': entrate - uscite}
+                     for mese, (entrate, uscite) in andamento.items()],
+            'entrate': bilancio.entrate,
+            'uscite': bilancio.uscite,
+            'saldo': bilancio.saldo,
+            'percentuale_risparmio': round(bilancio.percentuale_risparmio(), 2),
+            'media_giornaliera': round(
+                CalcolatoreStatistiche.media_giornaliera(bilancio.uscite, giorni)),
+            'categoria_principale': categoria_principale,
+            'spese_per_categoria': [
+                {'categoria': categoria, 'importo': importo,
+                 'percentuale': round(CalcolatoreStatistiche.percentuale_categoria(
+                     importo, bilancio.uscite), 2)}
+                for categoria, importo in spese.items()
+            ]
+        }
+
+    @staticmethod
+    def formatta_testo(rapporto: Dict) -> str:
+        """
+        Formatta il rapporto come testo tabellare
+
+        Args:
+            rapporto: Dizionario creato da crea()
+
+        Returns:
+            Testo del rapporto
+        """
+        valuta = Formattatore.formatta_valuta
+        righe = [
+            f"BudgetTracker - Rapporto da "
+            f"{Formattatore.ottieni_nome_mese(rapporto['da_mese'])} a "
+            f"{Formattatore.ottieni_nome_mese(rapporto['a_mese'])}",
+            "",
+            f"{'Mese':<8} {'Entrate':>16} {'Uscite':>16} {'Saldo':>16}"
+        ]
+        for mese in rapporto['mesi']:
+            righe.append(f"{mese['mese']:<8} {valuta(mese['entrate']):>16} "
+                         f"{valuta(mese['uscite']):>16} {valuta(mese['saldo']):>16}")
+        righe.append(f"{'Totale':<8} {valuta(rapporto['entrate']):>16} "
+                     f"{valuta(rapporto['uscite']):>16} {valuta(rapporto['saldo']):>16}")
+        righe += [
+            "",
+            f"Risparmio: {Formattatore.formatta_percentuale(rapporto['percentuale_risparmio'])}",
+            f"Spesa media giornaliera: {valuta(rapporto['media_giornaliera'])}",
+            f"Categoria più costosa: {rapporto['categoria_principale']}",
+            "",
+            "Spese per categoria:"
+        ]
+        for voce in rapporto['spese_per_categoria']:
+            righe.append(f"  {voce['categoria']:<15} {valuta(voce['importo']):>16} "
+                         f"{Formattatore.formatta_percentuale(voce['percentuale']):>7}")
+        return "\n".join(righe)
+
+    @staticmethod
+    def salva_grafici(rapporto: Dict, cartella: str, dpi: int = 150) -> List[str]:
+        """
+        Salva i grafici del rapporto in PNG con il backend Agg
+
+        Args:
+            rapporto: Dizionario creato da crea()
+            cartella: Cartella di destinazione (creata se non esiste)
+            dpi: Risoluzione delle immagini
+
+        Returns:
+            Percorsi dei file salvati
+        """
+        # Deve precedere il primo import di matplotlib
+        os.environ['MPLBACKEND'] = 'Agg'
+        from grafici import GeneratoreGrafici
+
+        in_euro = Formattatore.in_euro
+        generatore = GeneratoreGrafici()
+        periodo = f"{rapporto['da_mese']}_{rapporto['a_mese']}"
+        figure = {
+            'andamento': generatore.crea_grafico_andamento_mensile(
+                {m['mese']: (in_euro(m['entrate']), in_euro(m['uscite']))
+                 for m in rapporto['mesi']}),
+            'categorie': generatore.crea_grafico_torta(
+                {v['categoria']: in_euro(v['importo'])
+                 for v in rapporto['spese_per_categoria']},
+                f"Spese per Categoria - {rapporto['da_mese']} / {rapporto['a_mese']}"),
+            'confronto': generatore.crea_grafico_confronto_entrate_uscite(
+                in_euro(rapporto['entrate']), in_euro(rapporto['uscite']))
+        }
+
+        os.makedirs(cartella, exist_ok=True)
+        salvati = []
+        for nome, figura in figure.items():
+            percorso = os.path.join(cartella, f"{nome}_{periodo}.png")
+            if generatore.salva_grafico(figura, percorso, dpi):
+                salvati.append(percorso)
+        return salvati
+
+    def salva_grafici_mensili(self, da_mese: str, a_mese: str, cartella: str,
+                              tipi: Sequence[str] = TIPI_GRAFICI_MENSILI, dpi: int = 150,
+                              processi: Optional[int] = None) -> List[str]:
+        """
+        Salva in PNG i grafici di ogni mese dell'intervallo in parallelo
+
+        I dati di tutti i mesi vengono letti prima con due query; ogni
+        grafico è poi disegnato con il backend Agg da un processo di un
+        ProcessPoolExecutor, così il rendering usa tutti i core.
+
+        Args:
+            da_mese: Primo mese (formato YYYY-MM)
+            a_mese: Ultimo mese, incluso (formato YYYY-MM)
+            cartella: Cartella di destinazione (creata se non esiste)
+            tipi: Grafici da creare per ogni mese (vedi TIPI_GRAFICI_MENSILI)
+            dpi: Risoluzione delle immagini
+            processi: Processi di lavoro (default: numero di core; 1 per
+                disegnare nel processo corrente)
+
+        Returns:
+            Percorsi dei file salvati
+        """
+        in_euro = Formattatore.in_euro
+        andamento = self.db.ottieni_andamento_mensile(da_mese, a_mese)
+        spese = self.db.ottieni_spese_mensili(da_mese, a_mese)
+
+        os.makedirs(cartella, exist_ok=True)
+        # Un compito per grafico: i mesi con più categorie non rallentano gli altri
+        compiti = [
+            (tipo, mese, in_euro(entrate), in_euro(uscite),
+             {categoria: in_euro(importo) for categoria, importo in spese[mese].items()},
+             os.path.join(cartella, f"{tipo}_{mese}.png"), dpi)
+            for mese, (entrate, uscite) in andamento.items()
+            for tipo in tipi
+        ]
+
+        processi = min(processi or os.cpu_count() or 1, len(compiti))
+        if processi <= 1:
+            _inizializza_processo()
+            salvati = [_salva_grafico_mensile(compito) for compito in compiti]
+        else:
+            # Importato qui: il rapporto senza grafici mensili non ne ha bisogno
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(processi, initializer=_inizializza_processo) as esecutore:
+                salvati = list(esecutore.map(_salva_grafico_mensile, compiti))
+        return [percorso for percorso in salvati if percorso]
+
+
+def _inizializza_processo() -> None:
+    """Prepara un processo di lavoro: backend Agg e un solo GeneratoreGrafici"""
+    global _generatore
+    # Deve precedere il primo import di matplotlib nel processo
+    os.environ['MPLBACKEND'] = 'Agg'
+    from grafici import GeneratoreGrafici
+
+    if _generatore is None:
+        _generatore = GeneratoreGrafici()
+
+
+def _salva_grafico_mensile(compito: Tuple) -> Optional[str]:
+    """
+    Disegna e salva un grafico mensile (eseguita nei processi di lavoro)
+
+    Args:
+        compito: Tupla (tipo, mese, entrate, uscite, spese, percorso, dpi) con
+            importi in euro
+
+    Returns:
+        Percorso del file salvato oppure None se il salvataggio non è riuscito
+    """
+    tipo, mese, entrate, uscite, spese, percorso, dpi = compito
+    titolo = f"Spese per Categoria - {Formattatore.ottieni_nome_mese(mese)}"
+    if tipo == 'torta':
+        figura = _generatore.crea_grafico_torta(spese, titolo)
+    elif tipo == 'barre':
+        figura = _generatore.crea_grafico_barre(spese, titolo, orizzontale=True)
+    elif tipo == 'confronto':
+        figura = _generatore.crea_grafico_confronto_entrate_uscite(entrate, uscite)
+    else:
+        raise ValueError(f"Tipo di grafico non valido: {tipo}")
+    return percorso if _generatore.salva_grafico(figura, percorso, dpi) else None
+
+
+def _tipi_grafici(valore: str) -> List[str]:
+    """Controlla l'elenco dei grafici mensili passato da riga di comando"""
+    tipi = [tipo.strip() for tipo in valore.split(',') if tipo.strip()]
+    for tipo in tipi:
+        if tipo not in TIPI_GRAFICI_MENSILI:
+            raise argparse.ArgumentTypeError(
+                f"grafico non valido: {tipo} (scegliere tra {', '.join(TIPI_GRAFICI_MENSILI)})")
+    return tipi
+
+
+def _mese(valore: str) -> str:
+    """Controlla un mese passato da riga di comando (formato YYYY-MM)"""
+    try:
+        return datetime.strptime(valore, "%Y-%m").strftime("%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mese non valido: {valore} (formato YYYY-MM)")
+
+
+def main(argomenti: Optional[List[str]] = None) -> int:
+    """
+    Esegue il comando report
+
+    Args:
+        argomenti: Argomenti dopo "report" (default: sys.argv[2:])
+
+    Returns:
+        Codice di uscita (0 se il rapporto è stato creato)
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py report",
+        description="Rapporto di entrate e uscite su un intervallo di mesi")
+    parser.add_argument('--from', dest='da_mese', type=_mese, required=True,
+                        help="primo mese (YYYY-MM)")
+    parser.add_argument('--to', dest='a_mese', type=_mese,
+                        help="ultimo mese incluso (YYYY-MM, default: come --from)")
+    parser.add_argument('--db', default="budgettracker.db",
+                        help="file del database (default: budgettracker.db)")
+    parser.add_argument('--json', action='store_true',
+                        help="stampa il rapporto in JSON (importi in centesimi)")
+    parser.add_argument('--output', help="scrive il rapporto su file invece che a schermo")
+    parser.add_argument('--grafici', metavar='CARTELLA',
+                        help="salva anche i grafici PNG nella cartella")
+    parser.add_argument('--grafici-mensili', metavar='CARTELLA',
+                        help="salva i grafici di ogni mese nella cartella (in parallelo)")
+    parser.add_argument('--tipi', type=_tipi_grafici, default=list(TIPI_GRAFICI_MENSILI),
+                        help="grafici mensili separati da virgola "
+                             f"(default: {','.join(TIPI_GRAFICI_MENSILI)})")
+    parser.add_argument('--processi', type=int,
+                        help="processi per i grafici mensili (default: numero di core)")
+    parser.add_argument('--dpi', type=int, default=150, help="risoluzione dei grafici")
+    opzioni = parser.parse_args(sys.argv[2:] if argomenti is None else argomenti)
+
+    a_mese = opzioni.a_mese or opzioni.da_mese
+    if a_mese < opzioni.da_mese:
+        parser.error("--to deve essere uguale o successivo a --from")
+    if not os.path.exists(opzioni.db):
+        print(f"Database non trovato: {opzioni.db}", file=sys.stderr)
+        return 2
+
+    try:
+        # Sola lettura: il rapporto non migra lo schema né cambia journal_mode
+        db = Database(opzioni.db, sola_lettura=True)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    try:
+        generatore = GeneratoreRapporti(db)
+        rapporto = generatore.crea(opzioni.da_mese, a_mese)
+        if opzioni.grafici_mensili:
+            attesi = len(rapporto['mesi']) * len(opzioni.tipi)
+            mensili = generatore.salva_grafici_mensili(
+                opzioni.da_mese, a_mese, opzioni.grafici_mensili, opzioni.tipi,
+                opzioni.dpi, opzioni.processi)
+    finally:
+        db.chiudi()
+
+    if opzioni.json:
+        testo = json.dumps(rapporto, ensure_ascii=False, indent=2)
+    else:
+        testo = generatore.formatta_testo(rapporto)
+
+    if opzioni.output:
+        with open(opzioni.output, 'w', encoding='utf-8') as f:
+            f.write(testo + "\n")
+    else:
+        print(testo)
+
+    if opzioni.grafici:
+        salvati = generatore.salva_grafici(rapporto, opzioni.grafici, opzioni.dpi)
+        for percorso in salvati:
+            print(f"Grafico salvato: {percorso}", file=sys.stderr)
+        if len(salvati) < 3:
+            return 1
+    if opzioni.grafici_mensili:
+        print(f"Grafici mensili salvati in {opzioni.grafici_mensili}: "
+              f"{len(mensili)} di {attesi}", file=sys.stderr)
+        if len(mensili) < attesi:
+            return 1
+    return 0
@@ -0,0 +1,299 @@
+"""
+BudgetTracker - Modulo Strumentazione
+Misura i tempi di database, grafici e aggiornamento della vista
+
+La strumentazione è disattivata di default: si attiva avviando l'applicazione
+con la variabile d'ambiente BUDGETTRACKER_STRUMENTAZIONE (es. =1). Il valore
+"1" usa la soglia SOGLIA_LENTA_MS, un altro numero è la soglia in millisecondi
+oltre la quale una chiamata viene scritta nel log delle operazioni lente.
+
+Studente: Cattano Lorenzo
+Anno: 2025/2026
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Variabile d'ambiente che attiva la strumentazione
+VARIABILE_ATTIVAZIONE = "BUDGETTRACKER_STRUMENTAZIONE"
+
+# Durata oltre la quale una chiamata finisce nel log delle operazioni lente
+SOGLIA_LENTA_MS = 100.0
+
+# File del log delle operazioni lente (nella cartella di lavoro)
+FILE_LOG_LENTE = "operazioni_lente.log"
+
+# Durate conservate per ogni misura: i percentili si riferiscono alle ultime
+CAMPIONI_PER_MISURA = 1000
+
+# Operazioni lente più recenti tenute in memoria per la finestra di diagnostica
+OPERAZIONI_LENTE_RECENTI = 50
+
+
+def percentile(ordinati: List[float], p: float) -> float:
+    """
+    Calcola un percentile con interpolazione lineare
+
+    Args:
+        ordinati: Valori in ordine crescente
+        p: Percentile tra 0 e 100
+
+    Returns:
+        Valore del percentile (0 se la lista è vuota)
+    """
+    if not ordinati:
+        return 0.0
+    posizione = (len(ordinati) - 1) * p / 100
+    basso = int(posizione)
+    alto = min(basso + 1, len(ordinati) - 1)
+    return ordinati[basso] + (ordinati[alto] - ordinati[basso]) * (posizione - basso)
+
+
+class Strumentazione:
+    """
+    Raccoglie le durate delle operazioni e ne calcola i percentili
+
+    Può essere usata da più thread (interfaccia ed EsecutoreDatabase). Gli
+    statement SQL eseguiti durante una chiamata a un metodo strumentato
+    vengono attribuiti alla chiamata tramite il trace della connessione.
+    """
+
+    def __init__(self, soglia_lenta_ms: float = SOGLIA_LENTA_MS,
+                 file_log: Optional[str] = FILE_LOG_LENTE,
+                 campioni: int = CAMPIONI_PER_MISURA):
+        """
+        Inizializza la strumentazione
+
+        Args:
+            soglia_lenta_ms: Durata oltre la quale una chiamata viene registrata nel log
+            file_log: File del log delle operazioni lente (None per non scriverlo)
+            campioni: Durate conservate per ogni misura
+        """
+        self.soglia_lenta_ms = soglia_lenta_ms
+        self.file_log = file_log
+        self.campioni = campioni
+        self._durate: Dict[str, deque] = {}
+        self._chiamate: Dict[str, int] = {}
+        self._righe: Dict[str, Optional[int]] = {}
+        self._lente: deque = deque(maxlen=OPERAZIONI_LENTE_RECENTI)
+        self._lock = threading.Lock()
+        # Pila degli statement SQL delle chiamate in corso nel thread
+        self._locale = threading.local()
+
+    def registra(self, nome: str, durata_ms: float, righe: Optional[int] = None,
+                 sql: Optional[List[str]] = None) -> None:
+        """
+        Registra la durata di un'operazione
+
+        Args:
+            nome: Nome della misura (es. 'Database.ottieni_saldo')
+            durata_ms: Durata in millisecondi
+            righe: Righe restituite, se note
+            sql: Statement SQL eseguiti durante l'operazione
+        """
+        with self._lock:
+            durate = self._durate.get(nome)
+            if durate is None:
+                durate = self._durate[nome] = deque(maxlen=self.campioni)
+            durate.append(durata_ms)
+            self._chiamate[nome] = self._chiamate.get(nome, 0) + 1
+            self._righe[nome] = righe
+
+        if durata_ms >= self.soglia_lenta_ms:
+            self._registra_lenta(nome, durata_ms, righe, sql or [])
+
+    @contextmanager
+    def misura(self, nome: str) -> Iterator[None]:
+        """
+        Misura il blocco di codice (es. una fase dell'aggiornamento della vista)
+
+        Args:
+            nome: Nome della misura
+        """
+        inizio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registra(nome, (time.perf_counter() - inizio) * 1000)
+
+    def strumenta(self, oggetto: Any, prefisso: Optional[str] = None,
+                  metodi: Optional[List[str]] = None) -> Any:
+        """
+        Sostituisce i metodi pubblici di un'istanza con versioni misurate
+
+        Le altre istanze della classe non vengono modificate. Se l'oggetto ha
+        una connessione sqlite3 (attributo conn) ne vengono tracciati gli SQL.
+
+        Args:
+            oggetto: Istanza da strumentare (es. Database, GeneratoreGrafici)
+            prefisso: Prefisso dei nomi delle misure (default: nome della classe)
+            metodi: Metodi da strumentare (default: tutti quelli pubblici)
+
+        Returns:
+            L'oggetto stesso
+        """
+        prefisso = prefisso or type(oggetto).__name__
+        if metodi is None:
+            metodi = [nome for nome in dir(type(oggetto))
+                      if not nome.startswith('_') and callable(getattr(type(oggetto), nome))]
+
+        for nome in metodi:
+            metodo = getattr(oggetto, nome)
+            if getattr(metodo, '_strumentato', False):
+                continue
+            setattr(oggetto, nome, self._avvolgi(f"{prefisso}.{nome}", metodo))
+
+        conn = getattr(oggetto, 'conn', None)
+        if conn is not None:
+            if hasattr(oggetto, 'imposta_traccia_sql'):
+                oggetto.imposta_traccia_sql(self._traccia_sql)
+            else:
+                conn.set_trace_callback(self._traccia_sql)
+        return oggetto
+
+    def statistiche(self) -> Dict[str, Dict[str, float]]:
+        """
+        Restituisce le statistiche di ogni misura
+
+        Returns:
+            Dizionario {nome: {'chiamate', 'p50', 'p95', 'p99', 'massimo', 'righe'}}
+            con i tempi in millisecondi calcolati sulle ultime durate
+        """
+        with self._lock:
+            copie = {nome: sorted(durate) for nome, durate in self._durate.items()}
+            chiamate = dict(self._chiamate)
+            righe = dict(self._righe)
+
+        return {
+            nome: {
+                'chiamate': chiamate[nome],
+                'p50': percentile(ordinati, 50),
+                'p95': percentile(ordinati, 95),
+                'p99': percentile(ordinati, 99),
+                'massimo': ordinati[-1],
+                'righe': righe[nome]
+            }
+            for nome, ordinati in sorted(copie.items())
+        }
+
+    def operazioni_lente(self) -> List[str]:
+        """Restituisce le ultime operazioni lente, dalla più recente"""
+        with self._lock:
+            return list(reversed(self._lente))
+
+    def azzera(self) -> None:
+        """Cancella tutte le misure raccolte"""
+        with self._lock:
+            self._durate.clear()
+            self._chiamate.clear()
+            self._righe.clear()
+            self._lente.clear()
+
+    def _avvolgi(self, nome: str, metodo):
+        """Crea la versione misurata di un metodo"""
+        @functools.wraps(metodo)
+        def misurato(*args, **kwargs):
+            sql = self._inizia_sql()
+            inizio = time.perf_counter()
+            try:
+                risultato = metodo(*args, **kwargs)
+            finally:
+                durata = (time.perf_counter() - inizio) * 1000
+                self._termina_sql(sql)
+
+            if inspect.isgenerator(risultato):
+                # Le query dei generatori vengono eseguite durante l'iterazione
+                return self._itera_misurando(nome, risultato, durata)
+            righe = len(risultato) if isinstance(risultato, (list, dict)) else None
+            self.registra(nome, durata, righe, sql)
+            return risultato
+
+        misurato._strumentato = True
+        return misurato
+
+    def _itera_misurando(self, nome: str, generatore: Iterator, durata: float) -> Iterator:
+        """Itera un generatore sommando il tempo di ogni passo fino alla chiusura"""
+        righe = 0
+        sql: List[str] = []
+        try:
+            while True:
+                attivi = self._inizia_sql()
+                inizio = time.perf_counter()
+                try:
+                    elemento = next(generatore)
+                except StopIteration:
+                    return
+                finally:
+                    durata += (time.perf_counter() - inizio) * 1000
+                    self._termina_sql(attivi)
+                    sql.extend(attivi)
+                # I blocchi di itera_blocchi_transazioni contano per le loro righe
+                righe += len(elemento) if isinstance(elemento, list) else 1
+                yield elemento
+        finally:
+            generatore.close()
+            self.registra(nome, durata, righe, sql)
+
+    def _inizia_sql(self) -> List[str]:
+        """Apre la raccolta degli statement per una chiamata del thread corrente"""
+        pila = getattr(self._locale, 'pila', None)
+        if pila is None:
+            pila = self._locale.pila = []
+        sql: List[str] = []
+        pila.append(sql)
+        return sql
+
+    def _termina_sql(self, sql: List[str]) -> None:
+        """Chiude la raccolta aperta da _inizia_sql (le chiamate sono annidate)"""
+        self._locale.pila.pop()
+
+    def _traccia_sql(self, statement: str) -> None:
+        """Trace della connessione: attribuisce lo statement alle chiamate in corso"""
+        # Anche le chiamate esterne includono gli statement di quelle annidate
+        for sql in getattr(self._locale, 'pila', ()):
+            sql.append(statement)
+
+    def _registra_lenta(self, nome: str, durata_ms: float, righe: Optional[int],
+                        sql: List[str]) -> None:
+        """Aggiunge un'operazione al log delle operazioni lente"""
+        riga = f"{datetime.now():%Y-%m-%d %H:%M:%S} {durata_ms:9.1f} ms {nome}"
+        if righe is not None:
+            riga += f" ({righe} righe)"
+        # Statement su una riga, senza duplicati (es. la stessa query a blocchi)
+        testo = "".join(f"\n    {' '.join(s.split())}" for s in dict.fromkeys(sql))
+
+        with self._lock:
+            self._lente.append(riga + testo)
+            if not self.file_log:
+                return
+            try:
+                with open(self.file_log, 'a', encoding='utf-8') as f:
+                    f.write(riga + testo + "\n")
+            except OSError as e:
+                print(f"Errore nella scrittura del log delle operazioni lente: {e}")
+                self.file_log = None
+
+
+def da_ambiente() -> Optional[Strumentazione]:
+    """
+    Crea la strumentazione se richiesta dalla variabile VARIABILE_ATTIVAZIONE
+
+    Returns:
+        Strumentazione oppure None se la variabile è assente, vuota o "0"
+    """
+    valore = os.environ.get(VARIABILE_ATTIVAZIONE, "").strip()
+    if valore in ("", "0"):
+        return None
+    try:
+        soglia = float(valore) if valore != "1" else SOGLIA_LENTA_MS
+    except ValueError:
+        soglia = SOGLIA_LENTA_MS
+    return Strumentazione(soglia)
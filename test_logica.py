@@ -0,0 +1,235 @@
+"""
+BudgetTracker - Test della validazione e del database
+Controlla i casi limite di Validatore, confronta la validazione a colonne
+con quella riga per riga, verifica l'inserimento massivo e i piani delle query
+
+Eseguire con: python -m pytest -q
+
+Studente: Cattano Lorenzo
+Anno: 2025/2026
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from database import Database
+from importatore import ImportatoreEstratti
+from logica import Validatore, FORMATI_DATA
+
+
+# Importi ai limiti del percorso vettoriale (cifre, separatori, arrotondamento)
+IMPORTI_LIMITE = [
+    "12,50", "-3", "1.", ".5", "1_000", "1e3", "1e999999", "-1e999999", " 7 ", "", "0,005",
+    "0,004", "€5", "٣", "1.2.3", "+", "-", "+0", "-0", "0", "1000000000",
+    "1000000000.01", "999999999.999", "000000000000000000001", "1234567890123456",
+    "123456789012345", "12.345", "12.355", "  \t8,1\n", "1 000", "NaN", "Infinity",
+    "5-", "+.5", ",5", "1,", "00.10", "x", ",9239499123252313421",
+    "956210723316.7302723", "1.23456789012345678", "12345678901234567.8",
+    "0.000000000000000005", "999999999999999999", "9999999999999999999"
+]
+
+# Date ai limiti (formati, giorni inesistenti, anni bisestili, spazi)
+DATE_LIMITE = [
+    "2024-02-29", "2023-02-29", "29/02/2024", "31/04/2024", "2024/13/01", "0000-01-01",
+    "1900-01-01", "2024-1-5", "5/1/2024", " 2024-01-05", "2024-01-05 ", "2024-01-05x",
+    "", "  ", "é2024-01-0", "2024‐01‐05", "01-02-2020", "2020/02/01", "31/12/1899",
+    "2024-01-01\n"
+]
+
+
+class TestValidatore(unittest.TestCase):
+    """Casi limite della validazione riga per riga"""
+
+    def test_esponente_enorme(self):
+        # Decimal solleva Overflow: deve diventare un normale errore di validazione
+        self.assertEqual(Validatore.valida_importo("1e999999"),
+                         (False, None, "L'importo è troppo grande"))
+        self.assertEqual(Validatore.valida_importo("-1e999999"),
+                         (False, None, "L'importo deve essere maggiore di zero"))
+
+    def test_esponente_enorme_inserimento_bulk(self):
+        with tempfile.TemporaryDirectory() as cartella:
+            db = Database(os.path.join(cartella, "test.db"))
+            righe = [{'tipo': 'uscita', 'importo': importo, 'categoria': 'Alimentari',
+                      'data': '2024-01-05'} for importo in ("12,50", "1e999999", "3")]
+            inseriti, scarti = db.aggiungi_transazioni_bulk(righe)
+            db.chiudi()
+        self.assertEqual(inseriti, 2)
+        self.assertEqual(scarti, [(1, "L'importo è troppo grande")])
+
+
+class TestImportatore(unittest.TestCase):
+    """Normalizzazione degli importi letti dagli estratti conto"""
+
+    def test_normalizza_importo(self):
+        casi = {
+            "-1.234,56": ('uscita', "1234,56"),
+            "1,234.56": ('entrata', "1234.56"),
+            "1.234": ('entrata', "1234"),
+            "-1.234.567": ('uscita', "1234567"),
+            "12.50": ('entrata', "12.50"),
+            "1.2345": ('entrata', "1.2345"),
+            "0.125": ('entrata', "0.125"),
+            "€ 12,5": ('entrata', "12,5")
+        }
+        for importo, atteso in casi.items():
+            with self.subTest(importo=importo):
+                self.assertEqual(ImportatoreEstratti.normalizza_importo(importo), atteso)
+
+
+class TestInserimentoBulk(unittest.TestCase):
+    """Validazione dell'inserimento massivo e transazione già aperta dal chiamante"""
+
+    def setUp(self):
+        self.cartella = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.cartella.name, "test.db"))
+
+    def tearDown(self):
+        self.db.chiudi()
+        self.cartella.cleanup()
+
+    def conta(self):
+        return self.db.cursor.execute("SELECT COUNT(*) FROM transazioni").fetchone()[0]
+
+    def test_errore_annulla_solo_il_bulk(self):
+        # Lavoro del chiamante non ancora confermato
+        self.db.cursor.execute("""
+            INSERT INTO transazioni (tipo, importo, categoria, descrizione, data, data_inserimento)
+            VALUES ('uscita', 100, 'Alimentari', '', '2024-01-01', '2024-01-01 00:00:00')
+        """)
+
+        def righe():
+            yield {'tipo': 'uscita', 'importo': 5, 'categoria': 'Alimentari', 'data': '2024-01-02'}
+            raise ValueError("file non valido")
+
+        with self.assertRaises(ValueError):
+            self.db.aggiungi_transazioni_bulk(righe())
+        self.assertTrue(self.db.conn.in_transaction)
+        self.assertEqual(self.conta(), 1)
+        trigger = {riga[0] for riga in self.db.cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        self.assertIn('trg_riepilogo_insert', trigger)
+        self.assertIn('trg_ricerca_insert', trigger)
+
+    def test_validazione_come_riga_per_riga(self):
+        # Importi in euro e date passano dalla validazione a colonne
+        righe = [{'tipo': 'uscita', 'importo': importo, 'categoria': 'Alimentari',
+                  'data': '2024-01-05'} for importo in IMPORTI_LIMITE]
+        righe += [{'tipo': 'entrata', 'importo': "10", 'categoria': 'Stipendio',
+                   'data': data} for data in DATE_LIMITE + [None]]
+        righe.append({'tipo': 'uscita', 'importo': 250, 'categoria': 'Alimentari',
+                      'data': '05/01/2024', 'descrizione': ' pane '})
+
+        attesi, scarti_attesi = [], []
+        for indice, riga in enumerate(righe):
+            if isinstance(riga['importo'], int):
+                valido, importo, msg = True, riga['importo'], ""
+            else:
+                valido, importo, msg = Validatore.valida_importo(riga['importo'])
+            if valido:
+                valido, data, msg = Validatore.valida_data(riga['data'])
+            if valido:
+                descrizione = (riga.get('descrizione') or "").strip()
+                attesi.append((riga['tipo'], importo, riga['categoria'], descrizione, data))
+            else:
+                scarti_attesi.append((indice, msg))
+
+        inseriti, scarti = self.db.aggiungi_transazioni_bulk(righe, dimensione_blocco=16)
+        self.assertEqual(scarti, scarti_attesi)
+        self.assertEqual(inseriti, len(attesi))
+        salvate = self.db.cursor.execute(
+            "SELECT tipo, importo, categoria, descrizione, data FROM transazioni ORDER BY id")
+        self.assertEqual(salvate.fetchall(), attesi)
+
+    def test_commit_lasciato_al_chiamante(self):
+        self.db.cursor.execute("""
+            INSERT INTO transazioni (tipo, importo, categoria, descrizione, data, data_inserimento)
+            VALUES ('uscita', 100, 'Alimentari', '', '2024-01-01', '2024-01-01 00:00:00')
+        """)
+        riga = {'tipo': 'uscita', 'importo': 7, 'categoria': 'Alimentari', 'data': '2024-01-03'}
+        self.assertEqual(self.db.aggiungi_transazioni_bulk([riga]), (1, []))
+        self.assertTrue(self.db.conn.in_transaction)
+        self.db.conn.rollback()
+        self.assertEqual(self.conta(), 0)
+        self.assertEqual(self.db.verifica_riepilogo(), [])
+
+
+class TestPianiQuery(unittest.TestCase):
+    """Le query frequenti devono usare un indice (EXPLAIN QUERY PLAN)"""
+
+    def test_nessuna_lettura_completa(self):
+        rnd = random.Random(3)
+        oggi = date.today()
+        with tempfile.TemporaryDirectory() as cartella:
+            db = Database(os.path.join(cartella, "test.db"))
+            categorie = {tipo: db.ottieni_categorie(tipo) for tipo in ('entrata', 'uscita')}
+            righe = []
+            for i in range(5000):
+                tipo = 'entrata' if rnd.random() < 0.2 else 'uscita'
+                righe.append({'tipo': tipo, 'importo': rnd.randint(100, 100_000),
+                              'categoria': rnd.choice(categorie[tipo]),
+                              'descrizione': f"Transazione {i}",
+                              'data': (oggi - timedelta(rnd.randrange(730))).isoformat()})
+            self.assertEqual(db.aggiungi_transazioni_bulk(righe), (5000, []))
+            problemi = db.verifica_piani_query()
+            db.chiudi()
+        self.assertEqual(problemi, [])
+
+
+class TestValidazioneColonne(unittest.TestCase):
+    """Verifica che i metodi a colonne diano gli stessi esiti di quelli riga per riga"""
+
+    def confronta(self, valori, valida_riga, valida_colonna, vuoto):
+        colonna = valida_colonna(valori)
+        for i, valore in enumerate(valori):
+            valido, risultato, messaggio = valida_riga(valore)
+            with self.subTest(valore=valore):
+                self.assertEqual(bool(colonna.validi[i]), valido)
+                self.assertEqual(colonna.valori[i], risultato if valido else vuoto)
+                self.assertEqual(colonna.messaggio(i), messaggio)
+
+    def test_importi_limite(self):
+        self.confronta(IMPORTI_LIMITE, Validatore.valida_importo,
+                       Validatore.valida_colonna_importi, 0)
+
+    def test_importi_casuali(self):
+        rnd = random.Random(1)
+        valori = []
+        for _ in range(5000):
+            valori.append("".join(rnd.choice("0123456789.,+- ")
+                                  for _ in range(rnd.randint(0, 22))))
+            valori.append(f"{rnd.randint(0, 10 ** rnd.randint(1, 13)) / 100:.{rnd.randint(0, 4)}f}")
+        self.confronta(valori, Validatore.valida_importo,
+                       Validatore.valida_colonna_importi, 0)
+
+    def test_date_limite(self):
+        oggi = date.today()
+        valori = DATE_LIMITE + [
+            oggi.isoformat(), (oggi + timedelta(1)).isoformat(),
+            (oggi + timedelta(1)).strftime("%d/%m/%Y"),
+            f"{oggi.year - 100}-01-01", f"{oggi.year - 101}-12-31"
+        ]
+        self.confronta(valori, Validatore.valida_data, Validatore.valida_colonna_date, None)
+
+    def test_date_casuali(self):
+        rnd = random.Random(2)
+        valori = []
+        for _ in range(5000):
+            testo = (date(1900, 1, 1) + timedelta(rnd.randint(0, 50_000))).strftime(
+                rnd.choice(FORMATI_DATA))
+            if rnd.random() < 0.2:
+                i = rnd.randrange(len(testo))
+                testo = testo[:i] + rnd.choice("0123456789/-") + testo[i + 1:]
+            valori.append(testo)
+        self.confronta(valori, Validatore.valida_data, Validatore.valida_colonna_date, None)
+
+    def test_colonne_vuote(self):
+        self.assertEqual(len(Validatore.valida_colonna_importi([]).valori), 0)
+        self.assertEqual(len(Validatore.valida_colonna_date([]).errori), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()